@@ -1,19 +1,12 @@
 # airecruit.py
 
-import os
+# 重量级依赖（litellm、weasyprint、pdfminer等）都在首次使用时才导入，保证REPL快速启动
 import argparse
-import json
 import datetime
 from pathlib import Path
 from dotenv import load_dotenv
-from litellm import completion
-from diff_match_patch import diff_match_patch
-import shlex
 from utils.workspace import WorkspaceManager
-from prompt_toolkit import PromptSession
-from prompt_toolkit.history import FileHistory
-from config import load_config, save_config, set_model, get_model, set_smtp_config
-from llm import get_system_prompt
+from config import load_config, set_model
 
 import warnings
 
@@ -28,10 +21,12 @@ load_dotenv()
 
 def chat_mode():
     """交互式聊天模式"""
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.history import FileHistory
     from prompt_toolkit.completion import WordCompleter
     from prompt_toolkit.styles import Style
     command_completer = WordCompleter([
-        '/file', '/model', '/work', '/exit', '/help'
+        '/file', '/model', '/work', '/rank', '/search', '/match', '/batch', '/stats', '/exit', '/help'
     ], ignore_case=True)
     
     # 定义颜色常量
@@ -47,14 +42,12 @@ def chat_mode():
         })
     )
     from utils.workspace import WorkspaceManager
-    from commands import (
-        handle_exit_command,
-        handle_file_command,
-        handle_help_command,
-        handle_model_command,
-        handle_work_command
-    )
+    # 命令模块在分发时才解析，首次使用某个命令时才导入其依赖
+    import commands
     ws = WorkspaceManager()
+    # 继续发送上次退出前未发完的邮件
+    from capacity.outbox import get_outbox
+    get_outbox()
     workspace_files = ws.list_files()
     print("欢迎进入AI招聘助手工作模式（输入/help查看帮助）")
     current_config = load_config()
@@ -76,22 +69,40 @@ def chat_mode():
                 continue
             
             if text == '/file':
-                text = handle_file_command(session, ws)
+                text = commands.handle_file_command(session, ws)
                 
             elif text.startswith('/model'):
-                handle_model_command(text, session)
+                commands.handle_model_command(text, session)
                 text = ''
                 
             elif text == '/exit':
-                if handle_exit_command():
+                if commands.handle_exit_command():
                     break
                 
             elif text == '/help':
-                handle_help_command()
+                commands.handle_help_command()
                 text = ''
                 
             elif text == '/work':
-                text = handle_work_command(session, ws, current_config)
+                text = commands.handle_work_command(session, ws, current_config)
+                
+            elif text == '/rank':
+                text = commands.handle_rank_command(session, ws)
+                
+            elif text.startswith('/search'):
+                commands.handle_search_command(text, ws)
+                text = ''
+                
+            elif text.startswith('/match'):
+                commands.handle_match_command(text, ws)
+                text = ''
+                
+            elif text == '/batch':
+                text = commands.handle_batch_command(session, ws)
+                
+            elif text.startswith('/stats'):
+                commands.handle_stats_command(text)
+                text = ''
             else:
                 # 非命令输入自动进入工作模式
                 text = '/work'
@@ -104,20 +115,65 @@ def chat_mode():
             break
 
 
+def bulk_ingest_mode(directory, file_type, workers):
+    """批量导入目录下的所有简历/JD文件"""
+    from utils.ingest import scan_directory, bulk_ingest
+    files = scan_directory(directory)
+    if not files:
+        print(f"{directory}目录中没有可用的文件（支持pdf/docx/md/txt格式）")
+        return
+
+    def progress(done, total, result):
+        status = "失败" if result['error'] else "完成"
+        print(f"[{done}/{total}] {status} {Path(result['source']).name} ({result['seconds']:.2f}s)")
+
+    results = bulk_ingest(files, WorkspaceManager(), file_type=file_type,
+                          workers=workers, progress=progress)
+    failed = [r for r in results if r['error']]
+    print(f"批量导入完成：成功 {len(results) - len(failed)} 个，失败 {len(failed)} 个")
+    for r in failed:
+        print(f"  {Path(r['source']).name}: {r['error']}")
+
 
 # CLI
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="AI Recruit Assistant")
     parser.add_argument("--browser", action="store_true", help="Start web server and open browser")
+    parser.add_argument("--serve", action="store_true",
+                        help="Serve the web UI with a production ASGI server (uvicorn)")
+    parser.add_argument("--host", default="0.0.0.0", help="Bind address for --serve")
+    parser.add_argument("--port", type=int, default=5001, help="Port for --serve")
+    parser.add_argument("--timeout", type=float, default=120,
+                        help="Request timeout in seconds for --serve (0 disables)")
     parser.add_argument("--verbose", action="store_true", help="Show LLM request details")
     parser.add_argument("-m", "--model", type=str, help="Set LLM model")
+    parser.add_argument("--ingest", nargs="?", const="workdir", metavar="DIR",
+                        help="Bulk convert and add all resumes in DIR (default: workdir)")
+    parser.add_argument("--workers", type=int, help="Number of worker processes for --ingest or --serve")
+    parser.add_argument("--file-type", default="auto", choices=["auto", "resume", "jd"],
+                        help="Workspace file type for --ingest")
+    parser.add_argument("--import-profile", action="store_true",
+                        help="Print an import-time breakdown of startup and lazily loaded dependencies")
     args = parser.parse_args()
-    if args.model:
+    if args.verbose:
+        from llm.metrics import set_verbose
+        set_verbose(True)
+    if args.import_profile:
+        from utils.import_profile import print_import_profile
+        print_import_profile()
+    elif args.ingest:
+        bulk_ingest_mode(args.ingest, args.file_type, args.workers)
+    elif args.model:
         set_model(args.model)
         print(f"模型已设置为：{args.model}")
+    elif args.serve:
+        from browser.asgi import serve
+        serve(host=args.host, port=args.port, workers=args.workers or 1, timeout=args.timeout)
     elif args.browser:
         from browser.server import app
+        from capacity.outbox import get_outbox
         import webbrowser
+        get_outbox()
         webbrowser.open('http://localhost:5001')
         app.run(host='0.0.0.0', port=5001, debug=True)
     else:
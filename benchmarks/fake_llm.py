@@ -0,0 +1,90 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FAKE_REPLY = (
+    "根据JD要求，建议突出以下经历：\n\n"
+    "- 高并发交易系统的性能优化经验（接口P99延迟降低85%）\n"
+    "- Kafka/RocketMQ 消息中间件的生产实践\n"
+    "- Led a team of 5 engineers delivering the reconciliation platform\n\n"
+    "需要我把优化后的简历导出为PDF吗？"
+)
+# 流式回复拆分的片段数
+STREAM_CHUNKS = 20
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """OpenAI 兼容的 /chat/completions 接口，按固定延迟返回固定回复"""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        prompt_chars = sum(len(m['content']) if isinstance(m['content'], str) else
+                           sum(len(p.get('text', '')) for p in m['content'])
+                           for m in body['messages'])
+        usage = {
+            'prompt_tokens': prompt_chars // 2 + 1,
+            'completion_tokens': len(FAKE_REPLY) // 2 + 1,
+            'total_tokens': (prompt_chars + len(FAKE_REPLY)) // 2 + 2,
+        }
+        time.sleep(self.server.latency)
+        if body.get('stream'):
+            self._stream(body['model'], usage)
+        else:
+            self._json({
+                'id': 'chatcmpl-bench', 'object': 'chat.completion', 'created': int(time.time()),
+                'model': body['model'],
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': FAKE_REPLY}}],
+                'usage': usage,
+            })
+
+    def _json(self, payload):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, model, usage):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.end_headers()
+        size = len(FAKE_REPLY) // STREAM_CHUNKS + 1
+        base = {'id': 'chatcmpl-bench', 'object': 'chat.completion.chunk',
+                'created': int(time.time()), 'model': model}
+        for i in range(0, len(FAKE_REPLY), size):
+            chunk = {**base, 'choices': [{'index': 0, 'finish_reason': None,
+                                          'delta': {'content': FAKE_REPLY[i:i + size]}}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode('utf-8'))
+        self.wfile.write(f"data: {json.dumps({**base, 'choices': [], 'usage': usage})}\n\n".encode('utf-8'))
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeLLMServer:
+    """在本地随机端口运行的假大模型服务，用于排除网络和服务商波动的基准测试"""
+
+    def __init__(self, latency=0.0):
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.latency = latency
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def api_base(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,278 @@
+"""基准测试：文件转换、系统提示组装、PDF导出和 /api/chat 端到端耗时
+
+在仓库根目录运行：
+
+    python -m benchmarks.run                   # 运行并写入 benchmarks/results.json
+    python -m benchmarks.run --save-baseline   # 同时保存为基线 benchmarks/baseline.json
+    python -m benchmarks.run --quick           # 少量重复，快速检查
+
+存在基线时自动对比，中位数耗时变慢超过 --threshold（默认25%）或转换输出发生变化时
+以非零状态退出。所有文件在临时目录中生成，大模型调用由本地假服务应答。
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+BENCH_DIR = REPO_ROOT / "benchmarks"
+DEFAULT_OUTPUT = BENCH_DIR / "results.json"
+DEFAULT_BASELINE = BENCH_DIR / "baseline.json"
+BENCH_MODEL = "openai/bench-model"
+CHAT_MESSAGE = "请根据JD优化我的简历"
+
+
+def _timings(fn, repeat, setup=None):
+    """执行 fn 若干次（先预热一次），返回耗时统计（毫秒）和最后一次的返回值"""
+    if setup:
+        setup()
+    result = fn()
+    times = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        started = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - started) * 1000)
+    times.sort()
+    stats = {
+        'runs': repeat,
+        'median_ms': round(statistics.median(times), 3),
+        'mean_ms': round(statistics.fmean(times), 3),
+        'min_ms': round(times[0], 3),
+        'p95_ms': round(times[min(len(times) - 1, int(round(0.95 * (len(times) - 1))))], 3),
+    }
+    return stats, result
+
+
+def _digest(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def _prepare_environment(workdir, llm_api_base):
+    """切换到临时工作目录并把大模型调用指向本地假服务"""
+    os.chdir(workdir)
+    os.environ['OPENAI_API_BASE'] = llm_api_base
+    os.environ['OPENAI_API_KEY'] = 'bench'
+    # 不联网拉取价格表
+    os.environ.setdefault('LITELLM_LOCAL_MODEL_COST_MAP', 'True')
+    Path('.config.json').write_text(json.dumps({
+        'model': BENCH_MODEL,
+        'context_window': 32000,
+    }), encoding='utf-8')
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+
+
+def bench_convert_pdf_to_md(corpus, size, repeat):
+    from utils.convert_cache import get_conversion_cache
+    from utils.file_utils import convert_pdf_to_md
+    source = corpus[size]['pdf']
+    output = Path(source).with_suffix('.out.md')
+
+    def run():
+        convert_pdf_to_md(source, str(output))
+        return output.read_text(encoding='utf-8')
+
+    cold, text = _timings(run, repeat, setup=get_conversion_cache().clear)
+    warm, _ = _timings(run, repeat)
+    return {
+        f"convert_pdf_to_md[cold,{size}]": {**cold, 'digest': _digest(text)},
+        f"convert_pdf_to_md[cached,{size}]": warm,
+    }
+
+
+def bench_pdf_to_markdown_converter(corpus, size, repeat):
+    from utils.pdf_utils import PDFToMarkdownConverter
+    converter = PDFToMarkdownConverter(corpus[size]['pdf'])
+    stats, text = _timings(converter.convert_to_markdown, repeat)
+    return {f"PDFToMarkdownConverter.convert_to_markdown[{size}]": {**stats, 'digest': _digest(text)}}
+
+
+def bench_get_system_prompt(corpus, size, repeat):
+    from llm import prompt
+    resume = Path(corpus[size]['md']).read_text(encoding='utf-8')
+    jd = Path(corpus['jd']).read_text(encoding='utf-8')
+    cold, text = _timings(lambda: prompt.get_system_prompt(resume, jd), repeat, setup=prompt._memo.clear)
+    warm, _ = _timings(lambda: prompt.get_system_prompt(resume, jd), repeat)
+    return {
+        f"get_system_prompt[cold,{size}]": {**cold, 'digest': _digest(''.join(text))},
+        f"get_system_prompt[memo,{size}]": warm,
+    }
+
+
+def bench_export_md_to_pdf(corpus, size, repeat):
+    # 先单独导入WeasyPrint，系统库缺失时以ImportError/OSError跳过本项
+    import weasyprint
+    from utils.file_utils import export_md_to_pdf
+    md = Path(corpus[size]['md']).read_text(encoding='utf-8')
+    output = Path(corpus[size]['md']).with_suffix('.export.pdf')
+    stats, _ = _timings(lambda: export_md_to_pdf(md, output), repeat)
+    return {f"export_md_to_pdf[{size}]": stats}
+
+
+def bench_api_chat(corpus, size, repeat):
+    from browser.server import app
+    from utils.workspace import WorkspaceManager
+    ws = WorkspaceManager()
+    ws.remove_files(ws.get_raw_files())
+    ws.add_file(corpus[size]['md'], 'resume')
+    ws.add_file(corpus['jd'], 'jd')
+    client = app.test_client()
+
+    def run():
+        response = client.post('/api/chat', json={'message': CHAT_MESSAGE, 'no_cache': True})
+        data = response.get_json()
+        if response.status_code != 200:
+            raise RuntimeError(data.get('error'))
+        return data['reply']
+
+    stats, _ = _timings(run, repeat)
+    return {f"api_chat[{size}]": stats}
+
+
+BENCHMARKS = [
+    bench_convert_pdf_to_md,
+    bench_pdf_to_markdown_converter,
+    bench_get_system_prompt,
+    bench_export_md_to_pdf,
+    bench_api_chat,
+]
+
+
+def _metadata(args):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_ROOT,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ''
+    try:
+        import pdfminer
+        pdfminer_version = pdfminer.__version__
+    except ImportError:
+        pdfminer_version = None
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'pdfminer': pdfminer_version,
+        'repeat': args.repeat,
+        'llm_latency_ms': args.llm_latency_ms,
+    }
+
+
+def run_benchmarks(args):
+    from benchmarks.corpus import build_corpus
+    from benchmarks.fake_llm import FakeLLMServer
+
+    results = {}
+    skipped = {}
+    workdir = tempfile.mkdtemp(prefix="airecruit-bench-")
+    original_cwd = os.getcwd()
+    server = FakeLLMServer(latency=args.llm_latency_ms / 1000).start()
+    try:
+        _prepare_environment(workdir, server.api_base)
+        corpus = build_corpus(Path(workdir) / "corpus")
+        for bench in BENCHMARKS:
+            for size in args.sizes:
+                name = f"{bench.__name__[len('bench_'):]}[{size}]"
+                try:
+                    measured = bench(corpus, size, args.repeat)
+                except (ImportError, OSError) as e:
+                    # 可选依赖（如WeasyPrint的系统库）缺失时跳过
+                    skipped[name] = f"{type(e).__name__}: {e}"
+                    print(f"跳过 {name}：{skipped[name]}", file=sys.stderr)
+                    break
+                for key, stats in measured.items():
+                    results[key] = {**stats, 'chars': corpus[size]['chars'], 'pages': corpus[size]['pages']}
+                    print(f"{key:<60}{stats['median_ms']:>12.3f} ms", file=sys.stderr)
+    finally:
+        server.stop()
+        os.chdir(original_cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return {'meta': _metadata(args), 'results': results, 'skipped': skipped}
+
+
+def compare(current, baseline, threshold, min_delta_ms=0.5):
+    """对比当前结果与基线
+
+    Returns:
+        list[dict]: 每项包含 name/baseline_ms/current_ms/change/status，
+            status 为 ok、regression（变慢超过阈值）、improved、output_changed 或 new
+    """
+    rows = []
+    for name, stats in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            rows.append({'name': name, 'baseline_ms': None, 'current_ms': stats['median_ms'],
+                         'change': None, 'status': 'new'})
+            continue
+        change = stats['median_ms'] / base['median_ms'] - 1 if base['median_ms'] else 0.0
+        delta = stats['median_ms'] - base['median_ms']
+        status = 'ok'
+        if 'digest' in base and stats.get('digest') != base['digest']:
+            status = 'output_changed'
+        elif change > threshold and delta > min_delta_ms:
+            status = 'regression'
+        elif change < -threshold and -delta > min_delta_ms:
+            status = 'improved'
+        rows.append({'name': name, 'baseline_ms': base['median_ms'], 'current_ms': stats['median_ms'],
+                     'change': round(change, 4), 'status': status})
+    return rows
+
+
+def print_comparison(rows):
+    labels = {'ok': '', 'regression': '变慢', 'improved': '变快', 'output_changed': '输出变化', 'new': '新增'}
+    print(f"{'基准':<60}{'基线(ms)':>12}{'当前(ms)':>12}{'变化':>10}  状态")
+    for row in rows:
+        base = f"{row['baseline_ms']:.3f}" if row['baseline_ms'] is not None else '-'
+        change = f"{row['change']:+.1%}" if row['change'] is not None else '-'
+        print(f"{row['name']:<60}{base:>12}{row['current_ms']:>12.3f}{change:>10}  {labels[row['status']]}")
+
+
+def main(argv=None):
+    from benchmarks.corpus import SIZES
+    parser = argparse.ArgumentParser(description="AI Recruit benchmarks")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per benchmark")
+    parser.add_argument("--quick", action="store_true", help="3 runs per benchmark, skip the xlarge corpus")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--llm-latency-ms", type=float, default=0,
+                        help="Artificial latency of the fake LLM backend")
+    parser.add_argument("--output", type=Path, default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Relative slowdown of the median that counts as a regression")
+    args = parser.parse_args(argv)
+    if args.quick:
+        args.repeat = 3
+        args.sizes = [s for s in args.sizes if s != 'xlarge']
+
+    current = run_benchmarks(args)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    args.output.write_text(json.dumps(current, ensure_ascii=False, indent=2), encoding='utf-8')
+    print(f"结果已写入 {args.output}")
+
+    failed = False
+    if args.baseline.exists() and not args.save_baseline:
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+        rows = compare(current, baseline, args.threshold)
+        print_comparison(rows)
+        failed = any(row['status'] in ('regression', 'output_changed') for row in rows)
+    if args.save_baseline:
+        shutil.copyfile(args.output, args.baseline)
+        print(f"已保存基线 {args.baseline}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,182 @@
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+
+from browser.server import app as flask_app, _open_session, _save_turn, _finish_reply, _sse
+from config import get_model
+from llm import acomplete, astream_completion
+
+# 默认请求超时秒数：普通请求在此时间内未开始响应返回504，流式对话超过此时长后结束
+REQUEST_TIMEOUT = 120
+# 收到停止信号后等待进行中请求完成的最长秒数
+GRACEFUL_SHUTDOWN_SECONDS = 30
+# 执行同步Flask路由的线程数
+WSGI_THREADS = 16
+# 通过环境变量把命令行参数传给各工作进程
+TIMEOUT_ENV = "AIRECRUIT_REQUEST_TIMEOUT"
+
+
+class TimeoutMiddleware:
+    """请求超时控制
+
+    请求在 timeout 秒内仍未开始响应时取消处理并返回504；
+    已开始的流式响应不在这里中断，由路由自行控制总时长。
+    """
+
+    def __init__(self, app, timeout):
+        self.app = app
+        self.timeout = timeout
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.timeout:
+            await self.app(scope, receive, send)
+            return
+
+        started = asyncio.Event()
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                started.set()
+            await send(message)
+
+        task = asyncio.ensure_future(self.app(scope, receive, send_wrapper))
+        waiter = asyncio.ensure_future(started.wait())
+        try:
+            done, _ = await asyncio.wait(
+                {task, waiter}, timeout=self.timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                response = JSONResponse({"error": f"请求超时（{self.timeout:g}秒）"}, status_code=504)
+                await response(scope, receive, send)
+                return
+            await task
+        finally:
+            waiter.cancel()
+            # 客户端断开或服务停止时，一并取消正在处理的请求
+            if not task.done():
+                task.cancel()
+
+
+def _prepare_messages(data, model):
+    """取出会话并构建消息（读取工作区、可能触发旧对话摘要，需在线程池中执行）"""
+    session_id, context = _open_session(data, model)
+    return session_id, context, context.messages()
+
+
+def _complete_turn(session_id, context, ai_reply):
+    """执行回复中的操作并写回会话（同步操作，在线程池中执行）"""
+    reply = _finish_reply(ai_reply, context)
+    _save_turn(session_id, context, reply)
+    return reply
+
+
+async def chat(request):
+    data = await request.json()
+    model = get_model()
+    try:
+        session_id, context, messages = await run_in_threadpool(_prepare_messages, data, model)
+        usage = {}
+        ai_reply = await acomplete(messages, model=model, usage=usage, cache=not data.get('no_cache'))
+        reply = await run_in_threadpool(_complete_turn, session_id, context, ai_reply)
+        return JSONResponse({"reply": reply, "usage": usage, "session_id": session_id})
+    except Exception as e:
+        return JSONResponse({"error": str(e)}, status_code=500)
+
+
+async def chat_stream(request):
+    """流式对话：与 /api/chat/stream 的Flask版本输出相同的事件序列"""
+    data = await request.json()
+    model = get_model()
+    session_id, context, messages = await run_in_threadpool(_prepare_messages, data, model)
+    timeout = request.app.state.timeout
+
+    async def generate():
+        parts = []
+        usage = {}
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout if timeout else None
+        stream = astream_completion(messages, model=model, usage=usage, cache=not data.get('no_cache'))
+        try:
+            while True:
+                try:
+                    next_delta = stream.__anext__()
+                    if deadline is None:
+                        delta = await next_delta
+                    else:
+                        delta = await asyncio.wait_for(next_delta, max(deadline - loop.time(), 0))
+                except StopAsyncIteration:
+                    break
+                parts.append(delta)
+                yield _sse({"delta": delta})
+            reply = await run_in_threadpool(_complete_turn, session_id, context, ''.join(parts))
+            yield _sse({"reply": reply, "usage": usage, "session_id": session_id}, event="done")
+        except asyncio.TimeoutError:
+            yield _sse({"error": f"请求超时（{timeout:g}秒）"}, event="error")
+        except Exception as e:
+            yield _sse({"error": str(e)}, event="error")
+        finally:
+            await stream.aclose()
+
+    return StreamingResponse(
+        generate(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@asynccontextmanager
+async def _lifespan(app):
+    from browser.jobs import job_manager
+    from capacity.outbox import get_outbox
+    from config import flush_config
+    get_outbox()
+    yield
+    # 进行中的请求结束后：等待上传文件转换完成并写回配置
+    await run_in_threadpool(job_manager.shutdown)
+    flush_config()
+
+
+def create_app(timeout=None):
+    """创建网页界面的ASGI应用
+
+    对话接口为异步实现，等待模型回复期间不占用线程；其余接口沿用 browser.server
+    中的Flask路由，在线程池中执行。
+
+    Args:
+        timeout: 请求超时秒数，未指定时读取环境变量 AIRECRUIT_REQUEST_TIMEOUT，0 表示不限制
+    """
+    from a2wsgi import WSGIMiddleware
+
+    if timeout is None:
+        timeout = float(os.environ.get(TIMEOUT_ENV, REQUEST_TIMEOUT))
+    app = Starlette(
+        routes=[
+            Route("/api/chat", chat, methods=["POST"]),
+            Route("/api/chat/stream", chat_stream, methods=["POST"]),
+            Mount("/", WSGIMiddleware(flask_app, workers=WSGI_THREADS)),
+        ],
+        lifespan=_lifespan
+    )
+    app.state.timeout = timeout
+    return TimeoutMiddleware(app, timeout)
+
+
+def serve(host="0.0.0.0", port=5001, workers=1, timeout=REQUEST_TIMEOUT):
+    """用 uvicorn 运行网页界面，收到 SIGINT/SIGTERM 后等待进行中的请求完成再退出"""
+    import uvicorn
+    os.environ[TIMEOUT_ENV] = str(timeout)
+    uvicorn.run(
+        "browser.asgi:create_app",
+        factory=True,
+        host=host,
+        port=port,
+        workers=workers,
+        timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_SECONDS
+    )
@@ -0,0 +1,124 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from utils.workspace import WorkspaceManager
+
+MAX_JOBS = 100
+# 任务状态快照目录，多个服务进程之间据此共享任务状态
+JOBS_DIR = Path("workdir") / ".jobs"
+
+
+class JobManager:
+    """上传文件的后台转换任务队列
+
+    每个上传文件作为独立任务提交到线程池，单个文件失败不影响同批其他文件。
+    任务状态保存在内存中，仅保留最近 MAX_JOBS 个任务；每次状态变化同时写入
+    JOBS_DIR 下的快照，轮询请求落到其他服务进程时也能查到。
+    """
+
+    def __init__(self, max_workers=4, jobs_dir=JOBS_DIR):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="convert")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self.jobs_dir = Path(jobs_dir)
+
+    def submit(self, paths, file_type):
+        """提交一批已保存的文件，返回任务id"""
+        job_id = uuid.uuid4().hex
+        job = {
+            'id': job_id,
+            'status': 'pending',
+            'created': time.time(),
+            'finished': None,
+            'files': [
+                {'name': Path(p).name, 'state': 'pending', 'path': None,
+                 'error': None, 'notices': [], 'seconds': None}
+                for p in paths
+            ]
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+            while len(self._jobs) > MAX_JOBS:
+                expired, _ = self._jobs.popitem(last=False)
+                (self.jobs_dir / f"{expired}.json").unlink(missing_ok=True)
+            self._save(job)
+        for index, path in enumerate(paths):
+            self._executor.submit(self._run, job, index, Path(path), file_type)
+        return job_id
+
+    def get(self, job_id):
+        """返回任务状态快照，不存在时返回None"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                return {**job, 'files': [dict(f) for f in job['files']]}
+        try:
+            with open(self.jobs_dir / f"{Path(job_id).name}.json", 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def shutdown(self, wait=True):
+        """停止接收新任务，默认等待进行中的转换完成"""
+        self._executor.shutdown(wait=wait)
+
+    def _save(self, job):
+        """写入任务状态快照（调用方持有 self._lock）"""
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        path = self.jobs_dir / f"{job['id']}.json"
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(job, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def _run(self, job, index, file_path, file_type):
+        entry = job['files'][index]
+        with self._lock:
+            entry['state'] = 'running'
+            job['status'] = 'running'
+            self._save(job)
+        started = time.perf_counter()
+        try:
+            md_path, notices = convert_upload(file_path)
+            WorkspaceManager().add_file(md_path, file_type)
+            state, error = 'done', None
+        except Exception as e:
+            md_path, notices, state, error = None, [], 'failed', str(e)
+        with self._lock:
+            entry.update(state=state, path=md_path, error=error, notices=notices,
+                         seconds=time.perf_counter() - started)
+            if all(f['state'] in ('done', 'failed') for f in job['files']):
+                failed = any(f['state'] == 'failed' for f in job['files'])
+                job['status'] = 'completed_with_errors' if failed else 'completed'
+                job['finished'] = time.time()
+            self._save(job)
+
+
+def convert_upload(file_path):
+    """转换单个上传文件
+
+    Returns:
+        tuple: (登记到工作区的路径, 页数截断等需要告知用户的说明列表)
+    """
+    suffix = file_path.suffix.lower()
+    if suffix == '.pdf':
+        from utils.file_utils import convert_pdf_to_md
+        md_path = file_path.with_suffix('.md')
+        notices = convert_pdf_to_md(str(file_path), str(md_path))
+        return str(md_path), notices
+    if suffix == '.docx':
+        from utils.file_utils import convert_docx_to_md
+        md_path = file_path.with_suffix('.md')
+        convert_docx_to_md(str(file_path), str(md_path))
+        return str(md_path), []
+    if suffix in ('.txt', '.md'):
+        return str(file_path.resolve()), []
+    raise ValueError(f"不支持的文件类型: {file_path.suffix}")
+
+
+job_manager = JobManager()
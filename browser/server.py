@@ -1,13 +1,13 @@
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context
 from pathlib import Path
 from utils.workspace import WorkspaceManager
 from config import load_config, set_model, set_smtp_config,get_model
 from capacity.send_email import send_email
+from browser.jobs import job_manager
 import datetime
-import re
 import json
-from llm import get_system_prompt
-from litellm import completion
+from llm import get_system_prompt, complete, stream_completion, parse_operation, ConversationContext
+from browser.sessions import get_session_store
 
 app = Flask(__name__, template_folder='../templates')
 
@@ -23,7 +23,7 @@ def index():
 
 @app.route("/api/add_file", methods=["POST"])
 def api_add_file():
-    ws = WorkspaceManager()
+    """保存上传文件并提交后台转换任务，立即返回任务id"""
     if 'files' not in request.files:
         return jsonify({"error": "No files uploaded"}), 400
     
@@ -34,30 +34,52 @@ def api_add_file():
         
         file_type = request.form.get('file_type', 'auto')  # 获取用户选择的类型
         
+        saved = []
         for file in request.files.getlist('files'):
-            # 处理文件逻辑与命令行模式一致
-            file_path = work_dir.resolve() / file.filename
+            file_path = work_dir.resolve() / Path(file.filename).name
             file.save(str(file_path))
-            
-            # PDF/DOCX文件转换逻辑
-            if file_path.suffix.lower() in ('.pdf', '.docx'):
-                md_path = file_path.with_suffix('.md')
-                try:
-                    if file_path.suffix.lower() == '.pdf':
-                        from utils.file_utils import convert_pdf_to_md
-                        convert_pdf_to_md(str(file_path), str(md_path))
-                    else:
-                        from utils.file_utils import convert_docx_to_md
-                        convert_docx_to_md(str(file_path), str(md_path))
-                    ws.add_file(str(md_path), file_type)
-                except Exception as e:
-                    return jsonify({"error": f"文件转换失败: {str(e)}"}), 500
-            # 文本文件直接添加
-            elif file_path.suffix.lower() in ('.txt', '.md'):
-                ws.add_file(str(file_path.resolve()), file_type)
-            else:
-                return jsonify({"error": f"不支持的文件类型: {file_path.suffix}"}), 400
-        return jsonify({"status": "added", "count": len(request.files.getlist('files'))})
+            saved.append(str(file_path))
+        
+        # PDF/DOCX转换交给后台线程池，不占用请求线程
+        job_id = job_manager.submit(saved, file_type)
+        return jsonify({"status": "accepted", "job_id": job_id, "count": len(saved)}), 202
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/jobs/<job_id>", methods=["GET"])
+def api_job_status(job_id):
+    """查询上传转换任务的状态（每个文件的状态、耗时、错误以及页数截断等说明）"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({"error": "任务不存在"}), 404
+    return jsonify(job)
+
+@app.route("/api/bulk_ingest", methods=["POST"])
+def api_bulk_ingest():
+    """批量导入服务器workdir目录（或其下的指定子目录）中的全部文件"""
+    from utils.ingest import scan_directory, bulk_ingest
+    data = request.json or {}
+    work_dir = Path("workdir").resolve()
+    directory = Path(data.get('directory', 'workdir')).resolve()
+    # 只允许workdir内的目录，避免客户端读取服务器上的任意目录并在其中写入转换结果
+    if directory != work_dir and work_dir not in directory.parents:
+        return jsonify({"error": "只能导入workdir目录下的文件"}), 400
+    if not directory.is_dir():
+        return jsonify({"error": f"目录不存在: {data.get('directory', 'workdir')}"}), 400
+    
+    try:
+        results = bulk_ingest(
+            scan_directory(directory),
+            WorkspaceManager(),
+            file_type=data.get('file_type', 'auto'),
+            workers=data.get('workers')
+        )
+        failed = [r for r in results if r['error']]
+        return jsonify({
+            "status": "ingested",
+            "count": len(results) - len(failed),
+            "failed": failed
+        })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -90,67 +112,281 @@ def api_files():
     # 保持与命令行模式一致的返回格式（仅文件路径列表）
     return jsonify([f['path'] for f in ws.config['workspace_files']])
 
+def _open_session(data, model):
+    """取出（或新建）服务端会话并加入用户的新消息
+
+    客户端只需提交 message 和上次返回的 session_id；会话不存在或已过期时新建会话，
+    此时可选的 history 作为初始对话。
+
+    Returns:
+        tuple: (会话id, 对话上下文)
+    """
+    ws = WorkspaceManager()
+    context = ConversationContext(
+        get_system_prompt(ws.get_resumes(), ws.get_jds(), ws.get_profile_summary(),
+                          query=data.get('message'), model=model), model)
+    sessions = get_session_store()
+    session_id = data.get('session_id')
+    state = sessions.get(session_id) if session_id else None
+    if state is None:
+        session_id = sessions.new_id()
+        for entry in data.get('history', []):
+            context.add(entry['role'], entry['content'])
+    else:
+        context.load_state(state)
+    context.add("user", data.get('message'))
+    return session_id, context
+
+def _save_turn(session_id, context, reply):
+    """把本轮回复写回会话"""
+    context.add("assistant", reply)
+    get_session_store().save(session_id, context.state())
+
+def _session_attachment(context):
+    """会话中最近一次导出PDF的附件编号（导出结果会写进助手回复）"""
+    from capacity.send_email import find_attachment_id
+    for role, content, _ in reversed(context.turns):
+        if role == 'assistant' and find_attachment_id(content):
+            return find_attachment_id(content)
+    return find_attachment_id(context.summary)
+
+def _finish_reply(ai_reply, context=None):
+    """解析并执行回复中的操作指令，返回展示给用户的最终回复
+
+    Args:
+        context: 当前会话，发邮件时从中找回本会话导出的PDF作为附件
+    """
+    operation, ai_reply = parse_operation(ai_reply)
+    if not operation:
+        return ai_reply
+
+    # 执行实际操作（与命令行模式一致）
+    try:
+        if operation['action'] == 'export2pdf':
+            from capacity.pdf_export import export_to_pdf
+            # 从工作区获取最新内容
+            pdf_path = export_to_pdf(operation.get('md_content', ''))  
+            ai_reply += f"\n\nPDF已生成：{pdf_path}"
+        elif operation['action'] == 'send_email':
+            # 直接使用operation中的字段而非params
+            result = send_email(
+                recipient=operation.get('recipient'),
+                subject=operation.get('subject', '求职申请材料'),
+                body=operation['body'],
+                has_attachment=operation.get('has_attachment', False),
+                attachment=operation.get('attachment') or (_session_attachment(context) if context else None)
+            )
+            ai_reply += f"\n\n{result}"
+    except Exception as e:
+        ai_reply += f"\n\n操作执行失败：{str(e)}"
+    return ai_reply
+
 @app.route("/api/chat", methods=["POST"])
 def api_chat():
-    ws = WorkspaceManager()
-    data = request.json
-    message = data.get('message')
-    
-    resumes = ws.get_resumes()
-    jds = ws.get_jds()
-    system_msg = get_system_prompt(resumes, jds)
+    model = get_model()
     
-    # 获取完整对话历史（包含之前的多轮对话）
-    chat_history = data.get('history', [])
-    
-    # 构建消息数组：系统提示 + 历史对话 + 最新消息
-    messages = [{"role": "system", "content": system_msg}]
-    for entry in chat_history:
-        messages.append({"role": entry['role'], "content": entry['content']})
-    messages.append({"role": "user", "content": message})
+    try:
+        session_id, context = _open_session(request.json, model)
+        # 调用AI接口（超出token预算的旧对话压缩为摘要）
+        usage = {}
+        ai_reply = complete(context.messages(), model=model, usage=usage,
+                            cache=not request.json.get('no_cache'))
+        reply = _finish_reply(ai_reply, context)
+        _save_turn(session_id, context, reply)
+        return jsonify({"reply": reply, "usage": usage, "session_id": session_id})
+        
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+def _sse(data, event=None):
+    """按Server-Sent Events格式编码一条消息"""
+    payload = json.dumps(data, ensure_ascii=False)
+    if event:
+        return f"event: {event}\ndata: {payload}\n\n"
+    return f"data: {payload}\n\n"
+
+@app.route("/api/chat/stream", methods=["POST"])
+def api_chat_stream():
+    """流式对话：逐段推送模型输出，结束后再解析执行操作指令"""
+    model = get_model()
+    try:
+        session_id, context = _open_session(request.json, model)
+        messages = context.messages()
+        # no_cache 为真时绕过本地回复缓存
+        cache = not request.json.get('no_cache')
+    except Exception as e:
+        # 还没开始推流，按普通JSON错误返回
+        return jsonify({"error": str(e)}), 500
+
+    def generate():
+        parts = []
+        usage = {}
+        try:
+            for delta in stream_completion(messages, model=model, usage=usage, cache=cache):
+                parts.append(delta)
+                yield _sse({"delta": delta})
+            # 操作块只有在完整回复生成后才能可靠解析
+            reply = _finish_reply(''.join(parts), context)
+            _save_turn(session_id, context, reply)
+            yield _sse({"reply": reply, "usage": usage, "session_id": session_id}, event="done")
+        except Exception as e:
+            yield _sse({"error": str(e)}, event="error")
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route("/api/sessions/stats", methods=["GET"])
+def api_session_stats():
+    """服务端会话的数量、内存占用估算和命中情况"""
+    return jsonify(get_session_store().stats())
+
+@app.route("/api/sessions/<session_id>", methods=["DELETE"])
+def api_delete_session(session_id):
+    get_session_store().delete(session_id)
+    return jsonify({"status": "deleted", "session_id": session_id})
+
+@app.route("/api/cache/stats", methods=["GET"])
+def api_cache_stats():
+    """回复缓存与文件转换缓存的命中率和占用空间"""
+    from llm.response_cache import get_response_cache
+    from utils.convert_cache import get_conversion_cache
+    response_cache = get_response_cache()
+    return jsonify({
+        "responses": response_cache.stats() if response_cache else {"enabled": False},
+        "conversions": get_conversion_cache().stats()
+    })
+
+@app.route("/api/metrics", methods=["GET"])
+def api_metrics():
+    """大模型调用的汇总指标，可用 since_hours 只统计最近一段时间"""
+    import time
+    from llm.metrics import load_records, summarize
+    since_hours = request.args.get('since_hours', type=float)
+    records = load_records(since=time.time() - since_hours * 3600 if since_hours else None)
+    return jsonify(summarize(records))
+
+@app.route("/api/rank", methods=["POST"])
+def api_rank():
+    """按JD对工作区全部简历排序，返回候选人短名单"""
+    from utils.ranking import rank_workspace
+    data = request.json or {}
+    try:
+        jd_path, results = rank_workspace(
+            WorkspaceManager(),
+            jd_path=data.get('jd_path'),
+            top_k=int(data.get('top_k', 5)),
+            use_llm=data.get('use_llm', True)
+        )
+        return jsonify({"jd": jd_path, "candidates": results})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/search", methods=["GET"])
+def api_search():
+    """全文检索工作区文件，q 中多个条件用 + 或逗号分隔"""
+    from utils.search_index import get_search_index
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({"error": "缺少查询参数q"}), 400
+    try:
+        index = get_search_index()
+        index.sync(WorkspaceManager().config['workspace_files'])
+        results = index.search(
+            query,
+            limit=int(request.args.get('limit', 20)),
+            file_type=request.args.get('type')
+        )
+        return jsonify({"query": query, "results": results})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/match", methods=["POST"])
+def api_match():
+    """按向量相似度为JD（默认第一份）或查询文本 query 匹配工作区简历
+
+    默认的 hash 向量是本地特征哈希，只反映词面重合（lexical 为 true），不理解同义词；
+    配置 embedding_model 为 litellm 支持的向量模型后才是语义匹配。返回中的 model 为所用向量模型。
+    """
+    from utils.vector_index import match_workspace, embedding_model, is_lexical
+    data = request.json or {}
+    try:
+        target, results = match_workspace(
+            WorkspaceManager(),
+            jd_path=data.get('jd_path'),
+            query=data.get('query'),
+            top_k=int(data.get('top_k', 10))
+        )
+        model = embedding_model()
+        return jsonify({"query": target, "model": model, "lexical": is_lexical(model), "candidates": results})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/cover_letters", methods=["POST"])
+def api_cover_letters():
+    """为指定（默认全部）简历×JD组合并发生成求职信，结果写入 workdir/cover_letters"""
+    from capacity.cover_letter import batch_cover_letters
+    data = request.json or {}
+    ws = WorkspaceManager()
+    resumes = dict(ws.iter_documents(('resume', 'auto')))
+    jds = dict(ws.iter_documents(('jd',)))
+    if data.get('resume_paths'):
+        resumes = {p: t for p, t in resumes.items() if p in data['resume_paths']}
+    if data.get('jd_paths'):
+        jds = {p: t for p, t in jds.items() if p in data['jd_paths']}
+    if not resumes or not jds:
+        return jsonify({"error": "需要至少一份简历和一份JD"}), 400
     
     try:
-        # 调用AI接口
-        response = completion(
-            model=get_model(),
-            messages=messages,
-            temperature=0.3
+        results = batch_cover_letters(
+            resumes, jds,
+            concurrency=int(data.get('concurrency', 4)),
+            max_retries=int(data.get('max_retries', 3))
         )
-        ai_reply = response.choices[0].message.content
-        
-        # 解析并执行操作指令
-        operation = None
-        operation_match = re.search(r'```json\n(.*?)\n```', ai_reply, re.DOTALL)
-        if operation_match:
-            operation_content = operation_match.group(1).strip()
-            operation = json.loads(operation_content)
-            ai_reply = ai_reply.replace(operation_match.group(0), '').strip()
-
-            # 执行实际操作（与命令行模式一致）
-            try:
-                if operation['action'] == 'export2pdf':
-                    from capacity.pdf_export import export_to_pdf
-                    # 从工作区获取最新内容
-                    pdf_path = export_to_pdf(operation.get('md_content', ''))  
-                    ai_reply += f"\n\nPDF已生成：{pdf_path}"
-                elif operation['action'] == 'send_email':
-                    from capacity.send_email import send_email
-                    # 直接使用operation中的字段而非params
-                    send_email(
-                        recipient=operation['recipient'],
-                        subject=operation.get('subject', '求职申请材料'),
-                        body=operation['body'],
-                        has_attachment=operation.get('has_attachment', False)
-                    )
-                    ai_reply += f"\n\n邮件已发送至：{operation['recipient']}"
-            except Exception as e:
-                ai_reply += f"\n\n操作执行失败：{str(e)}"
-            
-        return jsonify({"reply": ai_reply})
-        
+        return jsonify({"results": results})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/export_pdfs", methods=["POST"])
+def api_export_pdfs():
+    """批量把多个Markdown文档渲染为PDF，documents 为 [{name, md_content}]
+
+    PDF按内容缓存，结果中的 attachment 为附件编号，发送邮件时用它指定附件
+    """
+    from utils.file_utils import export_many_md_to_pdf
+    documents = (request.json or {}).get('documents', [])
+    if not documents:
+        return jsonify({"error": "缺少documents"}), 400
+    try:
+        results = export_many_md_to_pdf(
+            [(d.get('name') or f"document_{i + 1}", d.get('md_content', '')) for i, d in enumerate(documents)],
+            Path("workdir")
+        )
+        return jsonify({"results": results})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route("/api/outbox", methods=["GET"])
+def api_outbox():
+    """最近邮件的发送状态"""
+    from capacity.outbox import get_outbox
+    return jsonify(get_outbox().list(limit=int(request.args.get('limit', 50))))
+
+@app.route("/api/outbox/<message_id>", methods=["GET"])
+def api_outbox_message(message_id):
+    """单封邮件的发送状态（queued/sending/sent/failed）、尝试次数和最近错误"""
+    from capacity.outbox import get_outbox
+    status = get_outbox().status(message_id)
+    if status is None:
+        return jsonify({"error": "邮件不存在"}), 404
+    return jsonify(status)
+
 @app.route("/api/remove_file", methods=["POST"])
 def api_remove_file():
     ws = WorkspaceManager()
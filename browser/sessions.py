@@ -0,0 +1,211 @@
+import json
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+
+SESSIONS_PATH = Path("workdir") / ".sessions.db"
+# 内存中最多保留的会话数
+DEFAULT_MAX_SESSIONS = 200
+# 会话闲置超过该小时数后过期
+DEFAULT_TTL_HOURS = 24
+# 清理过期会话的最短间隔秒数
+PURGE_INTERVAL = 60
+
+
+def _state_size(state):
+    """估算会话状态占用的内存字节数"""
+    size = sys.getsizeof(state['summary'])
+    for turn in state['turns']:
+        size += sum(sys.getsizeof(item) for item in turn)
+    return size
+
+
+class SessionStore:
+    """网页对话的服务端会话
+
+    会话状态（滚动摘要和尚未压缩的消息）保存在有界的内存LRU中，客户端每次只提交新消息。
+    启用SQLite存储时每次保存同时写入数据库：被LRU淘汰或服务重启后的会话从数据库恢复，
+    多个服务进程之间按版本号判断内存中的副本是否过期。
+    """
+
+    def __init__(self, max_sessions=DEFAULT_MAX_SESSIONS, ttl_hours=DEFAULT_TTL_HOURS,
+                 db_path=SESSIONS_PATH):
+        self.max_sessions = max_sessions
+        self.ttl = ttl_hours * 3600
+        self.db_path = Path(db_path) if db_path else None
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._last_purge = 0.0
+        self._stats = {'hits': 0, 'loads': 0, 'misses': 0, 'evictions': 0, 'expired': 0}
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS sessions (
+                        id TEXT PRIMARY KEY,
+                        version INTEGER NOT NULL,
+                        state TEXT NOT NULL,
+                        updated REAL NOT NULL
+                    )
+                ''')
+
+    @contextmanager
+    def _connect(self):
+        with self._db_lock:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path))
+            try:
+                yield conn
+                conn.commit()
+            finally:
+                conn.close()
+
+    @staticmethod
+    def new_id():
+        return uuid.uuid4().hex
+
+    def get(self, session_id):
+        """返回会话状态，不存在或已过期时返回None"""
+        self._purge_expired()
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is not None and now - entry['updated'] > self.ttl:
+                self._sessions.pop(session_id)
+                self._stats['expired'] += 1
+                entry = None
+        if self.db_path:
+            stored_version = self._stored_version(session_id)
+            fresh = entry is not None and entry['version'] == stored_version
+        else:
+            stored_version, fresh = None, entry is not None
+        if fresh:
+            with self._lock:
+                self._sessions.move_to_end(session_id)
+                self._stats['hits'] += 1
+            return entry['state']
+
+        # 内存中没有或已被其他进程更新，从数据库加载
+        row = self._load(session_id, now) if stored_version is not None else None
+        with self._lock:
+            if row is None:
+                self._stats['misses'] += 1
+                return None
+            version, state, updated = row
+            self._remember(session_id, version, state, updated)
+            self._stats['loads'] += 1
+            return state
+
+    def save(self, session_id, state):
+        """保存会话状态"""
+        now = time.time()
+        version = self._write(session_id, state, now) if self.db_path else None
+        with self._lock:
+            if version is None:
+                previous = self._sessions.get(session_id)
+                version = previous['version'] + 1 if previous else 1
+            self._remember(session_id, version, state, now)
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def stats(self):
+        """会话数量、内存占用估算和命中情况"""
+        with self._lock:
+            stats = {
+                **self._stats,
+                'sessions_in_memory': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'memory_bytes': sum(entry['size'] for entry in self._sessions.values()),
+                'ttl_hours': self.ttl / 3600,
+            }
+        if self.db_path:
+            with self._connect() as conn:
+                stats['sessions_stored'] = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return stats
+
+    def _remember(self, session_id, version, state, updated):
+        """放入内存LRU（调用方持有 self._lock），超出上限时淘汰最久未用的会话"""
+        self._sessions[session_id] = {
+            'version': version, 'state': state, 'updated': updated, 'size': _state_size(state)
+        }
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self._stats['evictions'] += 1
+
+    def _stored_version(self, session_id):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version FROM sessions WHERE id = ? AND updated >= ?",
+                (session_id, time.time() - self.ttl)
+            ).fetchone()
+        return row[0] if row else None
+
+    def _load(self, session_id, now):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT version, state, updated FROM sessions WHERE id = ? AND updated >= ?",
+                (session_id, now - self.ttl)
+            ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), row[2]
+
+    def _write(self, session_id, state, now):
+        with self._connect() as conn:
+            conn.execute(
+                '''INSERT INTO sessions (id, version, state, updated) VALUES (?, 1, ?, ?)
+                   ON CONFLICT(id) DO UPDATE SET version = version + 1,
+                                                 state = excluded.state,
+                                                 updated = excluded.updated''',
+                (session_id, json.dumps(state, ensure_ascii=False), now)
+            )
+            return conn.execute("SELECT version FROM sessions WHERE id = ?", (session_id,)).fetchone()[0]
+
+    def _purge_expired(self):
+        """定期清理过期会话"""
+        now = time.time()
+        if now - self._last_purge < PURGE_INTERVAL:
+            return
+        self._last_purge = now
+        with self._lock:
+            expired = [sid for sid, entry in self._sessions.items() if now - entry['updated'] > self.ttl]
+            for session_id in expired:
+                self._sessions.pop(session_id)
+            self._stats['expired'] += len(expired)
+        if self.db_path:
+            with self._connect() as conn:
+                conn.execute("DELETE FROM sessions WHERE updated < ?", (now - self.ttl,))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_session_store():
+    """获取进程内共享的会话存储
+
+    配置项 chat_session_limit、chat_session_ttl_hours 分别控制内存中的会话数上限和过期时间，
+    chat_session_spill 为 false 时只保存在内存中。
+    """
+    global _store
+    with _store_lock:
+        if _store is None:
+            from config import load_config
+            config = load_config()
+            _store = SessionStore(
+                max_sessions=int(config.get('chat_session_limit', DEFAULT_MAX_SESSIONS)),
+                ttl_hours=float(config.get('chat_session_ttl_hours', DEFAULT_TTL_HOURS)),
+                db_path=SESSIONS_PATH if config.get('chat_session_spill', True) else None
+            )
+        return _store
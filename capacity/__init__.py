@@ -1,9 +1,13 @@
 from .pdf_export import export_to_pdf
-from .send_email import send_email, get_attachment, test_work
+from .send_email import send_email, get_attachment, get_email_status, test_work
+from .cover_letter import batch_cover_letters, generate_cover_letters
 
 __all__ = [
     'export_to_pdf',
     'send_email',
-    'get_attachment'
+    'get_attachment',
+    'get_email_status',
+    'batch_cover_letters',
+    'generate_cover_letters'
 ]
 
@@ -0,0 +1,119 @@
+import asyncio
+import random
+import re
+import time
+from pathlib import Path
+
+COVER_LETTER_PROMPT = '''请根据职位描述，为以下候选人撰写一封简洁的求职信（Markdown格式）。
+要求：根据jd内容总结简历内容，突出贴合职位需求的经历和技能，不超过400字，最后加上一句：“简历文件见附件”。
+
+### 职位描述
+{jd}
+
+### 候选人简历
+{resume}'''
+
+OUTPUT_DIR = Path("workdir") / "cover_letters"
+# 未在配置 rate_limits 中声明的服务商，默认每分钟请求数上限
+DEFAULT_REQUESTS_PER_MINUTE = 60
+
+
+class RateLimiter:
+    """令牌桶限速器，限制单个服务商每分钟的请求数"""
+
+    def __init__(self, requests_per_minute):
+        self.rate = requests_per_minute / 60.0
+        self.capacity = max(1.0, float(requests_per_minute) / 60.0 * 5)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def _is_transient(error):
+    """限流、超时、连接错误和服务端5xx视为可重试"""
+    import litellm
+    transient = (
+        litellm.RateLimitError,
+        litellm.Timeout,
+        litellm.APIConnectionError,
+        litellm.ServiceUnavailableError,
+        litellm.InternalServerError,
+    )
+    return isinstance(error, transient)
+
+
+def _output_name(resume_path, jd_path):
+    name = f"{Path(resume_path).stem}__{Path(jd_path).stem}.md"
+    return re.sub(r'[\\/:*?"<>|]', '_', name)
+
+
+async def generate_cover_letters(resumes, jds, model=None, concurrency=4, max_retries=3,
+                                 output_dir=OUTPUT_DIR, on_result=None):
+    """并发为每个 简历×JD 组合生成求职信，完成一份写一份
+
+    Args:
+        resumes: {简历路径: 简历文本}
+        jds: {JD路径: JD文本}
+        concurrency: 同时进行的请求数上限
+        max_retries: 可重试错误的最大重试次数（指数退避）
+        on_result: 每完成一份时的回调，参数为单个结果
+
+    Returns:
+        list[dict]: 每个组合的结果，包含 resume/jd/path/error/attempts/seconds
+    """
+    from config import get_model, load_config
+    from llm.client import acomplete
+
+    model = model or get_model()
+    provider = model.split('/', 1)[0]
+    rpm = load_config().get('rate_limits', {}).get(provider, DEFAULT_REQUESTS_PER_MINUTE)
+    limiter = RateLimiter(rpm)
+    semaphore = asyncio.Semaphore(concurrency)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    async def generate(resume_path, jd_path):
+        result = {'resume': resume_path, 'jd': jd_path, 'path': None,
+                  'error': None, 'attempts': 0, 'seconds': 0.0}
+        started = time.perf_counter()
+        prompt = COVER_LETTER_PROMPT.format(jd=jds[jd_path], resume=resumes[resume_path])
+        async with semaphore:
+            for attempt in range(max_retries + 1):
+                result['attempts'] = attempt + 1
+                await limiter.acquire()
+                try:
+                    letter = await acomplete([{"role": "user", "content": prompt}], model=model,
+                                             purpose='cover_letter')
+                    path = output_dir / _output_name(resume_path, jd_path)
+                    path.write_text(letter, encoding='utf-8')
+                    result['path'] = str(path)
+                    break
+                except Exception as e:
+                    if attempt == max_retries or not _is_transient(e):
+                        result['error'] = str(e)
+                        break
+                    # 指数退避并加随机抖动，避免同时重试
+                    await asyncio.sleep(2 ** attempt + random.random())
+        result['seconds'] = time.perf_counter() - started
+        if on_result:
+            on_result(result)
+        return result
+
+    tasks = [generate(r, j) for r in resumes for j in jds]
+    return await asyncio.gather(*tasks)
+
+
+def batch_cover_letters(resumes, jds, **kwargs):
+    """generate_cover_letters 的同步入口"""
+    return asyncio.run(generate_cover_letters(resumes, jds, **kwargs))
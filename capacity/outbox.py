@@ -0,0 +1,269 @@
+import json
+import smtplib
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+OUTBOX_PATH = Path("workdir") / ".outbox.db"
+# 每批从队列取出的邮件数
+BATCH_SIZE = 20
+# 单封邮件最多尝试次数
+MAX_ATTEMPTS = 5
+# 重试退避的基础秒数，第n次重试等待 RETRY_BASE_SECONDS * 2**(n-1)
+RETRY_BASE_SECONDS = 5
+# 连接空闲超过该秒数后关闭
+IDLE_TIMEOUT = 30
+# 处于发送中超过该秒数的邮件视为发送进程已退出，重新认领
+SENDING_TIMEOUT = 300
+
+
+def _is_permanent(error):
+    """5xx 应答和认证失败不再重试，其余错误（4xx、断线、超时）视为临时错误"""
+    if isinstance(error, smtplib.SMTPAuthenticationError):
+        return True
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    code = getattr(error, 'smtp_code', None)
+    return code is not None and code >= 500
+
+
+class Outbox:
+    """持久化的邮件发件箱
+
+    邮件先写入SQLite队列再由后台线程发送：同一批邮件复用一个已认证的SMTP连接，
+    临时错误按指数退避重试，进程重启后未发送的邮件会继续发送。
+    """
+
+    def __init__(self, db_path=OUTBOX_PATH):
+        self.db_path = Path(db_path)
+        self._db_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._sender = None
+        self._sender_key = None
+        self._last_used = 0.0
+        self._init_db()
+
+    @contextmanager
+    def _connect(self):
+        with self._db_lock:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path))
+            conn.row_factory = sqlite3.Row
+            try:
+                yield conn
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _init_db(self):
+        with self._connect() as conn:
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS messages (
+                    id TEXT PRIMARY KEY,
+                    recipient TEXT NOT NULL,
+                    subject TEXT NOT NULL,
+                    html TEXT NOT NULL,
+                    attachments TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    last_error TEXT,
+                    next_attempt REAL NOT NULL,
+                    created REAL NOT NULL,
+                    updated REAL NOT NULL
+                )
+            ''')
+            # 附件内容在入队时读入，后台发送前PDF缓存中的文件被删除或覆盖也不受影响
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS attachments (
+                    message_id TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    content BLOB NOT NULL,
+                    PRIMARY KEY (message_id, name)
+                )
+            ''')
+
+    def enqueue(self, recipient, subject, html_body, attachments=None):
+        """加入发送队列，返回邮件编号
+
+        附件（名称 -> 文件路径）在入队时读取内容存入队列，发送时不再依赖原文件
+        """
+        message_id = uuid.uuid4().hex
+        now = time.time()
+        attachments = {name: str(path) for name, path in (attachments or {}).items()}
+        contents = [(message_id, name, Path(path).read_bytes()) for name, path in attachments.items()]
+        with self._connect() as conn:
+            conn.execute(
+                '''INSERT INTO messages (id, recipient, subject, html, attachments, status,
+                                         next_attempt, created, updated)
+                   VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?)''',
+                (message_id, recipient, subject, html_body, json.dumps(attachments, ensure_ascii=False),
+                 now, now, now)
+            )
+            conn.executemany(
+                "INSERT INTO attachments (message_id, name, content) VALUES (?, ?, ?)", contents
+            )
+        self.start()
+        self._wakeup.set()
+        return message_id
+
+    def status(self, message_id):
+        """查询单封邮件的发送状态，不存在时返回None"""
+        with self._connect() as conn:
+            row = conn.execute(
+                '''SELECT id, recipient, subject, status, attempts, last_error, created, updated
+                   FROM messages WHERE id = ?''', (message_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def list(self, limit=50):
+        """最近的邮件及其发送状态"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                '''SELECT id, recipient, subject, status, attempts, last_error, created, updated
+                   FROM messages ORDER BY created DESC LIMIT ?''', (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def pending_count(self):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM messages WHERE status IN ('queued', 'sending')"
+            ).fetchone()[0]
+
+    def start(self):
+        """启动后台发送线程（已启动时不重复启动）"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="outbox", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = self._claim_batch()
+            if batch:
+                self._send_batch(batch)
+                continue
+            if self._sender is not None and time.time() - self._last_used > IDLE_TIMEOUT:
+                self._close_sender()
+            self._wakeup.wait(timeout=self._seconds_until_next())
+            self._wakeup.clear()
+
+    def _claim_batch(self):
+        now = time.time()
+        with self._connect() as conn:
+            # 多个服务进程共用同一个发件箱，先加写锁再认领，避免同一封邮件被重复发送
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                '''SELECT * FROM messages
+                   WHERE (status = 'queued' AND next_attempt <= ?)
+                      OR (status = 'sending' AND updated < ?)
+                   ORDER BY created LIMIT ?''', (now, now - SENDING_TIMEOUT, BATCH_SIZE)
+            ).fetchall()
+            conn.executemany(
+                "UPDATE messages SET status = 'sending', updated = ? WHERE id = ?",
+                [(now, row['id']) for row in rows]
+            )
+        return [dict(row) for row in rows]
+
+    def _seconds_until_next(self):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT MIN(next_attempt) FROM messages WHERE status = 'queued'"
+            ).fetchone()
+        if row[0] is None:
+            return IDLE_TIMEOUT
+        return min(max(row[0] - time.time(), 0.1), IDLE_TIMEOUT)
+
+    def _send_batch(self, batch):
+        for message in batch:
+            try:
+                sender = self._get_sender()
+                msg = sender.get_message(
+                    subject=message['subject'],
+                    sender=sender.username,
+                    receivers=[message['recipient']],
+                    html=message['html'],
+                    attachments=self._attachments(message)
+                )
+                sender.send_message(msg)
+                self._last_used = time.time()
+                self._finish(message, 'sent')
+            except Exception as e:
+                # 收件人/内容被拒时连接仍可用，其他错误后连接状态不确定，下一封重新建立连接
+                if not isinstance(e, (smtplib.SMTPRecipientsRefused, smtplib.SMTPDataError)):
+                    self._close_sender()
+                attempts = message['attempts'] + 1
+                if _is_permanent(e) or attempts >= MAX_ATTEMPTS:
+                    self._finish(message, 'failed', error=str(e))
+                else:
+                    self._finish(message, 'queued', error=str(e),
+                                 delay=RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+    def _attachments(self, message):
+        """入队时保存的附件内容；旧版本入队、没有保存内容的邮件仍按路径读取"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT name, content FROM attachments WHERE message_id = ?", (message['id'],)
+            ).fetchall()
+        saved = {row['name']: bytes(row['content']) for row in rows}
+        return {n: saved.get(n, Path(p)) for n, p in json.loads(message['attachments']).items()}
+
+    def _finish(self, message, status, error=None, delay=0):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                '''UPDATE messages SET status = ?, attempts = attempts + 1, last_error = ?,
+                                       next_attempt = ?, updated = ? WHERE id = ?''',
+                (status, error, now + delay, now, message['id'])
+            )
+            if status != 'queued':
+                # 已发送或不再重试的邮件不再需要附件内容
+                conn.execute("DELETE FROM attachments WHERE message_id = ?", (message['id'],))
+
+    def _get_sender(self):
+        """返回已连接的发件器，SMTP配置变化时重新连接"""
+        from config import get_smtp_config
+        from redmail import EmailSender
+        config = get_smtp_config()
+        key = (config['smtp_server'], config['smtp_port'], config['sender_email'], config['sender_password'])
+        if self._sender is not None and self._sender_key != key:
+            self._close_sender()
+        if self._sender is None:
+            if not config['sender_email'] or not config['sender_password'] or not config['smtp_server']:
+                raise ValueError("请先配置发件人邮箱、密码和SMTP服务器信息")
+            options = {}
+            if int(config['smtp_port']) == 465:
+                # 465端口使用隐式SSL，而不是STARTTLS
+                options = {'cls_smtp': smtplib.SMTP_SSL, 'use_starttls': False}
+            sender = EmailSender(host=config['smtp_server'], port=config['smtp_port'],
+                                 username=config['sender_email'], password=config['sender_password'],
+                                 **options)
+            sender.connect()
+            self._sender, self._sender_key = sender, key
+        return self._sender
+
+    def _close_sender(self):
+        if self._sender is not None:
+            try:
+                self._sender.close()
+            except Exception:
+                pass
+            self._sender = None
+
+
+_outbox = None
+_outbox_lock = threading.Lock()
+
+
+def get_outbox():
+    """获取进程内共享的发件箱，有未发送的邮件时自动开始发送"""
+    global _outbox
+    with _outbox_lock:
+        if _outbox is None:
+            _outbox = Outbox()
+            if _outbox.pending_count():
+                _outbox.start()
+        return _outbox
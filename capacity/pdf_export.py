@@ -1,5 +1,6 @@
 from pathlib import Path
 from utils.file_utils import (export_md_to_pdf,open_pdf_in_browser)
+from utils.pdf_cache import attachment_id
 
 def export_to_pdf(md_content):
     try:
@@ -7,6 +8,7 @@ def export_to_pdf(md_content):
         pdf_path = export_md_to_pdf(md_content, work_dir)
         # print("md=====:",md_content)
         open_pdf_in_browser(pdf_path)
-        return f"简历优化完成，PDF文件已生成至：{pdf_path}"
+        # 附件编号随回复进入对话记录，发邮件时据此附上这一份PDF
+        return f"简历优化完成，PDF文件已生成至：{pdf_path}（附件编号：{attachment_id(md_content)}）"
     except Exception as e:
         return f"发生错误：{str(e)}"
\ No newline at end of file
@@ -1,27 +1,31 @@
-from email.mime.text import MIMEText
-from email.header import Header
 from config import get_smtp_config
-from redmail import EmailSender
+from capacity.outbox import get_outbox
 import html
 from pathlib import Path
-def send_email(recipient, subject, body, has_attachment, template=None):
+from utils.pdf_cache import get_pdf_cache, candidate_name
+import re
+
+# 导出PDF的回复中携带的附件编号
+ATTACHMENT_PATTERN = re.compile(r'附件编号：([0-9a-f]{6,64})')
+
+def send_email(recipient, subject, body, has_attachment, template=None, attachment=None):
     """
-    发送邮件到指定的地址。
+    发送邮件到指定的地址（加入发件箱队列，由后台线程发送）。
 
     :param recipient: 收件人邮箱地址
     :param subject: 邮件主题
     :param body: 邮件正文
     :param template: 邮件模版，如果为None则使用默认模版
+    :param attachment: 导出PDF时返回的附件编号；为None时使用工作区简历候选人最近导出的PDF
     """
     # print("send_email::",recipient, subject, body)
+    # 模型没有给出有效地址时，使用入库时从JD中抽取的HR邮箱
+    if not recipient or '@' not in recipient:
+        recipient = get_default_recipient()
+        if not recipient:
+            raise ValueError("未提供收件人邮箱，JD中也没有找到HR邮箱")
     config = get_smtp_config()
-
-    sender = config['sender_email'] # 发件人邮箱
-    password = config['sender_password']  # 发件人邮箱密码
-    smtp_server = config['smtp_server']  # SMTP服务器地址
-    smtp_port = config['smtp_port']  # SMTP端口
-
-    if not sender or not password or not smtp_server:
+    if not config['sender_email'] or not config['sender_password'] or not config['smtp_server']:
         raise ValueError("请先配置发件人邮箱、密码和SMTP服务器信息")
     
     # 1. 转义特殊字符（<, >, & 等）
@@ -31,7 +35,7 @@ def send_email(recipient, subject, body, has_attachment, template=None):
     body = escaped_text.replace('\n', '<br>')
 
     # 3. 处理附件
-    attachments = get_attachment() if has_attachment == 'true' else {}
+    attachments = get_attachment(attachment) if str(has_attachment).lower() == 'true' else {}
     # print("attachments:",attachments)
     # 邮件模版
     if template is None:
@@ -44,21 +48,48 @@ def send_email(recipient, subject, body, has_attachment, template=None):
     # 格式化邮件内容
     html_body = template.format(body=body)
 
+    # 交给发件箱在后台复用SMTP连接发送，失败时自动重试；附件内容在入队时一并保存
     try:
-        email = EmailSender(host=smtp_server, port=smtp_port, username=sender, password=password)
-        email.send(
-            subject,sender,receivers=[recipient],html=html_body,attachments=attachments
-            )
-        return f"成功发送邮件到{recipient}"
+        message_id = get_outbox().enqueue(recipient, subject, html_body, attachments)
+        return f"邮件已加入发送队列（编号：{message_id}），收件人：{recipient}"
     except Exception as e:
         raise Exception(f"邮件发送失败: {str(e)}")
 
-def get_attachment():
-    attachment = {"resume.pdf": Path("workdir/resume_optimized.pdf").resolve()} #TODO： hard code 
+def get_default_recipient():
+    """返回工作区第一份JD中的HR邮箱，没有时返回None"""
+    from utils.workspace import WorkspaceManager
+    profile = WorkspaceManager().get_profiles()['jd']
+    return profile['hr_email'] if profile else None
+
+def get_email_status(message_id):
+    """查询邮件的发送状态"""
+    return get_outbox().status(message_id)
+
+def find_attachment_id(text):
+    """从对话文本中取最后一个附件编号，没有时返回None"""
+    found = ATTACHMENT_PATTERN.findall(text or '')
+    return found[-1] if found else None
+
+def get_attachment(attachment=None):
+    """按附件编号从PDF缓存中取导出的简历作为附件
+
+    未提供编号时取工作区简历对应候选人最近导出的PDF，不会用到其他候选人的文件。
+    """
+    cache = get_pdf_cache(Path("workdir"))
+    if attachment:
+        entry = cache.find(attachment)
+        if entry is None:
+            raise ValueError(f"找不到附件编号为 {attachment} 的简历PDF，请重新导出")
+    else:
+        from utils.workspace import WorkspaceManager
+        resume = WorkspaceManager().get_resumes()
+        entry = cache.latest(candidate_name(resume)) if resume else None
+    if entry is None:
+        raise ValueError("没有可用的简历PDF，请先导出简历")
+    attachment = {f"{entry['candidate']}.pdf": Path(entry['path']).resolve()}
     return attachment
 def test_work():
-    attachment = {"resume.pdf": Path("workdir/resume_optimized.pdf").resolve()} 
-    print(attachment)
+    print(get_attachment())
 # def send():
 #     body = "尊敬的HR：\n\n您好！\n\n我是在招聘网站上看到贵公司招聘高级研发工程师(P5)的职位，我对该职位非常感兴趣，并相信我的技能和经验能够胜任该职位。\n\n我叫朱元璋，拥有7年的Java开发经验。我熟悉SpringBoot、MyBatis、Dubbo、Redis、RocketMQ等常用开源框架与组件，了解常用的设计模式，对微服务、分布式系统相关概念及技术有一定了解。在项目经验方面，我曾参与浦发银行持续发布平台、苏州银行关联方交易管理项目等多个项目，积累了丰富的项目经验。\n\n我具备扎实的Java基础，熟悉Linux操作系统，具备良好的调试、线上诊断和性能调优能力。同时，我具有责任心，抗压且乐观，有团队合作精神，善于总结和分享。\n\n我对贵公司的供应链行业非常感兴趣，并且具备高并发或海量数据实战项目经验。我相信我的加入能够为贵公司带来价值。\n\n感谢您抽出时间阅读我的求职信。我期待有机会与您进一步沟通。\n\n简历文件见附件。\n\n此致\n\n敬礼！\n\n朱元璋"
 
@@ -1,13 +1,35 @@
-from .exit import handle_exit_command
-from .file import handle_file_command
-from .help import handle_help_command
-from .model import handle_model_command
-from .work import handle_work_command
+import importlib
+
+# 各命令模块在首次使用时才导入，避免启动时加载用不到的依赖
+_COMMAND_MODULES = {
+    'handle_exit_command': '.exit',
+    'handle_file_command': '.file',
+    'handle_help_command': '.help',
+    'handle_model_command': '.model',
+    'handle_work_command': '.work',
+    'handle_rank_command': '.rank',
+    'handle_search_command': '.search',
+    'handle_match_command': '.match',
+    'handle_batch_command': '.batch',
+    'handle_stats_command': '.stats'
+}
+
+def __getattr__(name):
+    if name not in _COMMAND_MODULES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    handler = getattr(importlib.import_module(_COMMAND_MODULES[name], __name__), name)
+    globals()[name] = handler
+    return handler
 
 __all__ = [
     'handle_exit_command',
     'handle_file_command', 
     'handle_help_command',
     'handle_model_command',
-    'handle_work_command'
+    'handle_work_command',
+    'handle_rank_command',
+    'handle_search_command',
+    'handle_match_command',
+    'handle_batch_command',
+    'handle_stats_command'
 ]
@@ -0,0 +1,36 @@
+from pathlib import Path
+from capacity import batch_cover_letters
+
+
+def handle_batch_command(session, ws):
+    """为工作区全部 简历×JD 组合并发生成求职信"""
+    resumes = dict(ws.iter_documents(('resume', 'auto')))
+    jds = dict(ws.iter_documents(('jd',)))
+    if not resumes or not jds:
+        print("工作区需要至少一份简历和一份JD，请先通过/file添加")
+        return ''
+
+    total = len(resumes) * len(jds)
+    try:
+        concurrency = session.prompt(f"共 {total} 封求职信，请输入并发数（默认4）: ").strip() or '4'
+        concurrency = int(concurrency)
+    except ValueError:
+        print("错误：请输入有效的数字")
+        return ''
+    except (KeyboardInterrupt, EOFError):
+        return ''
+
+    done = []
+
+    def on_result(result):
+        done.append(result)
+        name = f"{Path(result['resume']).stem} × {Path(result['jd']).stem}"
+        if result['error']:
+            print(f"[{len(done)}/{total}] ❌ {name}：{result['error']}")
+        else:
+            print(f"[{len(done)}/{total}] ✅ {name} -> {result['path']}")
+
+    results = batch_cover_letters(resumes, jds, concurrency=concurrency, on_result=on_result)
+    failed = sum(1 for r in results if r['error'])
+    print(f"\n批量生成完成：成功 {total - failed} 封，失败 {failed} 封")
+    return ''
@@ -2,6 +2,7 @@ from pathlib import Path
 from prompt_toolkit import PromptSession
 from utils.workspace import WorkspaceManager
 from utils.file_utils import convert_pdf_to_md, convert_docx_to_md
+from utils.ingest import scan_directory, bulk_ingest
 
 def handle_file_command(session: PromptSession, ws: WorkspaceManager):
     """处理文件管理命令"""
@@ -14,6 +15,7 @@ def handle_file_command(session: PromptSession, ws: WorkspaceManager):
         print("1. 扫描并添加文件 - 从workdir目录添加文件到工作区")
         print("2. 列出工作区文件 - 显示已添加的文件及其类型")
         print("3. 移除工作区文件 - 从工作区删除指定文件")
+        print("4. 批量导入文件 - 并行转换workdir目录下全部文件")
         print(f"{RED}0. 返回主菜单{RESET}")
         print(f"{RED}提示：支持的文件类型：PDF/DOCX/MD/TXT{RESET}")
         
@@ -66,7 +68,8 @@ def handle_file_command(session: PromptSession, ws: WorkspaceManager):
                         md_path = file_path.with_suffix('.md')
                         try:
                             if file_path.suffix.lower() == '.pdf':
-                                convert_pdf_to_md(str(file_path), str(md_path))
+                                for notice in convert_pdf_to_md(str(file_path), str(md_path)):
+                                    print(notice)
                             else:
                                 convert_docx_to_md(str(file_path), str(md_path))
                             ws.add_file(str(md_path.resolve()), 'auto')
@@ -88,6 +91,23 @@ def handle_file_command(session: PromptSession, ws: WorkspaceManager):
                     print(f"已添加文件：{', '.join(added)}")
                     continue
 
+            elif choice == '4':
+                work_dir = Path("workdir")
+                work_dir.mkdir(exist_ok=True)
+                file_list = scan_directory(work_dir)
+                if not file_list:
+                    print("workdir目录中没有可用的文件（支持pdf/docx/md/txt格式）")
+                    continue
+
+                def progress(done, total, result):
+                    print(f"\r转换进度：{done}/{total}", end='', flush=True)
+
+                results = bulk_ingest(file_list, ws, progress=progress)
+                failed = [r for r in results if r['error']]
+                print(f"\n已添加文件：{len(results) - len(failed)}个")
+                for r in failed:
+                    print(f"转换文件 {Path(r['source']).name} 失败：{r['error']}")
+
             elif choice == '3':
                 all_files = [f['path'] for f in ws.config['workspace_files']]
                 if not all_files:
@@ -116,7 +136,7 @@ def handle_file_command(session: PromptSession, ws: WorkspaceManager):
                     print("错误：请输入有效的文件编号")
                     
             else:
-                print("错误：无效选项，请输入 0-3 的数字")
+                print("错误：无效选项，请输入 0-4 的数字")
                 
         except (KeyboardInterrupt, EOFError):
             return ''
@@ -5,5 +5,12 @@ def handle_help_command():
           "/model ls   - 查看所有支持的AI模型列表\n" 
           "/model <名称> - 切换AI模型（需要先查看支持列表）\n"
           "/work      - 进入智能工作模式（简历优化/生成求职信等）\n"
+          "/rank      - 按JD对工作区全部简历排序，输出候选人短名单\n"
+          "/search <关键词> - 全文检索工作区文件，多个条件用+分隔\n"
+          "/match [查询文本] - 按向量相似度为JD（或查询文本）匹配工作区简历；默认的 hash 向量只按词面重合度匹配，\n"
+          "                    配置 embedding_model（如 ollama/nomic-embed-text）后按语义匹配\n"
+          "/batch     - 为工作区全部简历×JD组合并发生成求职信\n"
+          "/stats [小时数] - 大模型调用统计（耗时、token用量和费用）\n"
           "/mode <candidate|hunter> - 切换候选人/猎头模式\n"
+          "工作模式下以 ! 开头的输入绕过回复缓存，强制重新生成（需在配置中开启 response_cache）\n"
           "输入 /exit 退出程序")
@@ -0,0 +1,25 @@
+from pathlib import Path
+from utils.vector_index import match_workspace, is_lexical
+
+
+def handle_match_command(command_text, ws):
+    """按向量相似度为JD（或查询文本）匹配工作区简历"""
+    parts = command_text.split(maxsplit=1)
+    query = parts[1].strip() if len(parts) > 1 else None
+    try:
+        print("正在匹配，请稍候...")
+        target, results = match_workspace(ws, query=query)
+    except ValueError as e:
+        print(f"错误：{str(e)}")
+        return
+    if not results:
+        print("工作区没有可匹配的简历")
+        return
+
+    if is_lexical():
+        print("提示：当前使用本地哈希向量，只按词面重合度匹配；配置 embedding_model 后可按语义匹配")
+    label = f"“{target}”" if query else Path(target).name
+    print(f"\n与 {label} 最相似的候选人：")
+    for i, r in enumerate(results, 1):
+        print(f"{i}. {r['name']}  相似度: {r['score']}")
+        print(f"   {r['snippet']}")
@@ -0,0 +1,38 @@
+from pathlib import Path
+from utils.ranking import rank_workspace
+
+
+def handle_rank_command(session, ws):
+    """按JD对工作区全部简历排序，输出候选人短名单"""
+    jd_files = [f['path'] for f in ws.config['workspace_files'] if f['type'] == 'jd']
+    if not jd_files:
+        print("工作区没有JD文件，请先通过/file添加")
+        return ''
+
+    try:
+        jd_path = jd_files[0]
+        if len(jd_files) > 1:
+            print("\n工作区中的JD文件：")
+            for i, path in enumerate(jd_files, 1):
+                print(f"{i}. {Path(path).name}")
+            choice = session.prompt("请选择用于排序的JD编号（默认1）: ").strip() or '1'
+            jd_path = jd_files[int(choice) - 1]
+        top_k = session.prompt("请输入交给AI精排的简历数量（默认5）: ").strip() or '5'
+
+        print("正在排序，请稍候...")
+        jd_path, results = rank_workspace(ws, jd_path=jd_path, top_k=int(top_k))
+    except (ValueError, IndexError) as e:
+        print(f"错误：{str(e) or '请输入有效的编号'}")
+        return ''
+    except (KeyboardInterrupt, EOFError):
+        return ''
+
+    print(f"\n按 {Path(jd_path).name} 排序的候选人：")
+    for i, r in enumerate(results, 1):
+        score = '-' if r['score'] is None else r['score']
+        print(f"{i}. {r['name']}  匹配度: {score}  关键词得分: {r['bm25']}")
+        if r.get('matched_skills'):
+            print(f"   命中技能: {'、'.join(r['matched_skills'])}")
+        if r['reason']:
+            print(f"   {r['reason']}")
+    return ''
@@ -0,0 +1,21 @@
+from utils.search_index import get_search_index
+
+
+def handle_search_command(command_text, ws):
+    """全文检索工作区简历和JD"""
+    parts = command_text.split(maxsplit=1)
+    if len(parts) < 2:
+        print("错误：命令格式为/search <关键词>，多个条件用+分隔，如 /search Java + RocketMQ + 5年")
+        return
+
+    index = get_search_index()
+    index.sync(ws.config['workspace_files'])
+    results = index.search(parts[1])
+    if not results:
+        print("没有找到匹配的文件")
+        return
+
+    print(f"找到 {len(results)} 个匹配文件：")
+    for i, r in enumerate(results, 1):
+        print(f"{i}. {r['name']} [{r['type'].upper()}]  相关度: {r['score']}")
+        print(f"   {r['snippet']}")
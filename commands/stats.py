@@ -0,0 +1,43 @@
+import time
+from llm.metrics import load_records, summarize
+
+
+def _format_ms(value):
+    return f"{value:.0f}ms" if value is not None else '-'
+
+
+def _print_row(name, stats):
+    print(f"{name:<32}{stats['calls']:>6}{stats['errors']:>6}{stats['response_cache_hits']:>6}"
+          f"{_format_ms(stats['ttft_p50_ms']):>10}{_format_ms(stats['latency_p50_ms']):>10}"
+          f"{_format_ms(stats['latency_p95_ms']):>10}{stats['prompt_tokens']:>10}"
+          f"{stats['completion_tokens']:>10}{stats['avg_system_tokens']:>10}  ${stats['cost_usd']:.4f}")
+
+
+def handle_stats_command(command_text):
+    """汇总大模型调用日志：调用次数、首token时间、耗时分位数、token用量和费用"""
+    parts = command_text.split(maxsplit=1)
+    hours = None
+    if len(parts) > 1:
+        try:
+            hours = float(parts[1])
+        except ValueError:
+            print("错误：命令格式为/stats [最近小时数]，如 /stats 24")
+            return
+
+    records = load_records(since=time.time() - hours * 3600 if hours else None)
+    if not records:
+        print("还没有大模型调用记录")
+        return
+
+    summary = summarize(records)
+    scope = f"最近{hours:g}小时" if hours else "全部"
+    print(f"{scope}大模型调用统计（{len(records)} 次）：")
+    print(f"{'':<32}{'调用':>6}{'失败':>6}{'缓存':>6}{'首token':>10}{'P50':>10}"
+          f"{'P95':>10}{'输入':>10}{'输出':>10}{'系统提示':>10}  费用")
+    _print_row("合计", summary['total'])
+    print("按模型：")
+    for model, stats in summary['by_model'].items():
+        _print_row(f"  {model}", stats)
+    print("按用途：")
+    for purpose, stats in summary['by_purpose'].items():
+        _print_row(f"  {purpose}", stats)
@@ -1,10 +1,8 @@
-import json
-import re
-from llm import get_system_prompt
+from llm import get_system_prompt, stream_completion, parse_operation, format_usage, ConversationContext
 from capacity import export_to_pdf, send_email
+from capacity.send_email import find_attachment_id
 from utils.workspace import WorkspaceManager
 from prompt_toolkit import PromptSession
-from litellm import completion
 from config import get_model
 
 def handle_work_command(session, ws, current_config):
@@ -15,7 +13,9 @@ def handle_work_command(session, ws, current_config):
     ]
     resumes = ws.get_resumes()
     jds = ws.get_jds()
-    system_msg = get_system_prompt(resumes, jds)
+    profiles = ws.get_profile_summary()
+    # 本次工作模式中最近导出的PDF附件编号，发邮件时附上这一份
+    attachment = None
     while True:
         try:
             cmd_input = session.prompt('work> ').strip()
@@ -25,32 +25,43 @@ def handle_work_command(session, ws, current_config):
             if cmd_input.startswith('/'):
                 return cmd_input
 
-            messages = [{"role": "system", "content": system_msg}]
+            # 简历只保留与本次需求相关的章节；超出模型上下文预算时，较早的对话会被压缩为摘要
+            model = get_model()
+            system_msg = get_system_prompt(resumes, jds, profiles, query=cmd_input.lstrip('!'), model=model)
+            context = ConversationContext(system_msg, model)
             while True:
-                messages.append({"role": "user", "content": cmd_input})
-                response = completion(
-                    model=get_model(),
-                    messages=messages,
-                    temperature=0.3
-                )
-                choice = response.choices[0]
-                message = choice.message
-                ai_reply = message['content']
-                print(f"\n助理：\n{ai_reply}\n")
-                messages.append({"role": "assistant", "content": ai_reply})
+                # 以!开头的输入绕过本地回复缓存，强制重新生成
+                use_cache = not cmd_input.startswith('!')
+                context.add("user", cmd_input if use_cache else cmd_input[1:].lstrip())
+                messages = context.messages()
+                # 流式输出，边生成边打印
+                print("\n助理：")
+                parts = []
+                usage = {}
+                for delta in stream_completion(messages, model=context.model, usage=usage, cache=use_cache):
+                    parts.append(delta)
+                    print(delta, end='', flush=True)
+                print("\n")
+                if usage:
+                    print(f"{format_usage(usage)}\n")
+                ai_reply = ''.join(parts)
+                context.add("assistant", ai_reply)
 
-                operation_match = re.search(r'```json\n(.*?)\n```', ai_reply, re.DOTALL)
-                if operation_match:
-                    operation_content = operation_match.group(1).strip()
-                    operation_json = json.loads(operation_content)
+                # 回复完整生成后再解析操作指令
+                operation_json, _ = parse_operation(ai_reply)
+                if operation_json:
                     operation_type = operation_json['action']
                     print(f"操作类型：{operation_type}")
                     params = {k: v for k, v in operation_json.items() if k != 'action'}
+                    if operation_type == 'send_email' and not params.get('attachment'):
+                        params['attachment'] = attachment
                         
                     cmd_func = next((c[2] for c in commands if c[0].find(operation_type) != -1), None)
                     if cmd_func:
                         try:
                             result = cmd_func(**params)
+                            if operation_type == 'export2pdf':
+                                attachment = find_attachment_id(result) or attachment
                             print(f"\n✅ 操作成功\n{result}\n")
                             break
                         except Exception as e:
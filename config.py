@@ -1,9 +1,52 @@
+import atexit
+import copy
 import json
+import os
+import tempfile
+import threading
 from pathlib import Path
+from utils.file_lock import file_lock
 
 CONFIG_FILE = '.config.json'
+# 多个进程（uvicorn多worker）写配置时互斥用的锁文件
+CONFIG_LOCK_FILE = CONFIG_FILE + '.lock'
+# 写入延迟（秒），短时间内的多次修改合并为一次落盘
+WRITE_BEHIND_DELAY = 0.5
+
+# 进程内共享的配置缓存，所有读改写都在 _lock 保护下进行
+_lock = threading.RLock()
+_cache = None
+# 上次从磁盘读取或写入时的配置快照，写盘时据此找出本进程修改过的字段
+_base = None
+_cache_mtime = None
+_dirty = False
+_flush_timer = None
+
+def config_lock():
+    """返回配置锁，调用方在"读取-修改-保存"期间持有它以免并发覆盖"""
+    return _lock
+
+def _file_mtime():
+    try:
+        return os.stat(CONFIG_FILE).st_mtime_ns
+    except FileNotFoundError:
+        return None
 
 def load_config():
+    """返回进程内共享的配置字典
+
+    首次调用时从磁盘加载，之后仅在文件被外部修改（mtime变化）且没有待写入的修改时重新加载。
+    """
+    global _cache, _base, _cache_mtime
+    with _lock:
+        mtime = _file_mtime()
+        if _cache is None or (not _dirty and mtime != _cache_mtime):
+            _cache = _read_config()
+            _base = copy.deepcopy(_cache)
+            _cache_mtime = mtime
+        return _cache
+
+def _read_config():
     try:
         with open(CONFIG_FILE, 'r') as f:
             config = json.load(f)
@@ -51,11 +94,12 @@ def set_model(model):
     if '/' not in model:
         raise ValueError("模型名称格式应为 provider/model[:version]")
     
-    config = load_config()
-    if model not in config.get('supported_models', []):
-        raise ValueError(f"不支持该模型，请使用/model ls查看支持列表")
-    config["model"] = model
-    save_config(config)
+    with _lock:
+        config = load_config()
+        if model not in config.get('supported_models', []):
+            raise ValueError(f"不支持该模型，请使用/model ls查看支持列表")
+        config["model"] = model
+        save_config(config)
 
 
 def get_smtp_config():
@@ -76,15 +120,82 @@ def set_smtp_config(sender_email: str, sender_password: str, smtp_server: str, s
     if smtp_port not in [465, 587, 25]:
         raise ValueError("无效的SMTP端口，常用端口：465(SSL), 587(TLS), 25(非加密)")
     
-    config = load_config()
-    config.update({
-        'sender_email': sender_email,
-        'sender_password': sender_password,
-        'smtp_server': smtp_server,
-        'smtp_port': smtp_port
-    })
-    save_config(config)
+    with _lock:
+        config = load_config()
+        config.update({
+            'sender_email': sender_email,
+            'sender_password': sender_password,
+            'smtp_server': smtp_server,
+            'smtp_port': smtp_port
+        })
+        save_config(config)
 
 def save_config(config):
-    with open(CONFIG_FILE, 'w') as f:
-        json.dump(config, f)
+    """更新进程内配置并安排延迟写盘"""
+    global _cache, _dirty, _flush_timer
+    with _lock:
+        _cache = config
+        _dirty = True
+        if _flush_timer is None:
+            _flush_timer = threading.Timer(WRITE_BEHIND_DELAY, flush_config)
+            _flush_timer.daemon = True
+            _flush_timer.start()
+
+# 按条目（以 path 区分）合并而不是整体覆盖的列表字段
+_MERGE_BY_PATH = ('workspace_files',)
+
+def _merge_by_path(disk, base, mine):
+    """把本进程对列表增删改的条目应用到磁盘上的列表，其他进程增删的条目保持不变"""
+    base = {f['path']: f for f in base or []}
+    mine_paths = {f['path'] for f in mine}
+    removed = {path for path in base if path not in mine_paths}
+    changed = {f['path']: f for f in mine if base.get(f['path']) != f}
+    merged = [f for f in disk or [] if f['path'] not in removed and f['path'] not in changed]
+    return merged + [f for f in mine if f['path'] in changed]
+
+def _merge_changes(disk):
+    """把本进程相对 _base 修改过的字段合并到磁盘上的最新配置中，其他进程写入的字段保持不变"""
+    merged = dict(disk)
+    base = _base or {}
+    for key in set(base) | set(_cache):
+        if key not in _cache:
+            merged.pop(key, None)
+        elif key in _MERGE_BY_PATH and isinstance(_cache[key], list):
+            merged[key] = _merge_by_path(disk.get(key), base.get(key), _cache[key])
+        elif key not in base or _cache[key] != base[key]:
+            merged[key] = _cache[key]
+    return merged
+
+def flush_config():
+    """立即把未写入的修改合并到磁盘上的配置并原子地写入（先写临时文件再替换）
+
+    多个进程共用同一配置文件时，写盘前持有文件锁并重新读取磁盘内容，
+    只覆盖本进程修改过的字段，避免互相覆盖对方的修改。
+    """
+    global _dirty, _flush_timer, _base, _cache_mtime
+    with _lock:
+        if _flush_timer is not None:
+            _flush_timer.cancel()
+            _flush_timer = None
+        if not _dirty:
+            return
+        config_dir = Path(CONFIG_FILE).resolve().parent
+        with file_lock(config_dir / CONFIG_LOCK_FILE):
+            merged = _merge_changes(_read_config())
+            fd, tmp_path = tempfile.mkstemp(dir=config_dir, prefix='.config.', suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(merged, f)
+                os.replace(tmp_path, CONFIG_FILE)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            _cache_mtime = _file_mtime()
+        # 原地更新，调用方持有的配置字典也能看到其他进程的修改
+        _cache.clear()
+        _cache.update(merged)
+        _base = copy.deepcopy(merged)
+        _dirty = False
+
+# 进程退出前写入尚未落盘的修改
+atexit.register(flush_config)
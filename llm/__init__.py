@@ -1,5 +1,15 @@
 from .prompt import get_system_prompt
+from .client import complete, acomplete, stream_completion, astream_completion, format_usage
+from .operation import parse_operation
+from .context import ConversationContext
 
 __all__ = [
-    'get_system_prompt'
-]
\ No newline at end of file
+    'get_system_prompt',
+    'complete',
+    'acomplete',
+    'stream_completion',
+    'astream_completion',
+    'format_usage',
+    'parse_operation',
+    'ConversationContext'
+]
@@ -0,0 +1,245 @@
+from llm.metrics import LLMCall
+
+# 需要显式 cache_control 标记才会启用提示缓存的服务商；
+# OpenAI/DeepSeek/Gemini 等会自动缓存长前缀，无需额外标记
+EXPLICIT_CACHE_PROVIDERS = ('anthropic', 'bedrock', 'vertex_ai')
+
+
+def with_cache_hints(messages, model):
+    """为支持提示缓存的模型在第一条系统消息上添加 cache_control 标记
+
+    只有第一条系统消息（固定指令、JD和结构化信息）在各轮之间保持不变；之后按问题筛选的简历、
+    滚动摘要每轮都可能变化，标记它们只会每轮支付缓存写入费用而没有命中，还会占用服务商的断点数量。
+    """
+    provider = model.split('/', 1)[0]
+    if provider not in EXPLICIT_CACHE_PROVIDERS or 'claude' not in model:
+        return messages
+    if not messages or messages[0]['role'] != 'system' or not isinstance(messages[0]['content'], str):
+        return messages
+    first = {
+        'role': 'system',
+        'content': [{
+            'type': 'text',
+            'text': messages[0]['content'],
+            'cache_control': {'type': 'ephemeral'}
+        }]
+    }
+    return [first] + list(messages[1:])
+
+
+def read_usage(response_usage, usage):
+    """把 litellm 返回的用量写入调用方传入的 usage 字典
+
+    cached_tokens 为命中服务商提示缓存的输入token数，uncached_tokens 为其余输入token数。
+    """
+    if usage is None or response_usage is None:
+        return
+    prompt_tokens = getattr(response_usage, 'prompt_tokens', 0) or 0
+    details = getattr(response_usage, 'prompt_tokens_details', None)
+    cached_tokens = (getattr(details, 'cached_tokens', 0) if details else 0) \
+        or getattr(response_usage, 'cache_read_input_tokens', 0) or 0
+    usage.update({
+        'prompt_tokens': prompt_tokens,
+        'cached_tokens': cached_tokens,
+        'uncached_tokens': prompt_tokens - cached_tokens,
+        'completion_tokens': getattr(response_usage, 'completion_tokens', 0) or 0
+    })
+
+
+def lookup_response(messages, model, temperature, cache, usage):
+    """查询本地回复缓存（配置 response_cache 开启且调用方未要求绕过时）
+
+    命中时在 usage 中记录 response_cache='hit'，输入输出token数记为0。
+
+    Returns:
+        tuple: (缓存键, 命中的回复)，未启用缓存时缓存键为None，未命中时回复为None
+    """
+    if not cache:
+        return None, None
+    from llm.response_cache import get_response_cache
+    response_cache = get_response_cache()
+    if response_cache is None:
+        return None, None
+    key = response_cache.make_key(model, messages, temperature=temperature)
+    cached = response_cache.get(key)
+    if cached is not None:
+        usage.update({'prompt_tokens': 0, 'cached_tokens': 0,
+                      'uncached_tokens': 0, 'completion_tokens': 0})
+    usage['response_cache'] = 'hit' if cached is not None else 'miss'
+    usage['response_cache_hit_rate'] = response_cache.hit_rate()
+    return key, cached['reply'] if cached is not None else None
+
+
+def store_response(key, reply, usage):
+    """把模型回复写入本地回复缓存"""
+    if key is None or not reply:
+        return
+    from llm.response_cache import get_response_cache
+    response_cache = get_response_cache()
+    if response_cache is not None:
+        tokens = {k: usage[k] for k in ('prompt_tokens', 'completion_tokens') if k in usage}
+        response_cache.put(key, reply, tokens)
+
+
+def complete(messages, model=None, temperature=0.3, usage=None, cache=True, purpose='chat'):
+    """一次性调用大模型，返回完整回复文本
+
+    Args:
+        usage: 可选的字典，调用结束后写入本次token用量
+        cache: 为False时绕过本地回复缓存，强制调用模型
+        purpose: 调用用途，写入调用日志用于分类统计
+    """
+    from config import get_model
+    model = model or get_model()
+    usage = {} if usage is None else usage
+    call = LLMCall(model, purpose, messages)
+    key, reply = lookup_response(messages, model, temperature, cache, usage)
+    if reply is None:
+        from litellm import completion
+        try:
+            response = completion(
+                model=model,
+                messages=with_cache_hints(messages, model),
+                temperature=temperature
+            )
+        except BaseException as e:
+            call.finish(usage, error=e)
+            raise
+        read_usage(getattr(response, 'usage', None), usage)
+        reply = response.choices[0].message.content
+        store_response(key, reply, usage)
+    call.first_token()
+    call.finish(usage)
+    return reply
+
+
+async def acomplete(messages, model=None, temperature=0.3, usage=None, cache=True, purpose='chat'):
+    """complete 的异步版本，用于并发批量调用"""
+    from config import get_model
+    model = model or get_model()
+    usage = {} if usage is None else usage
+    call = LLMCall(model, purpose, messages)
+    key, reply = lookup_response(messages, model, temperature, cache, usage)
+    if reply is None:
+        from litellm import acompletion
+        try:
+            response = await acompletion(
+                model=model,
+                messages=with_cache_hints(messages, model),
+                temperature=temperature
+            )
+        except BaseException as e:
+            call.finish(usage, error=e)
+            raise
+        read_usage(getattr(response, 'usage', None), usage)
+        reply = response.choices[0].message.content
+        store_response(key, reply, usage)
+    call.first_token()
+    call.finish(usage)
+    return reply
+
+
+def stream_completion(messages, model=None, temperature=0.3, usage=None, cache=True, purpose='chat'):
+    """流式调用大模型，逐段产出回复文本
+
+    命中本地回复缓存时一次产出完整回复；未命中时在流正常结束后写入缓存。
+
+    Args:
+        usage: 可选的字典，流结束后写入本次token用量（服务商支持时）
+        cache: 为False时绕过本地回复缓存，强制调用模型
+        purpose: 调用用途，写入调用日志用于分类统计
+
+    Yields:
+        str: 模型新生成的文本片段
+    """
+    from config import get_model
+    model = model or get_model()
+    usage = {} if usage is None else usage
+    call = LLMCall(model, purpose, messages, stream=True)
+    try:
+        key, reply = lookup_response(messages, model, temperature, cache, usage)
+        if reply is not None:
+            call.first_token()
+            yield reply
+        else:
+            from litellm import completion
+            response = completion(
+                model=model,
+                messages=with_cache_hints(messages, model),
+                temperature=temperature,
+                stream=True,
+                stream_options={'include_usage': True},
+                drop_params=True
+            )
+            parts = []
+            for chunk in response:
+                read_usage(getattr(chunk, 'usage', None), usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    call.first_token()
+                    parts.append(delta)
+                    yield delta
+            store_response(key, ''.join(parts), usage)
+    except BaseException as e:
+        # 包括调用方中途停止读取（GeneratorExit）
+        call.finish(usage, error=e)
+        raise
+    call.finish(usage)
+
+
+async def astream_completion(messages, model=None, temperature=0.3, usage=None, cache=True,
+                             purpose='chat'):
+    """stream_completion 的异步版本，等待模型输出时不占用线程"""
+    from config import get_model
+    model = model or get_model()
+    usage = {} if usage is None else usage
+    call = LLMCall(model, purpose, messages, stream=True)
+    try:
+        key, reply = lookup_response(messages, model, temperature, cache, usage)
+        if reply is not None:
+            call.first_token()
+            yield reply
+        else:
+            from litellm import acompletion
+            response = await acompletion(
+                model=model,
+                messages=with_cache_hints(messages, model),
+                temperature=temperature,
+                stream=True,
+                stream_options={'include_usage': True},
+                drop_params=True
+            )
+            parts = []
+            async for chunk in response:
+                read_usage(getattr(chunk, 'usage', None), usage)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    call.first_token()
+                    parts.append(delta)
+                    yield delta
+            store_response(key, ''.join(parts), usage)
+    except BaseException as e:
+        call.finish(usage, error=e)
+        raise
+    call.finish(usage)
+
+
+def format_usage(usage):
+    """把用量格式化为一行提示文本"""
+    if not usage:
+        return ''
+    hit_rate = usage.get('response_cache_hit_rate', 0.0)
+    if usage.get('response_cache') == 'hit':
+        return f"命中本地回复缓存，未调用模型（回复缓存命中率 {hit_rate:.0%}）"
+    text = ''
+    if 'prompt_tokens' in usage:
+        text = (f"输入tokens: {usage['prompt_tokens']}"
+                f"（缓存命中 {usage['cached_tokens']}，未缓存 {usage['uncached_tokens']}），"
+                f"输出tokens: {usage['completion_tokens']}")
+    if usage.get('response_cache') == 'miss':
+        text += f"{'，' if text else ''}回复缓存命中率 {hit_rate:.0%}"
+    return text
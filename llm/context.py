@@ -0,0 +1,132 @@
+import hashlib
+import json
+from collections import OrderedDict
+
+DEFAULT_CONTEXT_WINDOW = 8192
+# 为模型输出预留的token数
+RESERVED_OUTPUT_TOKENS = 1024
+# 始终原样保留的最近消息条数
+KEEP_RECENT_MESSAGES = 4
+# 每次压缩进摘要的消息条数
+FOLD_CHUNK_MESSAGES = 4
+# 摘要调用失败时，每条旧消息保留的字符数
+FALLBACK_SNIPPET_CHARS = 200
+
+SUMMARY_PROMPT = '''请将以下招聘助手与用户的对话压缩为简要摘要，保留用户的需求、已确认的事项、
+已生成内容的要点以及邮箱、职位名称等关键信息，不要超过300字。
+
+{conversation}'''
+
+_SUMMARY_MEMO_SIZE = 64
+_summary_memo = OrderedDict()
+
+
+def count_tokens(text, model):
+    """按模型的分词器估算文本token数，无法识别模型时按字符数估算"""
+    try:
+        from litellm import token_counter
+        return token_counter(model=model, text=text)
+    except Exception:
+        # 中文约1字1token，英文约4字符1token，取折中
+        return len(text) // 2 + 1
+
+
+def get_context_window(model):
+    """获取模型的上下文长度，优先使用配置中的 context_window"""
+    from config import load_config
+    configured = load_config().get('context_window')
+    if configured:
+        return int(configured)
+    try:
+        from litellm import get_model_info
+        return get_model_info(model).get('max_input_tokens') or DEFAULT_CONTEXT_WINDOW
+    except Exception:
+        return DEFAULT_CONTEXT_WINDOW
+
+
+class ConversationContext:
+    """按token预算组装对话上下文
+
+    始终保留系统提示和最近的若干条消息；超出预算时把更早的消息
+    压缩进滚动摘要，使每次请求的输入规模与会话长度无关。
+    system_prompt 可以是一段文本，也可以是依次作为多条系统消息的文本序列。
+    """
+
+    def __init__(self, system_prompt, model, budget=None, summarize=None):
+        self.system_prompts = [system_prompt] if isinstance(system_prompt, str) else list(system_prompt)
+        self.model = model
+        self.budget = budget or max(get_context_window(model) - RESERVED_OUTPUT_TOKENS, 512)
+        self.summary = ''
+        self.turns = []
+        self._summarize = summarize or summarize_turns
+        self._system_tokens = sum(count_tokens(p, model) for p in self.system_prompts)
+
+    def add(self, role, content):
+        """追加一条消息"""
+        self.turns.append((role, content, count_tokens(content, self.model)))
+
+    def messages(self):
+        """返回符合预算的消息列表"""
+        self._fit()
+        messages = [{"role": "system", "content": p} for p in self.system_prompts if p]
+        # 摘要放在系统提示之后，不破坏可缓存的前缀
+        if self.summary:
+            messages.append({"role": "system", "content": f"之前对话的摘要：\n{self.summary}"})
+        messages.extend({"role": role, "content": content} for role, content, _ in self.turns)
+        return messages
+
+    def state(self):
+        """导出摘要和尚未压缩的消息，用于保存会话"""
+        return {'summary': self.summary, 'turns': [list(turn) for turn in self.turns]}
+
+    def load_state(self, state):
+        """恢复 state() 导出的会话状态"""
+        self.summary = state.get('summary', '')
+        self.turns = [tuple(turn) for turn in state.get('turns', [])]
+
+    def total_tokens(self):
+        summary_tokens = count_tokens(self.summary, self.model) if self.summary else 0
+        return self._system_tokens + summary_tokens + sum(t for _, _, t in self.turns)
+
+    def _fit(self):
+        # 从最早的消息开始按固定块大小压缩，客户端重放相同历史时各块的摘要可以复用；
+        # 保留最近消息仍超出预算时继续压缩，直到只剩最新一条
+        keep = KEEP_RECENT_MESSAGES
+        while self.total_tokens() > self.budget and len(self.turns) > 1:
+            if len(self.turns) <= keep:
+                keep = 1
+            size = min(FOLD_CHUNK_MESSAGES, len(self.turns) - keep)
+            self.summary = self._summarize(self.summary, self.turns[:size], self.model)
+            self.turns = self.turns[size:]
+
+
+def summarize_turns(previous_summary, turns, model):
+    """把旧摘要和待压缩的消息合并为新的摘要，相同输入复用已有结果"""
+    conversation = [{"role": "summary", "content": previous_summary}] if previous_summary else []
+    conversation += [{"role": role, "content": content} for role, content, _ in turns]
+    key = hashlib.sha256(
+        json.dumps([model, conversation], ensure_ascii=False).encode('utf-8')
+    ).hexdigest()
+    summary = _summary_memo.get(key)
+    if summary is not None:
+        _summary_memo.move_to_end(key)
+        return summary
+
+    text = '\n'.join(f"{m['role']}: {m['content']}" for m in conversation)
+    try:
+        from llm.client import complete
+        summary = complete(
+            [{"role": "user", "content": SUMMARY_PROMPT.format(conversation=text)}],
+            model=model,
+            purpose='summary'
+        ).strip()
+    except Exception:
+        # 摘要失败时退化为截断每条消息
+        summary = '\n'.join(
+            f"{m['role']}: {m['content'][:FALLBACK_SNIPPET_CHARS]}" for m in conversation
+        )
+    _summary_memo[key] = summary
+    if len(_summary_memo) > _SUMMARY_MEMO_SIZE:
+        _summary_memo.popitem(last=False)
+    return summary
+
@@ -0,0 +1,234 @@
+import hashlib
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from utils.file_lock import file_lock
+
+LOG_PATH = Path("workdir") / "logs" / "llm_calls.jsonl"
+# 单个日志文件的大小上限和保留的轮转文件数
+LOG_MAX_BYTES = 5 * 1024 * 1024
+LOG_BACKUP_COUNT = 5
+
+_logger = None
+_logger_lock = threading.Lock()
+_verbose = False
+
+_SYSTEM_TOKENS_MEMO_SIZE = 32
+_system_tokens_memo = OrderedDict()
+
+
+def set_verbose(enabled):
+    """开启后每次调用大模型都在标准错误输出一行调用详情"""
+    global _verbose
+    _verbose = enabled
+
+
+class _LockedRotatingFileHandler(RotatingFileHandler):
+    """多个服务进程共用同一日志文件的轮转处理器
+
+    每条记录在文件锁下写入，轮转也只在持锁时进行；写入前发现文件已被其他进程轮转（inode变化）时
+    重新打开，不会继续写到改名后的旧文件里。
+    """
+
+    def __init__(self, filename, **kwargs):
+        super().__init__(filename, **kwargs)
+        self.lock_path = f"{self.baseFilename}.lock"
+
+    def _rotated_elsewhere(self):
+        try:
+            return os.stat(self.baseFilename).st_ino != os.fstat(self.stream.fileno()).st_ino
+        except FileNotFoundError:
+            return True
+
+    def emit(self, record):
+        try:
+            with file_lock(self.lock_path):
+                if self.stream is not None and self._rotated_elsewhere():
+                    self.stream.close()
+                    self.stream = None
+                super().emit(record)
+        except Exception:
+            self.handleError(record)
+
+
+def _get_logger():
+    global _logger
+    with _logger_lock:
+        if _logger is None:
+            LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+            handler = _LockedRotatingFileHandler(
+                LOG_PATH, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding='utf-8'
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger = logging.getLogger('airecruit.llm_calls')
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(handler)
+            _logger = logger
+        return _logger
+
+
+def system_tokens(messages, model):
+    """系统提示（内嵌的简历和JD）占用的token数，相同内容只计算一次"""
+    from llm.context import count_tokens
+    text = '\n'.join(
+        m['content'] for m in messages if m['role'] == 'system' and isinstance(m['content'], str)
+    )
+    if not text:
+        return 0
+    key = hashlib.sha1(f"{model}\n{text}".encode('utf-8')).hexdigest()
+    tokens = _system_tokens_memo.get(key)
+    if tokens is None:
+        tokens = count_tokens(text, model)
+        _system_tokens_memo[key] = tokens
+        if len(_system_tokens_memo) > _SYSTEM_TOKENS_MEMO_SIZE:
+            _system_tokens_memo.popitem(last=False)
+    return tokens
+
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """按 litellm 的价格表估算费用（美元），未知模型返回None"""
+    try:
+        from litellm import cost_per_token
+        prompt_cost, completion_cost = cost_per_token(
+            model=model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens
+        )
+        return prompt_cost + completion_cost
+    except Exception:
+        return None
+
+
+class LLMCall:
+    """记录单次大模型调用的首token时间、总耗时、token用量和费用"""
+
+    def __init__(self, model, purpose, messages, stream=False):
+        self.model = model
+        self.purpose = purpose
+        self.messages = messages
+        self.stream = stream
+        self.started = time.perf_counter()
+        self.first_token_at = None
+
+    def first_token(self):
+        """收到第一段输出时调用"""
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    def finish(self, usage, error=None):
+        """调用结束（成功、失败或被取消）时写入调用日志"""
+        finished = time.perf_counter()
+        prompt_tokens = usage.get('prompt_tokens', 0)
+        completion_tokens = usage.get('completion_tokens', 0)
+        cache_hit = usage.get('response_cache') == 'hit'
+        if error is not None and str(error):
+            error = f"{type(error).__name__}: {error}"
+        elif error is not None:
+            error = type(error).__name__
+        record = {
+            'ts': time.time(),
+            'model': self.model,
+            'purpose': self.purpose,
+            'stream': self.stream,
+            'ttft_ms': round((self.first_token_at - self.started) * 1000, 1) if self.first_token_at else None,
+            'latency_ms': round((finished - self.started) * 1000, 1),
+            'prompt_tokens': prompt_tokens,
+            'cached_tokens': usage.get('cached_tokens', 0),
+            'completion_tokens': completion_tokens,
+            'system_tokens': system_tokens(self.messages, self.model),
+            'cost_usd': 0.0 if cache_hit else estimate_cost(self.model, prompt_tokens, completion_tokens),
+            'response_cache': usage.get('response_cache'),
+            'error': error
+        }
+        try:
+            _get_logger().info(json.dumps(record, ensure_ascii=False))
+        except OSError:
+            pass
+        if _verbose:
+            print(format_record(record), file=sys.stderr)
+        return record
+
+
+def format_record(record):
+    """把单条调用记录格式化为一行文本（--verbose 输出）"""
+    ttft = f"{record['ttft_ms']:.0f}ms" if record['ttft_ms'] is not None else '-'
+    cost = f"${record['cost_usd']:.4f}" if record['cost_usd'] is not None else '未知'
+    text = (f"[LLM] {record['model']} {record['purpose']} 首token {ttft} 总耗时 {record['latency_ms']:.0f}ms "
+            f"输入 {record['prompt_tokens']}（系统提示 {record['system_tokens']}） "
+            f"输出 {record['completion_tokens']} 费用 {cost}")
+    if record['response_cache'] == 'hit':
+        text += " 命中回复缓存"
+    if record['error']:
+        text += f" 错误：{record['error']}"
+    return text
+
+
+def load_records(since=None, log_path=LOG_PATH):
+    """读取调用日志（包括已轮转的文件）
+
+    Args:
+        since: 只返回该时间戳之后的记录
+    """
+    log_path = Path(log_path)
+    paths = [log_path.with_name(f"{log_path.name}.{i}") for i in range(LOG_BACKUP_COUNT, 0, -1)]
+    records = []
+    for path in paths + [log_path]:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if since is None or record['ts'] >= since:
+                        records.append(record)
+        except FileNotFoundError:
+            continue
+    return records
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(fraction * (len(values) - 1))))]
+
+
+def _aggregate(records):
+    latencies = [r['latency_ms'] for r in records if not r['error']]
+    ttfts = [r['ttft_ms'] for r in records if r['ttft_ms'] is not None and not r['error']]
+    costs = [r['cost_usd'] for r in records if r['cost_usd'] is not None]
+    calls = len(records)
+    return {
+        'calls': calls,
+        'errors': sum(1 for r in records if r['error']),
+        'response_cache_hits': sum(1 for r in records if r['response_cache'] == 'hit'),
+        'latency_p50_ms': _percentile(latencies, 0.5),
+        'latency_p95_ms': _percentile(latencies, 0.95),
+        'ttft_p50_ms': _percentile(ttfts, 0.5),
+        'ttft_p95_ms': _percentile(ttfts, 0.95),
+        'prompt_tokens': sum(r['prompt_tokens'] for r in records),
+        'cached_tokens': sum(r['cached_tokens'] for r in records),
+        'completion_tokens': sum(r['completion_tokens'] for r in records),
+        'avg_system_tokens': round(sum(r['system_tokens'] for r in records) / calls) if calls else 0,
+        'cost_usd': round(sum(costs), 6)
+    }
+
+
+def summarize(records):
+    """按总体、模型和用途汇总调用记录"""
+    by_model = defaultdict(list)
+    by_purpose = defaultdict(list)
+    for record in records:
+        by_model[record['model']].append(record)
+        by_purpose[record['purpose']].append(record)
+    return {
+        'total': _aggregate(records),
+        'by_model': {model: _aggregate(rs) for model, rs in by_model.items()},
+        'by_purpose': {purpose: _aggregate(rs) for purpose, rs in by_purpose.items()}
+    }
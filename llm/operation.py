@@ -0,0 +1,18 @@
+import json
+import re
+
+# 模型回复末尾的本地操作指令块
+OPERATION_PATTERN = re.compile(r'```json\n(.*?)\n```', re.DOTALL)
+
+
+def parse_operation(ai_reply):
+    """从完整回复中提取本地操作指令
+
+    Returns:
+        tuple: (操作字典或None, 去除操作块后的回复文本)
+    """
+    operation_match = OPERATION_PATTERN.search(ai_reply)
+    if not operation_match:
+        return None, ai_reply
+    operation = json.loads(operation_match.group(1).strip())
+    return operation, ai_reply.replace(operation_match.group(0), '').strip()
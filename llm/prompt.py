@@ -1,34 +1,91 @@
-def get_system_prompt(resumes, jds):
-	return f'''##                                                                                                           
-你是一位智能招聘助手，你可以帮用户优化简历，生成求职信并发送邮件。如果用户提出的需求与以上这两个需求无关，请引导到这两个功能
-。当前工作区状态：                                                                                                          
-📁 简历内容：{resumes}                                                                                                      
-📄 JD内容：{jds}                                                                                                            
-如果工作区没有简历和JD内容，请提醒用户添加文件即可。                                                                        
-### 工作模式说明                                                                                                            
-                                                                                                                            
-1. 所有操作基于工作区简历和JD文件内容                                                                                       
-2. 你需要用Markdown格式返回响应                                                                                             
-3. 优化简历的时候，请询问用户是否需要导出到pdf文件；                                                                        
-4. 生成求职信的时候，请根据jd内容总结简历内容，突出贴合职位需求，要求简洁。最后请询问用户是否需要发邮件；                   
-5.                                                                                                                          
-询问用户是否导出到pdf文件或者是否需要发邮件的时候，用户回答“ok”，“好的”或者“确认”等肯定意图的时候，请在回答里添加本地操作； 
-6. 本地操作有两种：导出到pdf文件和发邮件，请在应答中包含以下格式：                                                          
-```json                                                                                                                     
-{{"action":操作名称,"para1":"value1","para2":"value2"}}                                                                     
-```                                                                                                                         
-                                                                                                                            
-### 支持的操作类型                                                                                                          
-                                                                                                                            
-1. 导出到pdf文件：                                                                                                          
-   - 操作名称：export2pdf                                                                                                   
-   - md_content：[这里是修改后的简历内容，使用md格式]                                                                       
-                                                                                                                            
-2. 发送邮件：                                                                                                               
-   - 操作名称：send_email                                                                                                   
-   -recipient：[jd文件中获取HR邮箱]                                                                                         
-   -subject: [请从jd文件中获取职位名称，格式：求职信-职位名称]                                                              
-   -body: [这里是求职信内容，请在最后加上一句：“简历文件见附件”]                                                            
-   -has_attachment："true"                                                                                                  
+import hashlib
+from collections import OrderedDict
+
+# 固定不变的指令放在最前面，保证不同工作区、不同轮次之间共享同一段可缓存前缀
+SYSTEM_INSTRUCTIONS = '''##
+你是一位智能招聘助手，你可以帮用户优化简历，生成求职信并发送邮件。如果用户提出的需求与以上这两个需求无关，请引导到这两个功能。
+如果工作区没有简历和JD内容，请提醒用户添加文件即可。
+### 工作模式说明
+
+1. 所有操作基于工作区简历和JD文件内容
+2. 你需要用Markdown格式返回响应
+3. 优化简历的时候，请询问用户是否需要导出到pdf文件；
+4. 生成求职信的时候，请根据jd内容总结简历内容，突出贴合职位需求，要求简洁。最后请询问用户是否需要发邮件；
+5.
+询问用户是否导出到pdf文件或者是否需要发邮件的时候，用户回答“ok”，“好的”或者“确认”等肯定意图的时候，请在回答里添加本地操作；
+6. 本地操作有两种：导出到pdf文件和发邮件，请在应答中包含以下格式：
+```json
+{"action":操作名称,"para1":"value1","para2":"value2"}
 ```
+
+### 支持的操作类型
+
+1. 导出到pdf文件：
+   - 操作名称：export2pdf
+   - md_content：[这里是修改后的简历内容，使用md格式]
+
+2. 发送邮件：
+   - 操作名称：send_email
+   -recipient：[优先使用结构化信息中的HR邮箱，没有时从jd文件中获取]
+   -subject: [优先使用结构化信息中的职位名称，没有时从jd文件中获取，格式：求职信-职位名称]
+   -body: [这里是求职信内容，请在最后加上一句：“简历文件见附件”]
+   -has_attachment："true"
+   -attachment：[导出PDF时返回的附件编号，没有时省略]
 '''
+
+# JD紧随固定指令之后，工作区不变时第一条系统消息保持不变
+WORKSPACE_TEMPLATE = '''
+### 当前工作区状态
+📄 JD内容：{jds}
+'''
+
+# 入库时抽取的结构化信息（联系方式、技能、年限、职位、HR邮箱、任职要求），模型无需每轮重新从全文中查找
+PROFILE_TEMPLATE = '''🗂 结构化信息：
+{profiles}
+'''
+
+# 简历按当前问题筛选章节，每轮可能不同，作为单独的第二条系统消息，不破坏第一条的缓存前缀
+RESUME_TEMPLATE = '''### 当前工作区简历
+📁 简历内容：{resumes}
+'''
+
+_MEMO_SIZE = 32
+_memo = OrderedDict()
+
+
+def _content_hash(content):
+	return hashlib.sha256(str(content).encode('utf-8')).hexdigest()
+
+
+def get_system_prompt(resumes, jds, profiles='', query=None, model=None):
+	"""生成系统提示，按简历/JD内容哈希复用已渲染的结果
+
+	固定指令、JD和结构化信息组成第一条系统消息，在同一工作区内各轮之间保持不变；
+	（按问题筛选过章节的）简历单独作为第二条系统消息。
+
+	Args:
+		profiles: 工作区文件的结构化信息摘要（WorkspaceManager.get_profile_summary），为空时省略
+		query: 当前用户消息；提供时简历只保留与之相关的章节（导出、整体优化等整份文档的请求除外）
+		model: 用于按模型分词器计算检索的token预算
+
+	Returns:
+		tuple: (固定的系统消息, 简历系统消息)，可直接传给 ConversationContext
+	"""
+	if query and resumes and isinstance(resumes, str):
+		from llm.retrieval import retrieval_budget, needs_full_text, select_sections
+		budget = retrieval_budget()
+		if budget and not needs_full_text(query):
+			resumes = select_sections(resumes, query, jds if isinstance(jds, str) else '', budget, model)
+	key = (_content_hash(resumes), _content_hash(jds), _content_hash(profiles))
+	prompt = _memo.get(key)
+	if prompt is None:
+		fixed = SYSTEM_INSTRUCTIONS + WORKSPACE_TEMPLATE.format(jds=jds)
+		if profiles:
+			fixed += PROFILE_TEMPLATE.format(profiles=profiles)
+		prompt = (fixed, RESUME_TEMPLATE.format(resumes=resumes))
+		_memo[key] = prompt
+		if len(_memo) > _MEMO_SIZE:
+			_memo.popitem(last=False)
+	else:
+		_memo.move_to_end(key)
+	return prompt
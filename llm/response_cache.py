@@ -0,0 +1,95 @@
+import hashlib
+import json
+from pathlib import Path
+from utils.disk_cache import DiskLRUCache
+
+CACHE_DIR = Path("workdir") / ".cache" / "responses"
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+DEFAULT_TTL_HOURS = 24
+
+
+def normalize_messages(messages):
+    """统一换行和首尾空白，只保留角色和文本内容，用于生成缓存键"""
+    normalized = []
+    for message in messages:
+        content = message['content']
+        if isinstance(content, list):
+            content = ''.join(part.get('text', '') for part in content)
+        lines = content.replace('\r\n', '\n').split('\n')
+        normalized.append([message['role'], '\n'.join(line.rstrip() for line in lines).strip()])
+    return normalized
+
+
+class ResponseCache(DiskLRUCache):
+    """大模型回复的磁盘缓存
+
+    缓存键 = 模型 + 归一化后的消息 + 调用参数。条目超过 ttl 秒后失效，
+    超过容量上限时按最近访问时间淘汰（LRU）。
+    """
+
+    suffix = '.json'
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES,
+                 ttl=DEFAULT_TTL_HOURS * 3600):
+        super().__init__(cache_dir, max_bytes, ttl)
+        self.tokens_saved = 0
+
+    def make_key(self, model, messages, **params):
+        """生成缓存键"""
+        payload = json.dumps(
+            [model, normalize_messages(messages), params],
+            ensure_ascii=False, sort_keys=True
+        )
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key):
+        """读取缓存的回复，未命中或已过期返回None
+
+        Returns:
+            dict: {'reply': 回复文本, 'usage': 生成该回复时的token用量}
+        """
+        entry_path = self._lookup(key)
+        if entry_path is None:
+            return None
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                cached = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self._discard(key)
+            return None
+        usage = cached.get('usage') or {}
+        with self._lock:
+            self.tokens_saved += usage.get('prompt_tokens', 0) + usage.get('completion_tokens', 0)
+        return cached
+
+    def put(self, key, reply, usage=None):
+        """写入回复并按容量上限淘汰旧条目"""
+        data = json.dumps({'reply': reply, 'usage': usage or {}}, ensure_ascii=False).encode('utf-8')
+        self._store(key, lambda tmp_path: tmp_path.write_bytes(data))
+
+    def stats(self):
+        """返回命中/未命中计数、节省的token数与占用空间"""
+        stats = super().stats()
+        stats.update(tokens_saved=self.tokens_saved, ttl_hours=self.ttl / 3600)
+        return stats
+
+
+_cache = None
+
+
+def get_response_cache():
+    """获取进程内共享的回复缓存，配置中未开启 response_cache 时返回None
+
+    配置项 response_cache_ttl_hours、response_cache_max_mb 分别控制过期时间和容量上限。
+    """
+    global _cache
+    from config import load_config
+    config = load_config()
+    if not config.get('response_cache', False):
+        return None
+    if _cache is None:
+        _cache = ResponseCache(
+            max_bytes=int(config.get('response_cache_max_mb', DEFAULT_MAX_BYTES // (1024 * 1024))) * 1024 * 1024,
+            ttl=float(config.get('response_cache_ttl_hours', DEFAULT_TTL_HOURS)) * 3600
+        )
+    return _cache
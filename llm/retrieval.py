@@ -0,0 +1,112 @@
+import re
+from config import load_config
+from utils.chunking import split_sections
+from utils.ranking import BM25Index
+
+# 简历章节占用的默认token预算（配置项 retrieval_budget_tokens）
+DEFAULT_BUDGET_TOKENS = 1500
+# JD相关度在章节得分中的权重，用户消息的权重为1
+JD_WEIGHT = 0.3
+# 提示中最多列出的省略章节标题数
+MAX_OMITTED_HEADINGS = 10
+
+# 需要完整简历才能完成的请求：导出、整体优化、求职信等。
+# 英文词前后不能紧接字母或连字符（中文字符在 \b 看来也是单词字符，不能用 \b），
+# 避免 fullstack、full-time 之类误判为整份文档的请求
+_WHOLE_DOCUMENT = re.compile(
+    r'导出|完整|全文|整份|整个|整体|优化.{0,4}简历|求职信'
+    r'|(?<![a-z-])(?:pdfs?|export(?:ed|ing|s)?|cover\s*letters?|whole|entire|full)(?![a-z-])',
+    re.IGNORECASE
+)
+_HEADING_LEVEL = re.compile(r'^(#{1,6})\s')
+
+
+def retrieval_budget():
+    """检索开启时返回简历章节的token预算，配置 prompt_retrieval 为false时返回None"""
+    config = load_config()
+    if config.get('prompt_retrieval') is False:
+        return None
+    return int(config.get('retrieval_budget_tokens') or DEFAULT_BUDGET_TOKENS)
+
+
+def needs_full_text(message):
+    """请求是否针对整份文档（导出、整体优化等），此时不做检索"""
+    return bool(_WHOLE_DOCUMENT.search(message))
+
+
+def _level(heading):
+    match = _HEADING_LEVEL.match(heading)
+    return len(match.group(1)) if match else 0
+
+
+def _normalized(scores):
+    top = max(scores.values(), default=0.0)
+    return {k: v / top for k, v in scores.items()} if top > 0 else {k: 0.0 for k in scores}
+
+
+def select_sections(text, query, jd='', budget_tokens=DEFAULT_BUDGET_TOKENS, model=None):
+    """只保留与当前问题相关的Markdown章节
+
+    章节按与用户消息（为主）和JD（为辅）的BM25相关度排序，在token预算内依次选取，
+    再按原文顺序拼接；标题前的内容（姓名、联系方式）始终保留，被选中章节的上级标题行也会保留。
+    全文不超过预算、没有章节与问题相关时原样返回。
+
+    Returns:
+        str: 筛选后的文本，省略的章节在末尾列出标题
+    """
+    from llm.context import count_tokens
+    sections = split_sections(text)
+    if len(sections) < 2 or count_tokens(text, model) <= budget_tokens:
+        return text
+
+    documents = {i: body for i, (_, body) in enumerate(sections)}
+    index = BM25Index(documents)
+    relevance = _normalized(dict(index.score(query)))
+    if not any(relevance.values()):
+        return text
+    if jd:
+        for i, score in _normalized(dict(index.score(jd))).items():
+            relevance[i] += JD_WEIGHT * score
+
+    preamble = not sections[0][0]
+    selected = {0} if preamble else set()
+    used = count_tokens(sections[0][1], model) if preamble else 0
+    picked = False
+    for i in sorted(relevance, key=lambda i: relevance[i], reverse=True):
+        if i in selected or relevance[i] <= 0:
+            continue
+        tokens = count_tokens(sections[i][1], model)
+        # 最相关的章节即使超出预算也保留
+        if picked and used + tokens > budget_tokens:
+            continue
+        selected.add(i)
+        used += tokens
+        picked = True
+
+    # 被选中章节的上级标题
+    ancestors = set()
+    stack = []
+    for i, (heading, _) in enumerate(sections):
+        level = _level(heading)
+        while stack and stack[-1][1] >= level:
+            stack.pop()
+        if i in selected:
+            ancestors.update(j for j, _ in stack)
+        if level:
+            stack.append((i, level))
+
+    parts = []
+    omitted = []
+    for i, (heading, body) in enumerate(sections):
+        if i in selected:
+            parts.append(body)
+        elif i in ancestors:
+            parts.append(heading + '\n')
+        if i not in selected and heading and body.strip() != heading:
+            omitted.append(heading.lstrip('#').strip())
+    if not omitted:
+        return text
+    names = '、'.join(omitted[:MAX_OMITTED_HEADINGS])
+    if len(omitted) > MAX_OMITTED_HEADINGS:
+        names += f"等共{len(omitted)}节"
+    return ''.join(parts).rstrip('\n') + f"\n\n（以下章节与当前问题关系不大，已省略：{names}）\n"
@@ -0,0 +1,23 @@
+"""提示缓存断点只加在固定的第一条系统消息上"""
+from llm.client import with_cache_hints
+from llm.context import ConversationContext
+
+
+def test_only_stable_system_message_is_hinted():
+    context = ConversationContext(('固定指令和JD', '按问题筛选的简历'), 'anthropic/claude-3-5-sonnet', budget=100000)
+    context.summary = '之前的对话'
+    context.add('user', '你好')
+    messages = context.messages()
+
+    hinted = with_cache_hints(messages, 'anthropic/claude-3-5-sonnet')
+    assert hinted[0]['content'] == [
+        {'type': 'text', 'text': '固定指令和JD', 'cache_control': {'type': 'ephemeral'}}
+    ]
+    # 每轮变化的简历章节、摘要和对话消息保持为普通字符串
+    assert hinted[1:] == messages[1:]
+    assert all(isinstance(m['content'], str) for m in hinted[1:])
+
+
+def test_models_without_explicit_caching_are_unchanged():
+    messages = [{'role': 'system', 'content': 'x'}, {'role': 'user', 'content': 'y'}]
+    assert with_cache_hints(messages, 'openai/gpt-4') is messages
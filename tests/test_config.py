@@ -0,0 +1,72 @@
+"""多进程共用配置文件时的写盘合并"""
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import config
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+
+def test_flush_keeps_fields_written_by_another_process(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(config, '_cache', None)
+    monkeypatch.setattr(config, '_base', None)
+    monkeypatch.setattr(config, '_dirty', False)
+
+    cfg = config.load_config()
+    cfg['model'] = 'openai/gpt-4'
+    config.save_config(cfg)
+
+    # 另一个进程在本进程写盘前修改了别的字段
+    code = (
+        "import config\n"
+        "with config.config_lock():\n"
+        "    cfg = config.load_config()\n"
+        "    cfg['smtp_server'] = 'smtp.example.com'\n"
+        "    config.save_config(cfg)\n"
+        "config.flush_config()\n"
+    )
+    subprocess.run([sys.executable, '-c', f"import sys; sys.path.insert(0, {str(PROJECT_DIR)!r})\n{code}"],
+                   cwd=tmp_path, check=True)
+
+    config.flush_config()
+    on_disk = json.loads((tmp_path / config.CONFIG_FILE).read_text())
+    assert on_disk['model'] == 'openai/gpt-4'
+    assert on_disk['smtp_server'] == 'smtp.example.com'
+    # 本进程的缓存同步到合并后的内容
+    assert config.load_config()['smtp_server'] == 'smtp.example.com'
+
+
+def test_flush_merges_workspace_files_changed_by_another_process(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / config.CONFIG_FILE).write_text(json.dumps({'workspace_files': [
+        {'path': 'x.md', 'type': 'resume'}, {'path': 'y.md', 'type': 'jd'}
+    ]}))
+    monkeypatch.setattr(config, '_cache', None)
+    monkeypatch.setattr(config, '_base', None)
+    monkeypatch.setattr(config, '_dirty', False)
+
+    with config.config_lock():
+        cfg = config.load_config()
+        cfg['workspace_files'] = cfg['workspace_files'] + [{'path': 'a.md', 'type': 'resume'}]
+        config.save_config(cfg)
+
+    # 另一个进程在本进程写盘前移除了 x.md、添加了 b.md
+    code = (
+        "import config\n"
+        "with config.config_lock():\n"
+        "    cfg = config.load_config()\n"
+        "    cfg['workspace_files'] = [f for f in cfg['workspace_files'] if f['path'] != 'x.md']\n"
+        "    cfg['workspace_files'].append({'path': 'b.md', 'type': 'jd'})\n"
+        "    config.save_config(cfg)\n"
+        "config.flush_config()\n"
+    )
+    subprocess.run([sys.executable, '-c', f"import sys; sys.path.insert(0, {str(PROJECT_DIR)!r})\n{code}"],
+                   cwd=tmp_path, check=True)
+
+    config.flush_config()
+    on_disk = json.loads((tmp_path / config.CONFIG_FILE).read_text())
+    assert [f['path'] for f in on_disk['workspace_files']] == ['y.md', 'b.md', 'a.md']
+    assert config.load_config()['workspace_files'] == on_disk['workspace_files']
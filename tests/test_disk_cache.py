@@ -0,0 +1,89 @@
+"""转换缓存与回复缓存共用的磁盘LRU行为"""
+import time
+
+from llm.response_cache import ResponseCache
+from utils.convert_cache import ConversionCache
+
+
+def test_conversion_cache_evicts_least_recently_used(tmp_path):
+    cache = ConversionCache(tmp_path, max_bytes=25)
+    cache.put('a', 'x' * 10)
+    cache.put('b', 'y' * 10)
+    assert cache.get('a') == 'x' * 10
+    cache.put('c', 'z' * 10)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 'x' * 10
+    assert cache.get('c') == 'z' * 10
+    assert not (tmp_path / 'b.md').exists()
+    assert cache.stats()['entries'] == 2
+
+    # 索引持久化，新实例能读到已有条目
+    assert ConversionCache(tmp_path, max_bytes=25).get('c') == 'z' * 10
+
+
+def test_response_cache_expires_and_counts_tokens(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=1024 * 1024, ttl=0.2)
+    cache.put('k', '回复', usage={'prompt_tokens': 7, 'completion_tokens': 3})
+    assert cache.get('k')['reply'] == '回复'
+    assert cache.stats()['tokens_saved'] == 10
+
+    time.sleep(0.3)
+    assert cache.get('k') is None
+    assert not (tmp_path / 'k.json').exists()
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 0)
+
+
+def test_response_cache_treats_corrupt_entry_as_miss(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.put('k', '回复')
+    (tmp_path / 'k.json').write_text('{not json', encoding='utf-8')
+
+    assert cache.get('k') is None
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (0, 1, 0)
+
+    cache.clear()
+    assert cache.stats()['entries'] == 0
+
+
+def test_instances_sharing_cache_dir_merge_their_entries(tmp_path):
+    first = ConversionCache(tmp_path, max_bytes=1024)
+    second = ConversionCache(tmp_path, max_bytes=1024)
+    first.put('k1', 'a')
+    assert second.get('k1') == 'a'
+    first.put('k2', 'b')
+    second.put('k3', 'c')
+
+    for cache in (first, second):
+        assert cache.get('k2') == 'b'
+        assert cache.stats()['entries'] == 3
+
+
+def test_eviction_counts_entries_written_by_other_instances(tmp_path):
+    first = ConversionCache(tmp_path, max_bytes=25)
+    second = ConversionCache(tmp_path, max_bytes=25)
+    first.put('a', 'x' * 10)
+    second.put('b', 'y' * 10)
+    first.put('c', 'z' * 10)
+
+    assert not (tmp_path / 'a.md').exists()
+    assert second.get('a') is None
+    assert sorted(p.name for p in tmp_path.glob('*.md')) == ['b.md', 'c.md']
+
+
+def test_hits_do_not_rewrite_index(tmp_path):
+    cache = ConversionCache(tmp_path, max_bytes=1024)
+    cache.put('a', 'x')
+    cache.put('b', 'y')
+    before = (tmp_path / 'index.json').stat().st_mtime_ns, (tmp_path / 'index.json').stat().st_ino
+    for _ in range(20):
+        assert cache.get('a') == 'x'
+    assert ((tmp_path / 'index.json').stat().st_mtime_ns, (tmp_path / 'index.json').stat().st_ino) == before
+
+    # 访问时间在下次写入时合并，淘汰时 a 比 b 新
+    cache.max_bytes = 2
+    cache.put('c', 'z')
+    assert cache.get('a') == 'x'
+    assert cache.get('b') is None
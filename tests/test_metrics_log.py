@@ -0,0 +1,36 @@
+"""多个进程写同一个调用日志并轮转时不丢记录"""
+import subprocess
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+WRITER = '''
+import logging, sys
+sys.path.insert(0, {project!r})
+from llm.metrics import _LockedRotatingFileHandler
+handler = _LockedRotatingFileHandler({path!r}, maxBytes=2000, backupCount=1000, encoding='utf-8')
+logger = logging.getLogger('writer')
+logger.addHandler(handler)
+logger.setLevel(logging.INFO)
+for i in range({count}):
+    logger.info('{{"writer": %d, "i": %d, "pad": "%s"}}', {writer}, i, 'x' * 40)
+'''
+
+
+def test_concurrent_writers_keep_every_record(tmp_path):
+    path = tmp_path / 'llm_calls.jsonl'
+    count = 200
+    procs = [
+        subprocess.Popen([sys.executable, '-c', WRITER.format(
+            project=str(PROJECT_DIR), path=str(path), count=count, writer=w)])
+        for w in range(3)
+    ]
+    for proc in procs:
+        assert proc.wait(timeout=120) == 0
+
+    lines = [line for f in tmp_path.glob('llm_calls.jsonl*') if not f.name.endswith('.lock')
+             for line in f.read_text(encoding='utf-8').splitlines()]
+    assert len(lines) == 3 * count
+    assert len(set(lines)) == 3 * count
+    assert len(list(tmp_path.glob('llm_calls.jsonl.*'))) > 2
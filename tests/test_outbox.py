@@ -0,0 +1,171 @@
+"""发件箱对接本地 aiosmtpd 服务的端到端测试"""
+import datetime
+import socket
+import ssl
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("redmail")
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+from aiosmtpd.smtp import AuthResult
+
+import config
+from capacity import outbox as outbox_module
+from capacity.send_email import get_email_status
+
+
+def _self_signed_context(directory):
+    """生成自签名证书，供本地SMTP服务提供STARTTLS"""
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import ec
+    from cryptography.x509.oid import NameOID
+
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(now - datetime.timedelta(days=1))
+            .not_valid_after(now + datetime.timedelta(days=1))
+            .sign(key, hashes.SHA256()))
+    cert_path = directory / "cert.pem"
+    key_path = directory / "key.pem"
+    cert_path.write_bytes(cert.public_bytes(serialization.Encoding.PEM))
+    key_path.write_bytes(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                           serialization.NoEncryption()))
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert_path, key_path)
+    return context
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class RecordingHandler:
+    """记录收到的邮件和所用连接；flaky 中的收件人第一次投递时返回 451 临时错误"""
+
+    def __init__(self, flaky=()):
+        self.flaky = set(flaky)
+        self.refused = []
+        self.delivered = []
+        self.contents = []
+        self.delivered_event = threading.Event()
+        self.expected = 0
+
+    async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
+        if address in self.flaky:
+            self.flaky.discard(address)
+            self.refused.append(address)
+            return "451 4.3.0 Try again later"
+        envelope.rcpt_tos.append(address)
+        return "250 OK"
+
+    async def handle_DATA(self, server, session, envelope):
+        for rcpt in envelope.rcpt_tos:
+            self.delivered.append((rcpt, id(session)))
+        self.contents.append(envelope.content)
+        if len(self.delivered) >= self.expected:
+            self.delivered_event.set()
+        return "250 Message accepted for delivery"
+
+
+@pytest.fixture
+def smtp_server(tmp_path, monkeypatch):
+    handler = RecordingHandler(flaky={"flaky@example.com"})
+    port = _free_port()
+    controller = aiosmtpd_controller.Controller(
+        handler, hostname="127.0.0.1", port=port,
+        tls_context=_self_signed_context(tmp_path),
+        authenticator=lambda *args: AuthResult(success=True),
+    )
+    controller.start()
+    monkeypatch.setattr(config, "get_smtp_config", lambda: {
+        'sender_email': 'hr-bot@example.com',
+        'sender_password': 'secret',
+        'smtp_server': '127.0.0.1',
+        'smtp_port': port,
+    })
+    yield handler
+    controller.stop()
+
+
+@pytest.fixture
+def outbox(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(outbox_module, "RETRY_BASE_SECONDS", 0.5)
+    box = outbox_module.Outbox(db_path=tmp_path / "outbox.db")
+    # get_email_status 通过进程内共享的发件箱查询
+    monkeypatch.setattr(outbox_module, "_outbox", box)
+    yield box
+    box._close_sender()
+
+
+def _wait_for(predicate, timeout=15):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_batch_delivery_reuses_connection_and_retries_transient_failure(smtp_server, outbox):
+    recipients = [f"candidate{i}@example.com" for i in range(3)] + ["flaky@example.com"]
+    smtp_server.expected = len(recipients)
+    ids = {r: outbox.enqueue(r, f"求职信-{r}", "<p>您好</p>") for r in recipients}
+
+    flaky_id = ids["flaky@example.com"]
+
+    # 临时错误（451）后留在队列中等待退避重试，记录错误原因
+    assert _wait_for(lambda: (get_email_status(flaky_id)['last_error'] or '').find('451') >= 0)
+    retrying = get_email_status(flaky_id)
+    assert retrying['status'] == 'queued'
+    assert retrying['attempts'] == 1
+
+    assert smtp_server.delivered_event.wait(timeout=15)
+    assert _wait_for(lambda: all(get_email_status(i)['status'] == 'sent' for i in ids.values()))
+
+    delivered = dict(smtp_server.delivered)
+    assert set(delivered) == set(recipients)
+    # 同一批的邮件共用一个已认证的连接
+    assert len({delivered[r] for r in recipients[:3]}) == 1
+    assert smtp_server.refused == ["flaky@example.com"]
+
+    # 重试成功后清除错误
+    flaky = get_email_status(flaky_id)
+    assert flaky['attempts'] == 2
+    assert flaky['last_error'] is None
+    for r in recipients[:3]:
+        status = get_email_status(ids[r])
+        assert status['attempts'] == 1
+        assert status['last_error'] is None
+
+
+def test_status_of_unknown_message_is_none(outbox):
+    assert get_email_status("missing") is None
+
+
+def test_attachment_is_sent_even_if_file_is_removed_after_enqueue(smtp_server, outbox, tmp_path):
+    import email
+
+    pdf_path = tmp_path / "张三_abc.pdf"
+    pdf_path.write_bytes(b"%PDF-1.4 resume")
+    smtp_server.expected = 1
+    # 入队后先不发送，模拟PDF在后台发送前被删除
+    outbox.start = lambda: None
+    message_id = outbox.enqueue("candidate@example.com", "求职信", "<p>您好</p>", {"张三.pdf": pdf_path})
+    pdf_path.unlink()
+    del outbox.start
+    outbox.start()
+
+    assert smtp_server.delivered_event.wait(timeout=15)
+    assert _wait_for(lambda: get_email_status(message_id)['status'] == 'sent')
+    message = email.message_from_bytes(smtp_server.contents[-1])
+    parts = [part for part in message.walk() if part.get_filename()]
+    assert [part.get_payload(decode=True) for part in parts] == [b"%PDF-1.4 resume"]
@@ -0,0 +1,69 @@
+"""批量导出PDF：按内容缓存不覆盖同名文档，进程池损坏后自动重建"""
+import os
+from pathlib import Path
+
+from utils import pdf_render
+from utils.pdf_cache import PDFCache, attachment_id
+
+
+def _fake_render_many(calls):
+    def render_many(documents):
+        calls.append(len(documents))
+        results = []
+        for md_content, path in documents:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            Path(path).write_text(md_content, encoding='utf-8')
+            results.append({'path': str(path), 'error': None})
+        return results
+    return render_many
+
+
+def test_export_many_keeps_same_named_documents_apart(tmp_path):
+    cache = PDFCache(tmp_path)
+    calls = []
+    docs = ['# 张三\n简历一', '# 张三\n简历二', '# 张三\n简历一']
+
+    results = cache.export_many(docs, _fake_render_many(calls))
+
+    assert [r['attachment'] for r in results] == [attachment_id(md) for md in docs]
+    assert results[0]['path'] == results[2]['path'] != results[1]['path']
+    assert Path(results[1]['path']).read_text(encoding='utf-8') == docs[1]
+    assert cache.find(results[1]['attachment'])['path'] == results[1]['path']
+    assert calls == [2]
+    assert not list((tmp_path / 'pdf').glob('*.tmp'))
+
+    # 再次导出全部命中缓存，不再渲染
+    assert cache.export_many(docs, _fake_render_many(calls)) == results
+    assert calls == [2]
+
+
+def test_export_many_reports_render_errors(tmp_path):
+    cache = PDFCache(tmp_path)
+    results = cache.export_many(['# 李四'], lambda documents: [{'path': None, 'error': 'boom'}])
+    assert results == [{'path': None, 'attachment': None, 'error': 'boom'}]
+    assert cache.find(attachment_id('# 李四')) is None
+
+
+def _noop_init():
+    pass
+
+
+def _crash_or_render(md_content, output_path):
+    if md_content == 'crash':
+        os._exit(1)
+    return {'path': output_path, 'error': None}
+
+
+def test_render_many_replaces_broken_pool(monkeypatch, tmp_path):
+    monkeypatch.setattr(pdf_render, '_init_worker', _noop_init)
+    monkeypatch.setattr(pdf_render, '_render_in_worker', _crash_or_render)
+    renderer = pdf_render.PDFRenderer(workers=2)
+    try:
+        broken = renderer.render_many([('crash', tmp_path / 'a.pdf'), ('crash', tmp_path / 'b.pdf')])
+        assert all(r['error'] for r in broken)
+
+        results = renderer.render_many([('ok', tmp_path / 'a.pdf'), ('ok', tmp_path / 'b.pdf')])
+        assert results == [{'path': str(tmp_path / 'a.pdf'), 'error': None},
+                           {'path': str(tmp_path / 'b.pdf'), 'error': None}]
+    finally:
+        renderer.shutdown()
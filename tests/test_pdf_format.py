@@ -0,0 +1,155 @@
+"""PDF转Markdown的逐行格式化与原先整段正则实现的逐字对比
+
+LegacyFormatter 是逐行流水线改写前 PDFToMarkdownConverter 格式化部分的冻结副本，
+改动格式化规则时两边需要同步修改。
+"""
+import random
+import re
+
+import pytest
+
+pytest.importorskip("pdfminer")
+from utils.pdf_utils import PDFToMarkdownConverter, _split_lines
+
+
+class LegacyFormatter:
+    """改写前的整段多行正则实现（冻结副本，不要修改）"""
+
+    def format_markdown(self, text):
+        text = self.format_headings(text)
+        text = self.format_code_blocks(text)
+        text = self.format_lists(text)
+        text = self.format_links(text)
+        text = re.sub(r'\n{3,}', '\n\n', text)
+        text = re.sub(r' +', ' ', text)
+        text = re.sub(r'　+', ' ', text)
+        return text
+
+    def format_headings(self, text):
+        text = re.sub(r'^(.+)\n=+$', r'# \1', text, flags=re.MULTILINE)
+        text = re.sub(r'^(.+)\n-+$', r'## \1', text, flags=re.MULTILINE)
+        text = re.sub(r'^(\d+\.\d+(?:\.\d+)*)\s+(.+)$', r'### \1 \2', text, flags=re.MULTILINE)
+        text = re.sub(r'^(第[一二三四五六七八九十百千零]+章)\s+(.+)$', r'# \1 \2', text, flags=re.MULTILINE)
+        text = re.sub(r'^(第[一二三四五六七八九十百零]+节)\s+(.+)$', r'## \1 \2', text, flags=re.MULTILINE)
+        text = re.sub(r'^\(([\d一二三四五六七八九十]+)\)\s+(.+)$', r'### \1. \2', text, flags=re.MULTILINE)
+        return text
+
+    def format_lists(self, text):
+        text = re.sub(r'^[\s\u2003]*([•◦▫➢])\s+(.+)$', r'- \2', text, flags=re.MULTILINE)
+        text = re.sub(r'^[\s\u2003]*([（\(]?\d+[）\)]?)\s+(.+)$', r'\1. \2', text, flags=re.MULTILINE)
+        text = re.sub(r'^[\s\u2003]*([a-zA-Z])[\.、]\s+(.+)$', r'\1. \2', text, flags=re.MULTILINE)
+        return text
+
+    def format_code_blocks(self, text):
+        text = re.sub(r'((?:^ {4,}.*\n)+)', r'```\n\1```\n\n', text, flags=re.MULTILINE)
+        text = re.sub(r'\n+```', '\n```', text)
+        text = re.sub(r'```\n+', '```\n', text)
+        return text
+
+    def format_links(self, text):
+        return re.sub(r'(https?://\S+)', r'[\1](\1)', text)
+
+
+RESUME = """张三
+====
+电话：138-0000-0000　　邮箱：zhangsan@example.com
+主页：https://github.com/zhangsan  博客：http://blog.example.com/zs
+
+个人简介
+--------
+五年Java后端开发经验，熟悉  Spring Boot、MySQL、Redis。
+
+
+
+第一章 工作经历
+第一节 某科技有限公司
+1.1 后端开发工程师  2019.07 - 至今
+• 负责订单系统的设计与开发
+◦ 日均处理订单 100 万+
+➢ 主导服务拆分
+(1) 性能优化
+（2） 数据库分库分表
+1 单元测试覆盖率提升到 80%
+a. 代码评审
+B、 技术分享
+    public class Order {
+        private Long id;
+    }
+
+
+
+1.2.3 教育背景
+(一) 某某大学　计算机科学与技术　本科
+"""
+
+CASES = {
+    'resume': RESUME,
+    'empty': '',
+    'only_newlines': '\n' * 7,
+    'blank_runs': 'a\n\n\nb\n\n\n\n\nc\n \n\n  \nd\n\n\n',
+    'leading_blank_run': '\n\n\n\n标题\n',
+    'whitespace_only_lines': ' \n\t\n　\n\u2003\n',
+    'code_block': '说明：\n    x = 1\n        y = 2\n\n\n    z = 3\n正文\n',
+    'code_block_at_end': '前文\n\n\n    last line without newline',
+    'code_block_long_indent': '    ' + ' ' * 300 + 'x\n' + ' ' * 4000,
+    'code_fence_neighbours': '```\n\n\n    code\n\n\n```\n',
+    'cjk_fullwidth_spaces': '姓名：李四　　　性别：男\n　　• 项目经验\n\u2003\u2003➢ 需求分析\n（３） 全角数字\n',
+    'fullwidth_only_prefix': '•\n　\n正文内容\n',
+    'prefix_spanning_lines': '1.2\n\n\n标题正文\n第一章\n\n内容\n(1)\n   \nx\n',
+    'bullet_spanning_lines': '  •  \n\n  下一行\n◦\n',
+    'form_feed': '第一页内容\n\f第二页\n1.1\f标题\n\f\n    代码\f行\n',
+    'line_separator': '第一行\u2028第二行\n• 要点\u2028续行\n\u2028\n2.1 \u2028节标题\n',
+    'paragraph_separator': 'a\u2029b\n\u2029\n\n\nc',
+    'underlines': '标题\n=\n小节\n-----\n===\n---\n\n=\n',
+    'links': '见 https://example.com/a?b=1&c=2。以及http://x.y/z　后文\n',
+    'crlf': '1.1 标题\r\n• 列表\r\n\r\n\r\n\r\n正文\r\n',
+}
+
+
+@pytest.fixture(scope='module')
+def converter():
+    return PDFToMarkdownConverter('unused.pdf')
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_format_markdown_matches_legacy(converter, name):
+    text = CASES[name]
+    assert converter.format_markdown(text) == LegacyFormatter().format_markdown(text)
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_format_steps_match_legacy(converter, name):
+    text = CASES[name]
+    legacy = LegacyFormatter()
+    assert converter.format_headings(text) == legacy.format_headings(text)
+    assert converter.format_code_blocks(text) == legacy.format_code_blocks(text)
+    assert converter.format_lists(text) == legacy.format_lists(text)
+    assert converter.format_links(text) == legacy.format_links(text)
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_streamed_chunks_match_legacy(converter, name):
+    # 逐页提取时文本按任意位置分块到达
+    text = CASES[name]
+    rng = random.Random(name)
+    cuts = sorted(rng.sample(range(len(text) + 1), min(5, len(text) + 1)))
+    chunks = [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+    streamed = '\n'.join(converter.format_lines(_split_lines(chunks)))
+    assert streamed == LegacyFormatter().format_markdown(text)
+
+
+TOKENS = ['', ' ', '  ', '    ', '     ', '\t', '\f', '\u2028', '　', '\u2003', '•', '◦', '➢',
+          '1', '12', '1.2', '1.2.3', '(1)', '（2）', '(一)', '第一章', '第二节', 'a.', 'B、',
+          '===', '---', '=', '-', '```', 'http://x.y/z', 'foo', '中文', '\r', 'x y']
+
+
+def test_random_texts_match_legacy(converter):
+    rng = random.Random(20)
+    legacy = LegacyFormatter()
+    for _ in range(3000):
+        lines = [
+            ''.join(rng.choice(TOKENS) for _ in range(rng.choice([0, 1, 1, 2, 2, 3, 4])))
+            for _ in range(rng.randint(0, 12))
+        ]
+        text = '\n'.join(lines)
+        assert converter.format_markdown(text) == legacy.format_markdown(text), ascii(text)
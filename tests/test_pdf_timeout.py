@@ -0,0 +1,27 @@
+"""单页时限在版面分析阶段同样生效"""
+import pytest
+
+pytest.importorskip("pdfminer")
+from pdfminer.converter import TextConverter
+from pdfminer.high_level import extract_text
+
+from benchmarks.corpus import build_corpus
+from utils import pdf_utils
+
+
+@pytest.fixture(scope='module')
+def pdf_path(tmp_path_factory):
+    return build_corpus(str(tmp_path_factory.mktemp('corpus')))['large']['pdf']
+
+
+def test_pages_within_limit_are_unchanged(pdf_path):
+    text = ''.join(t for _, t, timed_out in pdf_utils._iter_page_texts(pdf_path, 60) if not timed_out)
+    assert text == extract_text(pdf_path)
+
+
+def test_deadline_is_checked_during_layout_analysis(pdf_path, monkeypatch):
+    # 去掉解释页面内容时和 end_page 入口的检查，只剩版面分析中的检查
+    for name in ('render_char', 'render_image', 'paint_path', 'end_page'):
+        monkeypatch.setattr(pdf_utils._DeadlineTextConverter, name, getattr(TextConverter, name))
+    results = list(pdf_utils._iter_page_texts(pdf_path, 1e-9))
+    assert results and all(timed_out for _, _, timed_out in results)
@@ -0,0 +1,44 @@
+"""系统提示拆分与整份文档请求的识别"""
+import pytest
+
+from llm.context import ConversationContext
+from llm.prompt import get_system_prompt
+from llm.retrieval import needs_full_text
+
+RESUME = "# 张三\n电话：13800000000\n\n" + "".join(
+    f"## {title}\n" + f"{body}。\n" * 200 for title, body in (
+        ('工作经历', '负责订单系统的Java开发，使用Spring Boot和MySQL'),
+        ('项目经验', '主导推荐系统的机器学习模型训练与上线'),
+        ('教育背景', '某某大学计算机科学与技术本科'),
+    )
+)
+
+
+@pytest.mark.parametrize('query', [
+    '导出pdf', '帮我导出为PDF', 'export my resume', 'show the full resume', 'rewrite the whole thing',
+    '帮我写求职信', 'write a cover letter', '整份简历看一下', '帮我优化简历',
+])
+def test_whole_document_requests(query):
+    assert needs_full_text(query)
+
+
+@pytest.mark.parametrize('query', [
+    '有没有fullstack经验', '是否接受full-time工作', '全部项目经验有哪些', 'exporter模块是谁写的', '讲讲推荐系统项目',
+])
+def test_section_requests(query):
+    assert not needs_full_text(query)
+
+
+def test_selected_sections_do_not_change_first_system_message():
+    jd = "Java开发工程师，要求熟悉Spring Boot"
+    fixed_a, resume_a = get_system_prompt(RESUME, jd, '- 简历：候选人：张三', query='讲讲推荐系统项目')
+    fixed_b, resume_b = get_system_prompt(RESUME, jd, '- 简历：候选人：张三', query='订单系统用了哪些技术')
+
+    assert fixed_a == fixed_b
+    assert RESUME not in fixed_a and jd in fixed_a and '候选人：张三' in fixed_a
+    assert resume_a != resume_b
+    assert '推荐系统' in resume_a and '推荐系统' not in resume_b
+
+    messages = ConversationContext((fixed_a, resume_a), 'test/model', budget=100000).messages()
+    assert [m['role'] for m in messages] == ['system', 'system']
+    assert [m['content'] for m in messages] == [fixed_a, resume_a]
@@ -0,0 +1,27 @@
+"""多个进程（各自的 VectorIndex 实例）共用同一索引目录"""
+import pytest
+
+pytest.importorskip("numpy")
+from utils.vector_index import VectorIndex, embed_texts
+
+
+def test_instances_sharing_index_see_each_others_writes(tmp_path):
+    first = VectorIndex(tmp_path)
+    second = VectorIndex(tmp_path)
+
+    first.add('a.md', 'resume', '# 张三\nJava Spring Boot MySQL 高并发')
+    # second 已加载过旧的元数据，写入前必须重新加载，不能覆盖 first 的文档或复用其行
+    assert second.stats()['documents'] == 1
+    second.add('b.md', 'resume', '# 李四\nPython Django 机器学习')
+
+    rows = {path: doc['rows'] for path, doc in first._load_meta()['documents'].items()}
+    assert set(rows) == {'a.md', 'b.md'}
+    assert not set(rows['a.md']) & set(rows['b.md'])
+
+    results = first.query(embed_texts(['Python 机器学习']), top_k=2)
+    assert [r['path'] for r in results][0] == 'b.md'
+
+    second.remove(['a.md'])
+    assert first.stats()['documents'] == 1
+    assert first.vectors('a.md') is None
+    assert first.vectors('b.md') is not None
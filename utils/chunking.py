@@ -0,0 +1,82 @@
+import re
+
+# 单个文本块的最大字符数，超过时按段落（仍过长时按行）继续切分
+MAX_CHUNK_CHARS = 800
+
+_HEADING = re.compile(r'^#{1,6}\s+\S')
+
+
+def split_sections(text):
+    """按Markdown标题把文档切成章节
+
+    标题之前的内容（如姓名、联系方式）作为标题为空字符串的第一节；代码块中的 # 不视为标题。
+
+    Returns:
+        list[tuple]: (标题行, 章节全文) 列表，章节全文包含标题行本身，按顺序拼接即为原文
+    """
+    sections = []
+    heading = ''
+    lines = []
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        if line.lstrip().startswith('```'):
+            in_fence = not in_fence
+        if not in_fence and _HEADING.match(line) and lines:
+            sections.append((heading, ''.join(lines)))
+            lines = []
+        if not in_fence and _HEADING.match(line):
+            heading = line.strip()
+        lines.append(line)
+    if lines:
+        sections.append((heading, ''.join(lines)))
+    return sections
+
+
+def _split_long(text, max_chars):
+    """把过长的文本按空行、再按换行切到不超过 max_chars"""
+    for separator in ('\n\n', '\n'):
+        parts = text.split(separator)
+        if len(parts) > 1:
+            break
+    else:
+        return [text[i:i + max_chars] for i in range(0, len(text), max_chars)]
+    chunks = []
+    current = ''
+    for part in parts:
+        candidate = f"{current}{separator}{part}" if current else part
+        if len(candidate) <= max_chars:
+            current = candidate
+            continue
+        if current:
+            chunks.append(current)
+        if len(part) > max_chars:
+            chunks.extend(_split_long(part, max_chars))
+            current = ''
+        else:
+            current = part
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def chunk_text(text, max_chars=MAX_CHUNK_CHARS):
+    """把文档切成用于向量检索的文本块：先按章节，过长的章节再按段落切分
+
+    切分出的后续块带上所属章节的标题，保留上下文。
+
+    Returns:
+        list[str]: 非空文本块
+    """
+    chunks = []
+    for heading, body in split_sections(text):
+        body = body.strip()
+        if not body:
+            continue
+        if len(body) <= max_chars:
+            chunks.append(body)
+            continue
+        for i, part in enumerate(_split_long(body, max_chars)):
+            part = part.strip()
+            if part:
+                chunks.append(f"{heading}\n{part}" if i and heading else part)
+    return chunks
@@ -0,0 +1,69 @@
+import hashlib
+import shutil
+from pathlib import Path
+from utils.disk_cache import DiskLRUCache
+
+CACHE_DIR = Path("workdir") / ".cache" / "conversions"
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+
+def file_hash(path, chunk_size=1024 * 1024):
+    """计算文件内容的sha256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ConversionCache(DiskLRUCache):
+    """按文件内容哈希缓存PDF/DOCX的转换结果
+
+    缓存键 = 源文件内容sha256 + 转换器版本，转换器升级后旧结果自动失效。
+    超过容量上限时按最近访问时间淘汰（LRU）。
+    """
+
+    suffix = '.md'
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        super().__init__(cache_dir, max_bytes)
+
+    def make_key(self, source_path, converter_version):
+        """生成缓存键"""
+        return hashlib.sha256(
+            f"{file_hash(source_path)}:{converter_version}".encode('utf-8')
+        ).hexdigest()
+
+    def get(self, key):
+        """读取缓存的转换文本，未命中返回None"""
+        entry_path = self._lookup(key)
+        return entry_path.read_text(encoding='utf-8') if entry_path else None
+
+    def copy_to(self, key, output_path):
+        """把缓存的转换结果复制到 output_path，未命中返回False"""
+        entry_path = self._lookup(key)
+        if entry_path is None:
+            return False
+        shutil.copyfile(entry_path, output_path)
+        return True
+
+    def put(self, key, text):
+        """写入转换结果并按容量上限淘汰旧条目"""
+        self._store(key, lambda tmp_path: tmp_path.write_bytes(text.encode('utf-8')))
+
+    def put_file(self, key, path):
+        """把已写入磁盘的转换结果文件存入缓存"""
+        self._store(key, lambda tmp_path: shutil.copyfile(path, tmp_path))
+
+
+_cache = None
+
+
+def get_conversion_cache():
+    """获取进程内共享的转换缓存实例"""
+    global _cache
+    if _cache is None:
+        from config import load_config
+        max_mb = load_config().get('conversion_cache_max_mb', DEFAULT_MAX_BYTES // (1024 * 1024))
+        _cache = ConversionCache(max_bytes=int(max_mb) * 1024 * 1024)
+    return _cache
@@ -0,0 +1,194 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from utils.file_lock import file_lock
+
+# 命中时的访问时间先记在内存中，最多间隔这么多秒合并写入一次索引
+ATIME_FLUSH_SECONDS = 30
+
+
+class DiskLRUCache:
+    """按键存放文件的磁盘缓存基类
+
+    每个条目是缓存目录下的一个文件（键 + suffix），index.json 记录条目大小、写入和访问时间。
+    超过容量上限时按最近访问时间淘汰（LRU）；设置了 ttl（秒）时条目写入超过 ttl 后失效。
+    子类负责生成缓存键以及条目内容的读写格式。
+
+    多个服务进程共用同一缓存目录：修改索引时持有文件锁（index.lock），重新读取磁盘上的索引，
+    合并本进程的修改后再写回；index.json 被其他进程替换后（mtime或inode变化）重新加载。
+    命中只更新内存中的访问时间，写入条目或距上次合并超过 ATIME_FLUSH_SECONDS 时才落盘。
+    """
+
+    suffix = ''
+
+    def __init__(self, cache_dir, max_bytes, ttl=None):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.index_path = self.cache_dir / "index.json"
+        self.lock_path = self.cache_dir / "index.lock"
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._index = None
+        self._index_stamp = None
+        # 尚未写入索引的访问时间 {键: atime}
+        self._touched = {}
+        self._touched_since = None
+
+    def _entry_path(self, key):
+        return self.cache_dir / f"{key}{self.suffix}"
+
+    def _expired(self, entry, now):
+        return self.ttl is not None and now - entry.get('created', entry['atime']) > self.ttl
+
+    def _lookup(self, key):
+        """命中时更新访问时间并返回条目文件路径，未命中、已过期或文件丢失时返回None"""
+        with self._lock:
+            index = self._load_index()
+            entry = index.get(key)
+            entry_path = self._entry_path(key)
+            now = time.time()
+            if entry is None or self._expired(entry, now) or not entry_path.exists():
+                if entry is not None:
+                    self._update(lambda index: self._drop(index, key))
+                self.misses += 1
+                return None
+            entry['atime'] = now
+            self._touched[key] = now
+            if self._touched_since is None:
+                self._touched_since = now
+            elif now - self._touched_since > ATIME_FLUSH_SECONDS:
+                self._update(lambda index: None)
+            self.hits += 1
+        return entry_path
+
+    def _discard(self, key):
+        """删除无法读取的条目，并把 _lookup 记下的命中改记为未命中"""
+        with self._lock:
+            self._update(lambda index: self._drop(index, key))
+            self.hits -= 1
+            self.misses += 1
+
+    def _drop(self, index, key):
+        if index.pop(key, None) is not None:
+            self._entry_path(key).unlink(missing_ok=True)
+        self._touched.pop(key, None)
+
+    def _store(self, key, write):
+        """write(tmp_path) 写入临时文件后原子替换为条目文件，再按容量上限淘汰旧条目"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, prefix=f".{key}.", suffix='.tmp')
+        os.close(fd)
+        try:
+            # 写入内容不持有锁，其他进程可以同时读写缓存
+            write(Path(tmp_path))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        def add(index):
+            entry_path = self._entry_path(key)
+            os.replace(tmp_path, entry_path)
+            now = time.time()
+            index[key] = {'size': entry_path.stat().st_size, 'created': now, 'atime': now}
+            self._evict(index)
+
+        with self._lock:
+            self._update(add)
+
+    def _update(self, change):
+        """持有文件锁，在磁盘上最新的索引上合并未落盘的访问时间并应用 change(index)，再写回
+
+        调用方持有 self._lock。
+        """
+        with file_lock(self.lock_path):
+            self._index = self._read_index()
+            for key, atime in self._touched.items():
+                entry = self._index.get(key)
+                if entry is not None and atime > entry['atime']:
+                    entry['atime'] = atime
+            self._touched = {}
+            self._touched_since = None
+            change(self._index)
+            self._save_index()
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        """返回命中/未命中计数与占用空间"""
+        with self._lock:
+            index = self._load_index()
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hit_rate(),
+                'entries': len(index),
+                'bytes': sum(e['size'] for e in index.values()),
+                'max_bytes': self.max_bytes
+            }
+
+    def flush(self):
+        """把内存中的访问时间写入索引"""
+        with self._lock:
+            if self._touched:
+                self._update(lambda index: None)
+
+    def clear(self):
+        """清空缓存"""
+        def remove_all(index):
+            for key in list(index):
+                self._drop(index, key)
+
+        with self._lock:
+            self._update(remove_all)
+
+    def _evict(self, index):
+        now = time.time()
+        for key in [k for k, e in index.items() if self._expired(e, now)]:
+            self._drop(index, key)
+        total = sum(e['size'] for e in index.values())
+        # 最久未访问的条目优先淘汰
+        for key, entry in sorted(index.items(), key=lambda kv: kv[1]['atime']):
+            if total <= self.max_bytes:
+                break
+            self._drop(index, key)
+            total -= entry['size']
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self.index_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_ino
+
+    def _load_index(self):
+        """返回内存中的索引，index.json 被其他进程更新后重新读取（保留未落盘的访问时间）"""
+        if self._index is None or self._stamp() != self._index_stamp:
+            self._index = self._read_index()
+            for key, atime in self._touched.items():
+                if key in self._index:
+                    self._index[key]['atime'] = max(atime, self._index[key]['atime'])
+        return self._index
+
+    def _read_index(self):
+        self._index_stamp = self._stamp()
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_index(self):
+        """写入索引（调用方持有文件锁）"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, self.index_path)
+        self._index_stamp = self._stamp()
@@ -0,0 +1,32 @@
+import os
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows 没有 fcntl，只能保证进程内互斥
+    fcntl = None
+
+# 同一进程内的线程先按路径互斥，flock 只负责进程之间
+_thread_locks = {}
+_thread_locks_guard = threading.Lock()
+
+
+@contextmanager
+def file_lock(path):
+    """跨进程的排他文件锁（多个 uvicorn worker 共用同一份数据文件时使用）
+
+    锁文件为 path 本身，不存在时自动创建；锁在文件描述符关闭时释放。
+    """
+    path = os.path.abspath(path)
+    with _thread_locks_guard:
+        thread_lock = _thread_locks.setdefault(path, threading.Lock())
+    with thread_lock:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)
@@ -2,24 +2,139 @@ from pathlib import Path
 import os
 import webbrowser
 from urllib.parse import quote
-from weasyprint import HTML
-from markdown import markdown
+from utils.convert_cache import get_conversion_cache
+from utils.pdf_render import get_renderer
+from utils.pdf_cache import get_pdf_cache
 
-# 文件格式转换功能,只需要extract text即可，因为要给LLM处理
-def convert_pdf_to_md(pdf_path, output_path):
-    """转换PDF文件到Markdown格式"""
-    from pdfminer.high_level import extract_text
-    text = extract_text(pdf_path)
+# 转换器版本号，升级转换逻辑时递增以使旧缓存失效
+PDF_CONVERTER_VERSION = 1
+DOCX_CONVERTER_VERSION = 1
+# PDF默认最多转换的页数和单页解析时限（秒），可在配置中用 pdf_max_pages、pdf_page_timeout 覆盖；
+# 时限在解析和版面分析的各步骤之间检查，单页实际耗时可能略超过时限
+DEFAULT_PDF_MAX_PAGES = 200
+DEFAULT_PDF_PAGE_TIMEOUT = 30
+# 达到该页数的PDF按页分段交给进程池并行解析，可用 pdf_parallel_pages、pdf_workers 覆盖
+DEFAULT_PDF_PARALLEL_PAGES = 20
+
+def pdf_limits():
+    """返回 (页数上限, 单页时限)，0 表示不限"""
+    from config import load_config
+    config = load_config()
+    return (int(config.get('pdf_max_pages', DEFAULT_PDF_MAX_PAGES)),
+            float(config.get('pdf_page_timeout', DEFAULT_PDF_PAGE_TIMEOUT)))
+
+def _pdf_converter_version():
+    import pdfminer
+    # 页数上限不同时转换结果不同，计入版本号
+    return f"pdfminer-{getattr(pdfminer, '__version__', '')}-v{PDF_CONVERTER_VERSION}-p{pdf_limits()[0]}"
+
+def _docx_converter_version():
+    import docx
+    return f"python-docx-{getattr(docx, '__version__', '')}-v{DOCX_CONVERTER_VERSION}"
+
+def _convert_with_cache(source_path, output_path, converter_version, convert):
+    """先按内容哈希查缓存，未命中时才真正执行转换"""
+    cache = get_conversion_cache()
+    key = cache.make_key(source_path, converter_version)
+    text = cache.get(key)
+    if text is None:
+        text = convert(source_path)
+        cache.put(key, text)
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write(text)
 
-def convert_docx_to_md(docx_path, output_path):
-    """转换DOCX文件到Markdown格式"""
+# 当前进程是否为批量导入进程池的工作进程，由进程池的 initializer 设置
+_in_worker_pool = False
+
+def mark_worker_pool():
+    """进程池 initializer：标记当前进程为工作进程，其中解析PDF时不再嵌套进程池"""
+    global _in_worker_pool
+    _in_worker_pool = True
+
+def _pdf_workers():
+    """并行解析单个PDF的进程数；已经在批量导入的工作进程中时不再嵌套进程池"""
+    from config import load_config
+    if _in_worker_pool:
+        return 1
+    return int(load_config().get('pdf_workers') or os.cpu_count() or 1)
+
+def _pdf_extractor(pdf_path):
+    from config import load_config
+    from utils.pdf_utils import PDFPageExtractor
+    max_pages, page_timeout = pdf_limits()
+    return PDFPageExtractor(
+        pdf_path, max_pages=max_pages, page_timeout=page_timeout or None, workers=_pdf_workers(),
+        parallel_pages=int(load_config().get('pdf_parallel_pages', DEFAULT_PDF_PARALLEL_PAGES))
+    )
+
+def _pdf_limit_notices(pdf_path, extractor):
+    """页数截断、单页超时跳过的说明，没有时返回空列表"""
+    name = Path(pdf_path).name
+    notices = []
+    if extractor.truncated:
+        notices.append(f"提示：{name} 超过 {extractor.max_pages} 页，只转换了前 {extractor.max_pages} 页")
+    if extractor.timed_out:
+        pages = '、'.join(str(n) for n in extractor.timed_out)
+        notices.append(f"警告：{name} 第 {pages} 页解析超过 {extractor.page_timeout:g} 秒，已跳过")
+    return notices
+
+def extract_pdf_text(pdf_path):
+    """提取PDF全文（不经过缓存）
+
+    遵循页数上限；有页面解析超时时抛出 PageTimeoutError，避免把不完整的结果写入缓存。
+    """
+    from utils.pdf_utils import PageTimeoutError
+    extractor = _pdf_extractor(pdf_path)
+    text = ''.join(extractor)
+    if extractor.timed_out:
+        pages = '、'.join(str(n) for n in extractor.timed_out)
+        raise PageTimeoutError(f"第 {pages} 页解析超过 {extractor.page_timeout:g} 秒")
+    return text
+
+def extract_docx_text(docx_path):
+    """提取DOCX全文（不经过缓存）"""
     from docx import Document
     doc = Document(docx_path)
-    text = '\n'.join([para.text for para in doc.paragraphs])
+    return '\n'.join([para.text for para in doc.paragraphs])
+
+def get_converter(suffix):
+    """按文件后缀返回 (转换器版本, 提取函数)，不支持转换时返回None"""
+    suffix = suffix.lower()
+    if suffix == '.pdf':
+        return _pdf_converter_version(), extract_pdf_text
+    if suffix == '.docx':
+        return _docx_converter_version(), extract_docx_text
+    return None
+
+# 文件格式转换功能,只需要extract text即可，因为要给LLM处理
+def convert_pdf_to_md(pdf_path, output_path):
+    """转换PDF文件到Markdown格式
+
+    逐页提取并立即写入输出文件，内存占用与文档长度无关，前几页写完即可读取。
+    超出页数上限的页不转换；解析超时的页以一行说明代替，这样的结果不写入缓存。
+
+    Returns:
+        list[str]: 页数截断、页面超时等需要告知用户的说明，由调用方决定如何展示
+    """
+    cache = get_conversion_cache()
+    key = cache.make_key(pdf_path, _pdf_converter_version())
+    extractor = _pdf_extractor(pdf_path)
+    if cache.copy_to(key, output_path):
+        # 缓存中的结果同样经过页数截断（上限计入了版本号），超时的结果不会进入缓存
+        from utils.pdf_utils import count_pages
+        extractor.truncated = bool(extractor.max_pages) and count_pages(pdf_path) > extractor.max_pages
+        return _pdf_limit_notices(pdf_path, extractor)
     with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(text)
+        for page in extractor:
+            f.write(page)
+            f.flush()
+    if not extractor.timed_out:
+        cache.put_file(key, output_path)
+    return _pdf_limit_notices(pdf_path, extractor)
+
+def convert_docx_to_md(docx_path, output_path):
+    """转换DOCX文件到Markdown格式"""
+    _convert_with_cache(docx_path, output_path, _docx_converter_version(), extract_docx_text)
 
 # --- Export to PDF ---
 def export_md_to_pdf(md_content: str, output_path: str | Path):
@@ -28,52 +143,40 @@ def export_md_to_pdf(md_content: str, output_path: str | Path):
     
     参数:
         md_content: Markdown格式的文本内容
-        output_path: 输出PDF路径（目录或完整文件路径）
+        output_path: 输出PDF路径（目录或完整文件路径）。传入目录时按内容哈希缓存，
+            输出到 <目录>/pdf/<候选人>_<哈希>.pdf，相同内容直接返回已有文件
         
     返回:
         生成的PDF文件路径
     """
     try:
         output_path = Path(output_path)
+        # 使用常驻渲染器，字体配置和样式表只构建一次
         if output_path.is_dir():
-            output_path = output_path / "resume_optimized.pdf"
-            
-        # 确保输出目录存在
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        html = markdown(md_content, extensions=["tables", "fenced_code"])
-        # 添加基本样式
-        html_content = f"""
-        <html>
-            <head>
-                <meta charset="utf-8">
-                <style>
-                    body {{ 
-                        font-family: SimSun;
-                        line-height: 1.6;
-                        margin: 2cm;
-                    }}
-                    h1, h2, h3 {{ color: #2c3e50; }}
-                    a {{ color: #3498db; text-decoration: none; }}
-                </style>
-            </head>
-            <body>
-                {html}
-            </body>
-        </html>
-        """
-        
-        # 使用WeasyPrint生成PDF
-        HTML(string=html_content).write_pdf(
-            target=str(output_path),
-            stylesheets=None,
-            presentational_hints=True
-        )
-        
-        return str(output_path)
+            return get_pdf_cache(output_path).export(md_content, get_renderer().render)
+        return get_renderer().render(md_content, output_path)
     except Exception as e:
         raise RuntimeError(f"PDF生成失败: {str(e)}") from e
 
 
+def export_many_md_to_pdf(documents, output_dir: str | Path):
+    """
+    批量将Markdown内容并行转换为PDF文件
+    
+    参数:
+        documents: [(文件名, Markdown内容)] 列表，文件名只用于标识结果
+        output_dir: 输出目录，PDF按内容哈希缓存到 <目录>/pdf/ 下，同名文档不会互相覆盖
+        
+    返回:
+        与输入顺序一致的结果列表，每项包含 name/path/attachment/error
+    """
+    results = get_pdf_cache(output_dir).export_many(
+        [md_content for _, md_content in documents],
+        get_renderer().render_many
+    )
+    return [{'name': name, **result} for (name, _), result in zip(documents, results)]
+
+
 def open_pdf_in_browser(pdf_path):
     """
     在默认浏览器中打开本地 PDF 文件
@@ -0,0 +1,71 @@
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+
+# 进入REPL前需要导入的模块
+STARTUP_IMPORTS = (
+    "import airecruit, commands, capacity.outbox, config, utils.workspace, prompt_toolkit, prompt_toolkit.history, "
+    "prompt_toolkit.completion, prompt_toolkit.styles"
+)
+
+# 延迟到首次使用时才导入的重量级依赖
+LAZY_IMPORTS = {
+    'litellm': '调用大模型',
+    'weasyprint': '导出PDF',
+    'pdfminer.high_level': '解析PDF',
+    'docx': '解析DOCX',
+    'redmail': '发送邮件',
+    'markdown': '渲染Markdown',
+    'numpy': '向量检索',
+}
+
+
+def measure_imports(code):
+    """在新的解释器中用 -X importtime 执行导入语句
+
+    Returns:
+        tuple: (总耗时微秒, {顶层包名: 自身耗时微秒})
+    """
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', code],
+        cwd=PROJECT_DIR, capture_output=True, text=True
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    by_package = defaultdict(int)
+    total = 0
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        by_package[package] += int(self_us)
+        total += int(self_us)
+    return total, dict(by_package)
+
+
+def print_import_profile(top=15):
+    """打印启动导入耗时明细以及各延迟依赖首次使用时的导入耗时
+
+    解释器自身启动时导入的模块（site、encodings等）作为基线扣除。
+    """
+    baseline, baseline_packages = measure_imports("pass")
+    total, by_package = measure_imports(STARTUP_IMPORTS)
+    print(f"启动导入耗时：{(total - baseline) / 1000:.1f} ms")
+    by_package = {
+        package: us - baseline_packages.get(package, 0)
+        for package, us in by_package.items()
+    }
+    for package, us in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]:
+        print(f"  {package:<24}{us / 1000:>10.1f} ms")
+
+    print("\n首次使用时才导入的依赖：")
+    for module, usage in LAZY_IMPORTS.items():
+        try:
+            lazy_total, _ = measure_imports(f"import {module}")
+            print(f"  {module:<24}{(lazy_total - baseline) / 1000:>10.1f} ms  （{usage}）")
+        except RuntimeError as e:
+            print(f"  {module:<24}{'导入失败':>10}  （{e}）")
@@ -0,0 +1,112 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from utils.convert_cache import get_conversion_cache
+from utils.file_utils import get_converter, mark_worker_pool
+
+SUPPORTED_SUFFIXES = ('.pdf', '.docx', '.md', '.txt')
+
+
+def scan_directory(directory="workdir"):
+    """扫描目录下可导入的文件
+
+    已有同名PDF/DOCX的.md文件视为之前的转换产物，不重复导入。
+    """
+    directory = Path(directory)
+    files = sorted(
+        p for p in directory.iterdir()
+        if p.is_file() and p.suffix.lower() in SUPPORTED_SUFFIXES
+    )
+    sources = {p.with_suffix('') for p in files if p.suffix.lower() in ('.pdf', '.docx')}
+    return [
+        p for p in files
+        if p.suffix.lower() not in ('.md', '.txt') or p.with_suffix('') not in sources
+    ]
+
+
+def bulk_ingest(paths, ws, file_type='auto', workers=None, progress=None):
+    """批量转换文件并一次性登记到工作区
+
+    PDF/DOCX的解析分发到进程池并行执行，单个文件失败不影响其余文件。
+    已缓存的文件直接命中转换缓存，不再进入进程池。
+
+    Args:
+        paths: 待导入的文件路径列表
+        ws: WorkspaceManager实例
+        file_type: 登记到工作区的文件类型
+        workers: 进程数，默认为CPU核数
+        progress: 进度回调，签名为 progress(已完成数, 总数, 单个结果)
+
+    Returns:
+        list[dict]: 每个文件的结果，包含 source/path/error/seconds
+    """
+    paths = [Path(p).resolve() for p in paths]
+    total = len(paths)
+    results = []
+    cache = get_conversion_cache()
+
+    def finish(result):
+        results.append(result)
+        if progress:
+            progress(len(results), total, result)
+
+    # 先处理无需转换或命中缓存的文件，剩余的交给进程池
+    pending = []
+    for path in paths:
+        started = time.perf_counter()
+        result = {'source': str(path), 'path': None, 'error': None, 'seconds': 0.0}
+        try:
+            if path.suffix.lower() in ('.md', '.txt'):
+                result['path'] = str(path)
+            else:
+                converter = get_converter(path.suffix)
+                if converter is None:
+                    raise ValueError(f"不支持的文件类型: {path.suffix}")
+                key = cache.make_key(path, converter[0])
+                text = cache.get(key)
+                if text is None:
+                    pending.append((path, key, converter[1]))
+                    continue
+                result['path'] = _write_markdown(path, text)
+        except Exception as e:
+            result['error'] = str(e)
+        result['seconds'] = time.perf_counter() - started
+        finish(result)
+
+    if pending:
+        workers = workers or os.cpu_count() or 1
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)),
+                                 initializer=mark_worker_pool) as executor:
+            futures = {
+                executor.submit(_timed_extract, extract, str(path)): (path, key)
+                for path, key, extract in pending
+            }
+            for future in as_completed(futures):
+                path, key = futures[future]
+                result = {'source': str(path), 'path': None, 'error': None, 'seconds': 0.0}
+                try:
+                    text, result['seconds'] = future.result()
+                    cache.put(key, text)
+                    result['path'] = _write_markdown(path, text)
+                except Exception as e:
+                    result['error'] = str(e)
+                finish(result)
+
+    # 所有结果统一登记，只写一次配置
+    ws.add_files([(r['path'], file_type) for r in results if r['path']])
+    return results
+
+
+def _timed_extract(extract, path):
+    """在工作进程中执行转换并计时"""
+    started = time.perf_counter()
+    text = extract(path)
+    return text, time.perf_counter() - started
+
+
+def _write_markdown(source_path, text):
+    md_path = Path(source_path).with_suffix('.md')
+    with open(md_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    return str(md_path)
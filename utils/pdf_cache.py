@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from pathlib import Path
+
+# 候选人名字从Markdown第一个一级/二级标题提取
+_HEADING_PATTERN = re.compile(r'^#{1,2}\s+(.+?)\s*$', re.MULTILINE)
+_UNSAFE_CHARS = re.compile(r'[\\/:*?"<>|\s]+')
+# 渲染锁的分段数：同一内容总落在同一把锁上，锁的数量固定不随导出次数增长
+RENDER_LOCK_STRIPES = 64
+# 附件编号取内容哈希的前若干位
+ATTACHMENT_ID_CHARS = 12
+
+
+def candidate_name(md_content):
+    """从简历Markdown中提取候选人名字，用作PDF文件名前缀"""
+    match = _HEADING_PATTERN.search(md_content)
+    name = _UNSAFE_CHARS.sub('_', match.group(1)).strip('_') if match else ''
+    return name[:40] or 'resume'
+
+
+def content_digest(md_content):
+    """Markdown内容的sha256，PDF缓存按它索引"""
+    return hashlib.sha256(md_content.encode('utf-8')).hexdigest()
+
+
+def attachment_id(md_content):
+    """导出PDF的附件编号，发送邮件时用它找回这一份PDF"""
+    return content_digest(md_content)[:ATTACHMENT_ID_CHARS]
+
+
+class PDFCache:
+    """按Markdown内容哈希缓存导出的PDF
+
+    相同内容直接返回已生成的文件；不同候选人的PDF使用各自的文件名，
+    并发导出不会再争用同一个输出文件。
+    """
+
+    def __init__(self, base_dir):
+        self.pdf_dir = Path(base_dir) / "pdf"
+        self.index_path = self.pdf_dir / "index.json"
+        self._lock = threading.Lock()
+        self._render_locks = [threading.Lock() for _ in range(RENDER_LOCK_STRIPES)]
+
+    def export(self, md_content, render):
+        """导出PDF，内容已导出过时直接返回已有文件
+
+        Args:
+            md_content: Markdown内容
+            render: 渲染函数，签名为 render(md_content, output_path)
+
+        Returns:
+            str: PDF文件路径
+        """
+        digest = content_digest(md_content)
+        # 同一内容同时只渲染一次，其余请求等待后直接命中缓存
+        with self._render_locks[int(digest[:8], 16) % RENDER_LOCK_STRIPES]:
+            entry = self.lookup(digest)
+            if entry is None:
+                output_path, tmp_path = self._output_paths(md_content, digest)
+                render(md_content, tmp_path)
+                entry = self._publish(md_content, output_path, tmp_path)
+            self._record(digest, entry)
+        return entry['path']
+
+    def export_many(self, md_contents, render_many):
+        """批量导出PDF，已导出过的内容直接命中，其余一次性并行渲染
+
+        Args:
+            md_contents: Markdown内容列表
+            render_many: 批量渲染函数，签名为 render_many([(md_content, output_path)])，
+                返回与输入顺序一致的 {path, error} 列表
+
+        Returns:
+            list[dict]: 与输入顺序一致的结果，包含 path/attachment/error
+        """
+        results = [None] * len(md_contents)
+        pending = {}
+        for i, md_content in enumerate(md_contents):
+            digest = content_digest(md_content)
+            entry = self.lookup(digest)
+            if entry is not None:
+                self._record(digest, entry)
+                results[i] = {'path': entry['path'], 'attachment': digest[:ATTACHMENT_ID_CHARS], 'error': None}
+            else:
+                # 同一批里内容相同的文档只渲染一次
+                pending.setdefault(digest, (md_content, []))[1].append(i)
+
+        jobs = [(digest, md_content, *self._output_paths(md_content, digest))
+                for digest, (md_content, _) in pending.items()]
+        rendered = render_many([(md_content, tmp_path) for _, md_content, _, tmp_path in jobs]) if jobs else []
+        for (digest, md_content, output_path, tmp_path), result in zip(jobs, rendered):
+            if result.get('error') is None:
+                self._record(digest, self._publish(md_content, output_path, tmp_path))
+                result = {'path': str(output_path), 'attachment': digest[:ATTACHMENT_ID_CHARS], 'error': None}
+            else:
+                Path(tmp_path).unlink(missing_ok=True)
+                result = {'path': None, 'attachment': None, 'error': result['error']}
+            for i in pending[digest][1]:
+                results[i] = result
+        return results
+
+    def _output_paths(self, md_content, digest):
+        """PDF的最终路径和渲染用的临时路径，临时文件名各不相同，并发渲染互不覆盖"""
+        output_path = self.pdf_dir / f"{candidate_name(md_content)}_{digest[:ATTACHMENT_ID_CHARS]}.pdf"
+        return output_path, output_path.with_name(f"{output_path.stem}.{uuid.uuid4().hex[:8]}.pdf.tmp")
+
+    def _publish(self, md_content, output_path, tmp_path):
+        os.replace(tmp_path, output_path)
+        return {'path': str(output_path), 'candidate': candidate_name(md_content)}
+
+    def lookup(self, digest):
+        """按内容哈希查找已导出的PDF，文件已被删除时视为未命中"""
+        with self._lock:
+            entry = self._load().get('entries', {}).get(digest)
+        if entry and Path(entry['path']).exists():
+            return entry
+        return None
+
+    def find(self, attachment):
+        """按附件编号（内容哈希前缀）查找已导出的PDF"""
+        with self._lock:
+            entries = self._load().get('entries', {})
+        matches = [e for digest, e in entries.items() if digest.startswith(attachment)]
+        if len(matches) == 1 and Path(matches[0]['path']).exists():
+            return matches[0]
+        return None
+
+    def latest(self, candidate):
+        """返回指定候选人最近一次导出（或命中）的PDF记录"""
+        with self._lock:
+            entries = self._load().get('entries', {})
+        exported = [
+            e for e in entries.values()
+            if e['candidate'] == candidate and Path(e['path']).exists()
+        ]
+        return max(exported, key=lambda e: e['exported'], default=None)
+
+    def _record(self, digest, entry):
+        with self._lock:
+            index = self._load()
+            index.setdefault('entries', {})[digest] = {**entry, 'exported': time.time()}
+            self.pdf_dir.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_suffix('.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(index, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+
+    def _load(self):
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+
+_caches = {}
+
+
+def get_pdf_cache(base_dir="workdir"):
+    """获取指定目录共享的PDF缓存实例"""
+    key = str(Path(base_dir).resolve())
+    if key not in _caches:
+        _caches[key] = PDFCache(base_dir)
+    return _caches[key]
@@ -0,0 +1,156 @@
+import atexit
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+RESUME_CSS = """
+body {
+    font-family: SimSun;
+    line-height: 1.6;
+    margin: 2cm;
+}
+h1, h2, h3 { color: #2c3e50; }
+a { color: #3498db; text-decoration: none; }
+"""
+
+HTML_TEMPLATE = """<html>
+    <head><meta charset="utf-8"></head>
+    <body>
+        {body}
+    </body>
+</html>"""
+
+
+def markdown_to_html(md_content):
+    """把Markdown渲染为完整的HTML文档（样式由预编译的样式表提供）"""
+    from markdown import markdown
+    body = markdown(md_content, extensions=["tables", "fenced_code"])
+    return HTML_TEMPLATE.format(body=body)
+
+
+class PDFRenderer:
+    """常驻进程内的PDF渲染器
+
+    字体配置和样式表只构建一次并在之后的每次导出中复用；
+    批量导出时使用一个预热过的进程池并行渲染。
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self._font_config = None
+        self._stylesheet = None
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _resources(self):
+        """首次使用时构建字体配置和样式表"""
+        if self._stylesheet is None:
+            from weasyprint import CSS
+            from weasyprint.text.fonts import FontConfiguration
+            self._font_config = FontConfiguration()
+            self._stylesheet = CSS(string=RESUME_CSS, font_config=self._font_config)
+        return self._font_config, self._stylesheet
+
+    def render(self, md_content, output_path):
+        """在当前进程渲染单个Markdown文档，返回PDF路径"""
+        from weasyprint import HTML
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        font_config, stylesheet = self._resources()
+        HTML(string=markdown_to_html(md_content)).write_pdf(
+            target=str(output_path),
+            stylesheets=[stylesheet],
+            font_config=font_config,
+            presentational_hints=True
+        )
+        return str(output_path)
+
+    def render_many(self, documents):
+        """并行渲染多个文档
+
+        Args:
+            documents: (Markdown内容, 输出路径) 列表
+
+        Returns:
+            list[dict]: 与输入顺序一致的结果，包含 path/error
+        """
+        if len(documents) <= 1 or self.workers <= 1:
+            return [_safe_render(self, md, path) for md, path in documents]
+        try:
+            executor = self._pool()
+            futures = [executor.submit(_render_in_worker, md, str(path)) for md, path in documents]
+        except BrokenProcessPool:
+            # 工作进程异常退出后进程池不可再用，换一个新的
+            executor = self._pool(renew=True, broken=executor)
+            futures = [executor.submit(_render_in_worker, md, str(path)) for md, path in documents]
+        results = []
+        broken = False
+        for future in futures:
+            try:
+                results.append(future.result())
+            except BrokenProcessPool as e:
+                broken = True
+                results.append({'path': None, 'error': str(e)})
+            except Exception as e:
+                results.append({'path': None, 'error': str(e)})
+        if broken:
+            # 本批已失败的文档如实返回错误，下一批换用新的进程池
+            self._pool(renew=True, broken=executor)
+        return results
+
+    def _pool(self, renew=False, broken=None):
+        """返回预热过的进程池；renew 时替换掉已损坏的进程池
+
+        broken 为调用方发现损坏的那个进程池，已被其他线程替换过时不再重复替换
+        """
+        with self._lock:
+            if renew and self._executor is not None and broken in (None, self._executor):
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_worker
+                )
+            return self._executor
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+def _safe_render(renderer, md_content, output_path):
+    try:
+        return {'path': renderer.render(md_content, output_path), 'error': None}
+    except Exception as e:
+        return {'path': None, 'error': str(e)}
+
+
+_worker_renderer = None
+
+
+def _init_worker():
+    """工作进程启动时导入WeasyPrint并构建字体和样式，避免首个任务承担冷启动"""
+    global _worker_renderer
+    _worker_renderer = PDFRenderer(workers=1)
+    _worker_renderer._resources()
+
+
+def _render_in_worker(md_content, output_path):
+    return _safe_render(_worker_renderer, md_content, output_path)
+
+
+_renderer = None
+
+
+def get_renderer():
+    """获取进程内共享的渲染器"""
+    global _renderer
+    if _renderer is None:
+        _renderer = PDFRenderer()
+        atexit.register(_renderer.shutdown)
+    return _renderer
@@ -1,101 +1,574 @@
+import atexit
 import re
-from pdfminer.high_level import extract_text_to_fp
-from pdfminer.layout import LAParams
+import threading
+import time
+from pdfminer.converter import TextConverter
+from pdfminer.layout import LAParams, LTPage
+from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+from pdfminer.pdfpage import PDFPage
 import io
 
+
+class PageTimeoutError(TimeoutError):
+    """A single PDF page took longer than the per-page time limit"""
+
+
+class _DeadlineList(list):
+    """List that checks the page deadline whenever an item is read"""
+
+    def __init__(self, items, check):
+        super().__init__(items)
+        self._check = check
+
+    def __iter__(self):
+        for item in super().__iter__():
+            self._check()
+            yield item
+
+    def __getitem__(self, index):
+        self._check()
+        return super().__getitem__(index)
+
+
+class _DeadlineLTPage(LTPage):
+    """LTPage whose layout analysis checks the deadline while grouping
+
+    Characters, lines and boxes are checked as each grouping stage walks them,
+    which covers the neighbour searches and the pairwise box distances. The
+    final heap merge inside group_textboxes runs to completion once started.
+    """
+
+    def __init__(self, pageid, bbox, check):
+        super().__init__(pageid, bbox)
+        self._check = check
+
+    def group_objects(self, laparams, objs):
+        return super().group_objects(laparams, _DeadlineList(objs, self._check))
+
+    def group_textlines(self, laparams, lines):
+        return super().group_textlines(laparams, _DeadlineList(lines, self._check))
+
+    def group_textboxes(self, laparams, boxes):
+        return super().group_textboxes(laparams, _DeadlineList(boxes, self._check))
+
+
+class _DeadlineTextConverter(TextConverter):
+    """TextConverter that aborts the current page once its deadline has passed
+
+    The deadline is checked while the page content is interpreted and during
+    layout analysis, so it is a soft limit: a page stops at the next check
+    after the deadline, not at the deadline itself.
+    """
+
+    deadline = None
+
+    def _check_deadline(self):
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise PageTimeoutError
+
+    def begin_page(self, page, ctm):
+        super().begin_page(page, ctm)
+        self.cur_item = _DeadlineLTPage(self.cur_item.pageid, self.cur_item.bbox, self._check_deadline)
+
+    def end_page(self, page):
+        self._check_deadline()
+        return super().end_page(page)
+
+    def render_char(self, *args, **kwargs):
+        self._check_deadline()
+        return super().render_char(*args, **kwargs)
+
+    def render_image(self, *args, **kwargs):
+        self._check_deadline()
+        return super().render_image(*args, **kwargs)
+
+    def paint_path(self, *args, **kwargs):
+        self._check_deadline()
+        return super().paint_path(*args, **kwargs)
+
+
+def _iter_page_texts(pdf_path, page_timeout=None, pages=None):
+    """Run layout analysis page by page
+
+    Args:
+        pages: range of zero-based page indexes to process, None for all pages
+
+    Yields:
+        tuple: (page number starting at 1, text, whether the page timed out)
+    """
+    first = pages.start if pages is not None else 0
+    with open(pdf_path, 'rb') as pdf_file:
+        rsrcmgr = PDFResourceManager(caching=True)
+        output = io.StringIO()
+        device = _DeadlineTextConverter(rsrcmgr, output, codec='utf-8', laparams=LAParams())
+        interpreter = PDFPageInterpreter(rsrcmgr, device)
+        try:
+            maxpages = pages.stop if pages is not None else 0
+            for number, page in enumerate(PDFPage.get_pages(pdf_file, pages, maxpages), first + 1):
+                if page_timeout:
+                    device.deadline = time.monotonic() + page_timeout
+                try:
+                    interpreter.process_page(page)
+                    yield number, output.getvalue(), False
+                except PageTimeoutError:
+                    yield number, '', True
+                output.seek(0)
+                output.truncate()
+        finally:
+            device.close()
+
+
+def _extract_page_range(pdf_path, page_timeout, start, stop):
+    """Process pool entry point: extract pages [start, stop) (zero-based)"""
+    return list(_iter_page_texts(pdf_path, page_timeout, range(start, stop)))
+
+
+def count_pages(pdf_path):
+    """Number of pages in a PDF, read from the page tree without parsing page contents"""
+    with open(pdf_path, 'rb') as pdf_file:
+        return sum(1 for _ in PDFPage.get_pages(pdf_file))
+
+
+_page_pool = None
+_page_pool_workers = 0
+_page_pool_lock = threading.Lock()
+
+
+def _get_page_pool(workers, renew=False):
+    """Process pool shared by all documents, created on first use and replaced
+    when the worker count changes or the pool is broken"""
+    global _page_pool, _page_pool_workers
+    from concurrent.futures import ProcessPoolExecutor
+    with _page_pool_lock:
+        if _page_pool is None or renew or _page_pool_workers != workers:
+            if _page_pool is not None:
+                # 其他线程已提交到旧进程池的分段照常完成
+                _page_pool.shutdown(wait=False)
+            else:
+                atexit.register(_shutdown_page_pool)
+            _page_pool = ProcessPoolExecutor(max_workers=workers)
+            _page_pool_workers = workers
+        return _page_pool
+
+
+def _shutdown_page_pool():
+    with _page_pool_lock:
+        if _page_pool is not None:
+            _page_pool.shutdown(wait=False, cancel_futures=True)
+
+
+class PDFPageExtractor:
+    """Extract the text of a PDF one page at a time
+
+    Only the layout objects of the current page are kept in memory. Pages are
+    yielded in pdfminer's text format (each ending with a form feed), so joining
+    them gives the same text as pdfminer.high_level.extract_text.
+
+    Documents with at least `parallel_pages` pages are split into contiguous page
+    ranges that are extracted in a process pool shared across documents; the
+    pages are still yielded in order, as soon as the range they belong to is done.
+
+    Args:
+        pdf_path: Path of the PDF file
+        max_pages: Stop after this many pages, 0 for no limit
+        page_timeout: Approximate seconds allowed per page, None for no limit.
+            Checked between interpreter operations and layout grouping steps, so
+            a page may run somewhat over before it is abandoned. A page that runs
+            over is replaced by a short note and extraction continues.
+        workers: Worker processes for large documents, 1 to always run in-process
+        parallel_pages: Page count from which the process pool is used
+    """
+
+    def __init__(self, pdf_path, max_pages=0, page_timeout=None, workers=1, parallel_pages=20):
+        self.pdf_path = pdf_path
+        self.max_pages = max_pages
+        self.page_timeout = page_timeout
+        self.workers = workers
+        self.parallel_pages = parallel_pages
+        self.pages = 0           # 已处理的页数
+        self.timed_out = []      # 超时跳过的页码（从1开始）
+        self.truncated = False   # 是否因页数上限而没有处理完
+
+    def __iter__(self):
+        for number, text, timed_out in self._iter_pages():
+            if timed_out:
+                self.timed_out.append(number)
+                text = f"[第{number}页解析超时，已跳过]\n\n\f"
+            self.pages = number
+            yield text
+
+    def _iter_pages(self):
+        total = count_pages(self.pdf_path) if self.workers > 1 or self.max_pages else 0
+        count = min(total, self.max_pages) if self.max_pages else total
+        self.truncated = count < total
+        if self.workers > 1 and count >= max(self.parallel_pages, 2):
+            yield from self._iter_parallel(count)
+        else:
+            pages = range(count) if self.max_pages else None
+            yield from _iter_page_texts(self.pdf_path, self.page_timeout, pages)
+
+    def _iter_parallel(self, count):
+        from concurrent.futures.process import BrokenProcessPool
+        # 每个进程分到约两段连续页，先完成的前几段可以先产出
+        size = -(-count // (self.workers * 2))
+        ranges = [(start, min(start + size, count)) for start in range(0, count, size)]
+        try:
+            executor = _get_page_pool(self.workers)
+            futures = [executor.submit(_extract_page_range, self.pdf_path, self.page_timeout, *r)
+                       for r in ranges]
+        except BrokenProcessPool:
+            # 工作进程异常退出后进程池不可再用，换一个新的
+            executor = _get_page_pool(self.workers, renew=True)
+            futures = [executor.submit(_extract_page_range, self.pdf_path, self.page_timeout, *r)
+                       for r in ranges]
+        try:
+            for future in futures:
+                yield from future.result()
+        finally:
+            # 提前关闭生成器时只取消尚未开始的分段，不等待正在运行的分段
+            for future in futures:
+                future.cancel()
+
+def _split_lines(chunks):
+    """Split a stream of text chunks into lines, joining lines that span chunks"""
+    tail = ''
+    for chunk in chunks:
+        lines = (tail + chunk).split('\n')
+        tail = lines.pop()
+        yield from lines
+    yield tail
+
+
+class _LineRule:
+    """A `^prefix\\s+(.+)$` substitution applied line by line with the same result
+    as re.sub(pattern, repl, text, flags=re.MULTILINE) on the whole text.
+
+    `\\s` also matches newlines, so a line consisting of only the prefix (or
+    only whitespace when leading whitespace is allowed) can match across the
+    following lines. Such `head` lines are matched against a window that ends
+    with the second non-blank line, the furthest the pattern can reach.
+    """
+
+    def __init__(self, prefix, repl, indented=False):
+        lead = r'[\s\u2003]*' if indented else ''
+        self.pattern = re.compile(rf'^{lead}{prefix}\s+(.+)$', re.MULTILINE)
+        self.repl = repl
+        self.indented = indented
+        self.head = re.compile(rf'{lead}(?:{prefix}\s*)?' if indented else rf'{prefix}\s*')
+        # 去掉行首空白后必须以前缀开头，其余行不需要运行完整的正则
+        self.first = re.compile(rf'{prefix}(?:\s|$)')
+
+    def apply(self, lines):
+        first = self.first.match
+        pending = []
+        for line in lines:
+            if not pending:
+                stripped = line.lstrip()
+                if stripped and not first(stripped):
+                    yield line
+                    continue
+                replaced = self._replace_line(line)
+                if replaced is not None:
+                    yield replaced
+                    continue
+            pending.append(line)
+            # 空白行不会让窗口完整，等到下一个非空白行再处理
+            if line.strip():
+                yield from self._drain(pending, final=False)
+        yield from self._drain(pending, final=True)
+
+    def _replace_line(self, line):
+        """Replace a line that cannot match across lines; None for `head` lines"""
+        stripped = line.lstrip()
+        if not stripped:
+            return None if self.indented else line
+        if not self.first.match(stripped):
+            return line
+        match = self.pattern.match(line)
+        if match is not None:
+            # 正文只有空白时说明贪婪的 \s+ 在整段文本中会越过换行
+            return match.expand(self.repl) if match[match.lastindex].strip() else None
+        return None if self.head.fullmatch(line) else line
+
+    def _drain(self, pending, final):
+        while pending:
+            replaced = self._replace_line(pending[0])
+            if replaced is not None:
+                del pending[0]
+                yield replaced
+                continue
+            non_blank = [i for i, line in enumerate(pending) if line.strip()][:2]
+            if non_blank and non_blank[0] and not self.first.match(pending[non_blank[0]].lstrip()):
+                # 空白行之后的第一行不以前缀开头，这些空白行不会参与匹配
+                yield from pending[:non_blank[0]]
+                del pending[:non_blank[0]]
+                continue
+            if len(non_blank) < 2 and not final:
+                return
+            size = non_blank[-1] + 1 if len(non_blank) == 2 else len(pending)
+            window = '\n'.join(pending[:size])
+            match = self.pattern.match(window)
+            if match:
+                size = window.count('\n', 0, match.end()) + 1
+                yield match.expand(self.repl)
+            elif pending[0].strip():
+                size = 1
+                yield pending[0]
+            else:
+                # 从空白行开始匹配失败时，同一段连续空白行中的后续行也必然失败
+                size = non_blank[0] if non_blank else len(pending)
+                yield from pending[:size]
+            del pending[:size]
+
+
+# 标题（顺序与处理顺序一致）
+_TITLE_UNDERLINE = re.compile(r'=+')
+_SECTION_UNDERLINE = re.compile(r'-+')
+_HEADING_RULES = [
+    # Numbered sections (support Chinese numbering)
+    _LineRule(r'(\d+\.\d+(?:\.\d+)*)', r'### \1 \2'),
+    # Chinese numbered headings (e.g. 第一章、第一节)
+    _LineRule(r'(第[一二三四五六七八九十百千零]+章)', r'# \1 \2'),
+    _LineRule(r'(第[一二三四五六七八九十百零]+节)', r'## \1 \2'),
+    # Parenthesized numbering (e.g. (1), (一))
+    _LineRule(r'\(([\d一二三四五六七八九十]+)\)', r'### \1. \2'),
+]
+# 列表
+_LIST_RULES = [
+    # 支持更多项目符号：•◦▫️➢等中文常用符号
+    _LineRule(r'([•◦▫➢])', r'- \2', indented=True),
+    # 处理数字列表（包含中文括号）
+    _LineRule(r'([（\(]?\d+[）\)]?)', r'\1. \2', indented=True),
+    # 处理字母列表
+    _LineRule(r'([a-zA-Z])[\.、]', r'\1. \2', indented=True),
+]
+_CODE_FENCE = '```'
+_CODE_INDENT = ' ' * 4
+_URL = re.compile(r'(https?://\S+)')
+_SPACES = re.compile(r' +')
+_FULLWIDTH_SPACES = re.compile(r'　+')
+
+
 class PDFToMarkdownConverter:
-    def __init__(self, pdf_path: str):
+    def __init__(self, pdf_path: str, max_pages=0, page_timeout=None, workers=1):
         self.pdf_path = pdf_path
-        
+        self.max_pages = max_pages
+        self.page_timeout = page_timeout
+        self.workers = workers
+        self.extractor = None
+
     def convert_to_markdown(self):
         """Convert PDF file to Markdown format with enhanced formatting
-        
+
         Raises:
             ValueError: If PDF is corrupted or invalid
             Exception: For other unexpected errors
         """
-        output = io.StringIO()
+        return '\n'.join(self.iter_markdown())
+
+    def write_markdown(self, output_path):
+        """Convert page by page and write each formatted line as soon as it is ready
+
+        Raises:
+            ValueError: If PDF is corrupted or invalid
+        """
+        with open(output_path, 'w', encoding='utf-8') as md_file:
+            lines = self.iter_markdown()
+            md_file.write(next(lines))
+            for line in lines:
+                md_file.write('\n')
+                md_file.write(line)
+
+    def iter_markdown(self):
+        """Yield the Markdown lines (without line breaks) while pages are extracted
+
+        Raises:
+            ValueError: If PDF is corrupted or invalid
+        """
+        self.extractor = PDFPageExtractor(self.pdf_path, self.max_pages, self.page_timeout,
+                                          workers=self.workers)
+        yield from self.format_lines(_split_lines(self._extract_pages()))
+
+    def _extract_pages(self):
+        has_text = False
         try:
-            # Extract text from PDF with layout preservation
-            with open(self.pdf_path, 'rb') as pdf_file:
-                try:
-                    extract_text_to_fp(
-                        pdf_file,
-                        output,
-                        laparams=LAParams(),
-                        output_type='text',
-                        codec='utf-8'
-                    )
-                except Exception as e:
-                    raise ValueError(f"Failed to extract text from PDF: {str(e)}") from e
-            
-            text = output.getvalue()
-            if not text.strip():
-                raise ValueError("Extracted PDF text is empty - possibly corrupted PDF")
-            
-            # Enhanced Markdown formatting (order matters!)
-            text = self.format_headings(text)
-            text = self.format_code_blocks(text)  # Process code blocks before lists
-            text = self.format_lists(text)
-            text = self.format_links(text)
-            
-            # Basic cleanup
-            text = re.sub(r'\n{3,}', '\n\n', text)  # Reduce excessive newlines
-            text = re.sub(r' +', ' ', text)         # Reduce multiple spaces
-            text = re.sub(r'　+', ' ', text)        # 清理中文全角空格
-            
-            return text
-                
+            for text in self.extractor:
+                has_text = has_text or bool(text.strip())
+                yield text
         except Exception as e:
-            raise
+            raise ValueError(f"Failed to extract text from PDF: {str(e)}") from e
+        if not has_text:
+            raise ValueError("Extracted PDF text is empty - possibly corrupted PDF")
+
+    def format_markdown(self, text):
+        """Apply all formatting steps to the whole text, see format_lines"""
+        return '\n'.join(self.format_lines(text.split('\n')))
+
+    def format_lines(self, lines):
+        """Apply all formatting steps in a single streaming pass over the lines
 
-    def format_headings(self,text):
+        Stages run in order (headings, code blocks, lists, links, cleanup), each one
+        consuming the lines produced by the previous one, so the text is never
+        rebuilt between steps.
+        """
+        lines = self._headings(lines)
+        lines = self._code_blocks(lines)  # Process code blocks before lists
+        lines = self._lists(lines)
+        # Basic cleanup
+        lines = self._collapse_blank_lines(lines)  # Reduce excessive newlines
+        return (self._clean_line(line) for line in lines)
+
+    def format_headings(self, text):
         """Detect and format headings based on patterns"""
-        # Format document title with ==== underline
-        text = re.sub(r'^(.+)\n=+$', r'# \1', text, flags=re.MULTILINE)
-        # Format section titles with ---- underline
-        text = re.sub(r'^(.+)\n-+$', r'## \1', text, flags=re.MULTILINE)
-        # Format numbered sections (support Chinese numbering)
-        text = re.sub(r'^(\d+\.\d+(?:\.\d+)*)\s+(.+)$', r'### \1 \2', text, flags=re.MULTILINE)
-        # Format Chinese numbered headings (e.g. 第一章、第一节)
-        text = re.sub(r'^(第[一二三四五六七八九十百千零]+章)\s+(.+)$', r'# \1 \2', text, flags=re.MULTILINE)
-        text = re.sub(r'^(第[一二三四五六七八九十百零]+节)\s+(.+)$', r'## \1 \2', text, flags=re.MULTILINE)
-        # Format parenthesized numbering (e.g. (1), (一))
-        text = re.sub(r'^\(([\d一二三四五六七八九十]+)\)\s+(.+)$', r'### \1. \2', text, flags=re.MULTILINE)
-        return text
-
-    def format_lists(self,text):
+        return '\n'.join(self._headings(text.split('\n')))
+
+    def format_lists(self, text):
         """Detect and format bullet points and numbered lists"""
-        # 支持更多项目符号：•◦▫️➢等中文常用符号
-        text = re.sub(r'^[\s\u2003]*([•◦▫➢])\s+(.+)$', r'- \2', text, flags=re.MULTILINE)
-        # 处理数字列表（包含中文括号）
-        text = re.sub(r'^[\s\u2003]*([（\(]?\d+[）\)]?)\s+(.+)$', r'\1. \2', text, flags=re.MULTILINE)
-        # 处理字母列表
-        text = re.sub(r'^[\s\u2003]*([a-zA-Z])[\.、]\s+(.+)$', r'\1. \2', text, flags=re.MULTILINE)
-        return text
-
-    def format_code_blocks(self,text):
+        return '\n'.join(self._lists(text.split('\n')))
+
+    def format_code_blocks(self, text):
         """Detect and format code blocks based on indentation"""
-        # Group consecutive indented lines into single code blocks
-        text = re.sub(r'((?:^ {4,}.*\n)+)', r'```\n\1```\n\n', text, flags=re.MULTILINE)
-        # 清理代码块前后的空行
-        text = re.sub(r'\n+```', '\n```', text)
-        text = re.sub(r'```\n+', '```\n', text)
-        return text
+        return '\n'.join(self._code_blocks(text.split('\n')))
 
-    def format_links(self,text):
+    def format_links(self, text):
         """Detect and format URLs as Markdown links"""
-        text = re.sub(r'(https?://\S+)', r'[\1](\1)', text)
-        return text
+        return _URL.sub(r'[\1](\1)', text)
+
+    def _headings(self, lines):
+        # Document title with ==== underline, section titles with ---- underline
+        lines = self._underlined(lines, _TITLE_UNDERLINE, '# ')
+        lines = self._underlined(lines, _SECTION_UNDERLINE, '## ')
+        for rule in _HEADING_RULES:
+            lines = rule.apply(lines)
+        return lines
+
+    def _lists(self, lines):
+        for rule in _LIST_RULES:
+            lines = rule.apply(lines)
+        return lines
+
+    @staticmethod
+    def _underlined(lines, underline, prefix):
+        previous = None
+        for line in lines:
+            if previous and underline.fullmatch(line):
+                yield prefix + previous
+                previous = None
+                continue
+            if previous is not None:
+                yield previous
+            previous = line
+        if previous is not None:
+            yield previous
+
+    def _code_blocks(self, lines):
+        lines = self._fence_indented(lines)
+        # 清理代码块前后的空行
+        lines = self._strip_blank_before_fence(lines)
+        return self._strip_blank_after_fence(lines)
+
+    @staticmethod
+    def _fence_indented(lines):
+        # Group consecutive indented lines into single code blocks; a line only
+        # belongs to a block when a line break follows it
+        in_block = False
+        previous = None
+        for line in lines:
+            if previous is not None:
+                if previous.startswith(_CODE_INDENT):
+                    if not in_block:
+                        yield _CODE_FENCE
+                        in_block = True
+                elif in_block:
+                    yield _CODE_FENCE
+                    yield ''
+                    in_block = False
+                yield previous
+            previous = line
+        if in_block:
+            yield _CODE_FENCE
+            yield ''
+        if previous is not None:
+            yield previous
+
+    @staticmethod
+    def _strip_blank_before_fence(lines):
+        # 多个换行后接 ``` 时只保留一个换行
+        blank = 0
+        first = True
+        for line in lines:
+            if not line:
+                blank += 1
+                continue
+            if line.startswith(_CODE_FENCE) and blank:
+                blank = 1 if first else 0
+            for _ in range(blank):
+                yield ''
+            blank = 0
+            first = False
+            yield line
+        for _ in range(blank):
+            yield ''
+
+    @staticmethod
+    def _strip_blank_after_fence(lines):
+        # ``` 后接多个换行时只保留一个换行
+        after_fence = False
+        blank = 0
+        for line in lines:
+            if not line and after_fence:
+                blank += 1
+                continue
+            after_fence = line.endswith(_CODE_FENCE)
+            blank = 0
+            yield line
+        if blank:
+            yield ''
+
+    @staticmethod
+    def _collapse_blank_lines(lines):
+        # 三个及以上连续换行压缩为两个
+        blank = 0
+        content_before = False
+        for line in lines:
+            if not line:
+                blank += 1
+                continue
+            if blank:
+                yield from PDFToMarkdownConverter._blank_run(blank, content_before, True)
+                blank = 0
+            content_before = True
+            yield line
+        if blank:
+            yield from PDFToMarkdownConverter._blank_run(blank, content_before, False)
+
+    @staticmethod
+    def _blank_run(blank, content_before, content_after):
+        # 连续 blank 个空行对应的换行数取决于两侧是否有内容
+        edges = content_before + content_after
+        newlines = blank + edges - 1
+        if newlines >= 3:
+            blank = 2 - edges + 1
+        return [''] * blank
+
+    @staticmethod
+    def _clean_line(line):
+        if 'http' in line:
+            line = _URL.sub(r'[\1](\1)', line)
+        if '  ' in line:
+            line = _SPACES.sub(' ', line)  # Reduce multiple spaces
+        if '　' in line:
+            line = _FULLWIDTH_SPACES.sub(' ', line)  # 清理中文全角空格
+        return line
 
 
 # 使用示例
 if __name__ == "__main__":
     converter = PDFToMarkdownConverter("/Users/alex/work/ai/hunter/repo/202106/java开发工程师-李世民.pdf")
     markdown_content = converter.convert_to_markdown()
-    
+
     # 保存Markdown文件
     with open("output.md", "w", encoding="utf-8") as md_file:
         md_file.write(markdown_content)
-    
-    print(f"Successfully converted PDF to Markdown. Output saved to output.md")
\ No newline at end of file
+
+    print(f"Successfully converted PDF to Markdown. Output saved to output.md")
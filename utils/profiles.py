@@ -0,0 +1,308 @@
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from utils.convert_cache import file_hash
+
+PROFILE_DIR = Path("workdir") / ".profiles"
+# 抽取规则变化时递增，旧的侧车文件自动重新生成
+PROFILE_VERSION = 1
+# 任职要求最多保留的条数和每条的字符数
+MAX_REQUIREMENTS = 8
+MAX_REQUIREMENT_CHARS = 120
+# 结构化信息中最多列出的技能数
+MAX_SKILLS = 20
+# 进程内最多缓存的文件哈希和结构化信息条数，超出时淘汰最久未使用的
+MEMO_SIZE = 256
+
+# 常见技能词表，匹配结果统一为此处的写法
+SKILL_KEYWORDS = [
+    'Java', 'Python', 'Go', 'Golang', 'C++', 'C#', 'Rust', 'Scala', 'Kotlin', 'Swift', 'PHP', 'Ruby',
+    'JavaScript', 'TypeScript', 'Node.js', 'React', 'Vue', 'Angular', 'HTML', 'CSS', 'SQL',
+    'Spring', 'Spring Boot', 'Spring Cloud', 'MyBatis', 'Django', 'Flask', 'FastAPI', 'gRPC', 'Dubbo',
+    'MySQL', 'PostgreSQL', 'Oracle', 'MongoDB', 'Redis', 'Elasticsearch', 'ClickHouse', 'HBase', 'Hive',
+    'Kafka', 'RocketMQ', 'RabbitMQ', 'Flink', 'Spark', 'Hadoop', 'Airflow',
+    'Docker', 'Kubernetes', 'Linux', 'Nginx', 'Git', 'Jenkins', 'Terraform', 'Prometheus',
+    'AWS', 'Azure', 'GCP', 'TensorFlow', 'PyTorch', 'Pandas', 'NumPy',
+    '微服务', '分布式', '高并发', '高可用', '机器学习', '深度学习', '自然语言处理', '推荐系统', '搜索引擎',
+    '大数据', '数据仓库', '云原生', '性能优化', '架构设计', '项目管理', '团队管理',
+]
+# 容易与普通英文单词混淆的短技能名只按原大小写匹配
+_CASE_SENSITIVE_SKILLS = {'Go', 'Git', 'Spring', 'Swift', 'Ruby', 'Rust', 'Oracle', 'Vue', 'Spark', 'Hive'}
+
+_EMAIL = re.compile(r'[A-Za-z0-9._%+-]+@[A-Za-z0-9-]+(?:\.[A-Za-z0-9-]+)*\.[A-Za-z]{2,}')
+_PHONE = re.compile(r'(?<![\d+])(?:\+?86[- ]?)?1[3-9]\d{9}(?!\d)|(?<!\d)0\d{2,3}-\d{7,8}(?!\d)')
+# 字段值截止到两个以上空白、分隔符或行尾
+_VALUE = r'\s*[：:]\s*\**\s*([^\n|｜，,；;]+?)\s*\**(?=\s{2,}|[|｜，,；;]|$)'
+_RESUME_TITLE = re.compile(r'(?:求职意向|期望职位|应聘职位|应聘岗位|目标职位|意向岗位)' + _VALUE, re.MULTILINE)
+_JD_TITLE = re.compile(r'(?:招聘职位|职位名称|岗位名称|招聘|职位|岗位)' + _VALUE, re.MULTILINE)
+_COMPANY = re.compile(r'(?:公司名称|公司|企业)' + _VALUE, re.MULTILINE)
+_HR_LINE = re.compile(r'hr|招聘|投递|简历|联系|邮箱|e-?mail', re.IGNORECASE)
+_HEADING = re.compile(r'^\s*#+\s*(.+?)\s*#*\s*$')
+_BULLET = re.compile(r'^\s*(?:[-*+•·]|\d+[.、)）])\s*')
+_REQUIREMENT_SECTION = re.compile(r'要求|资格|任职|requirement|qualification', re.IGNORECASE)
+_EDUCATION_LINE = re.compile(r'大学|学院|学校|本科|硕士|博士|研究生|教育|university|college|bachelor|master|ph\.?d',
+                             re.IGNORECASE)
+_DATE = r'((?:19|20)\d{2})\s*(?:[./年-]\s*(\d{1,2})\s*月?)?'
+_DATE_RANGE = re.compile(_DATE + r'\s*(?:-|–|—|~|～|至|到)\s*(?:' + _DATE + r'|(至今|现在|今|present|now))',
+                         re.IGNORECASE)
+_STATED_YEARS = re.compile(r'(\d{1,2})\s*(?:\+|多)?\s*年(?:以上|及以上)?(?:的)?(?:工作|开发|相关|从业)?经验'
+                           r'|(\d{1,2})\+?\s*years?(?:\s+of)?\s+(?:\w+\s+)?experience', re.IGNORECASE)
+_REQUIRED_YEARS = re.compile(r'(\d{1,2})\s*年(?:以上|及以上)|(\d{1,2})\+?\s*years?', re.IGNORECASE)
+
+
+def _skill_pattern(skills):
+    # 长的写法优先，"Spring Boot" 不会被拆成 "Spring"
+    alternatives = '|'.join(
+        re.escape(s) if s in _CASE_SENSITIVE_SKILLS else f"(?i:{re.escape(s)})"
+        for s in sorted(skills, key=len, reverse=True)
+    )
+    return re.compile(r'(?<![A-Za-z0-9+#.])(?:' + alternatives + r')(?![A-Za-z0-9+#])')
+
+
+_SKILLS = _skill_pattern(SKILL_KEYWORDS)
+_CANONICAL_SKILLS = {s.lower(): s for s in SKILL_KEYWORDS}
+
+
+def _unique(items):
+    return list(dict.fromkeys(items))
+
+
+def _first_value(pattern, text):
+    match = pattern.search(text)
+    return match.group(1).strip() if match else None
+
+
+def extract_skills(text):
+    """按技能词表匹配文本中出现的技能，按首次出现的顺序返回"""
+    return _unique(_CANONICAL_SKILLS[m.group(0).lower()] for m in _SKILLS.finditer(text))[:MAX_SKILLS]
+
+
+def _months(year, month):
+    return int(year) * 12 + (int(month) - 1 if month and 1 <= int(month) <= 12 else 0)
+
+
+def _experience_years(text):
+    """简历中的工作年限：优先用自述的"N年经验"，否则合并工作经历的起止时间（跳过教育经历）"""
+    stated = [int(a or b) for a, b in _STATED_YEARS.findall(text)]
+    if stated:
+        return float(max(stated))
+    now = time.localtime()
+    spans = []
+    for line in text.splitlines():
+        if _EDUCATION_LINE.search(line):
+            continue
+        for start_year, start_month, end_year, end_month, ongoing in _DATE_RANGE.findall(line):
+            start = _months(start_year, start_month)
+            end = now.tm_year * 12 + now.tm_mon - 1 if ongoing else _months(end_year, end_month)
+            if end > start:
+                spans.append((start, end))
+    total = 0
+    current_start = current_end = None
+    for start, end in sorted(spans):
+        if current_end is None or start > current_end:
+            if current_end is not None:
+                total += current_end - current_start
+            current_start, current_end = start, end
+        else:
+            current_end = max(current_end, end)
+    if current_end is not None:
+        total += current_end - current_start
+    # 精确到半年
+    return round(total / 6) / 2 if total else None
+
+
+def _required_years(text):
+    match = _REQUIRED_YEARS.search(text)
+    return float(match.group(1) or match.group(2)) if match else None
+
+
+def _strip_markup(line):
+    return _BULLET.sub('', line.strip().strip('*')).strip().strip('*').strip()
+
+
+def _title_line(text):
+    """第一行标题（或较短的首行），简历中一般是姓名，JD中一般是职位名称"""
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        heading = _HEADING.match(line)
+        name = _strip_markup(heading.group(1) if heading else line)
+        if heading or (len(name) <= 20 and not re.search(r'[：:@]', name)):
+            return name or None
+        return None
+    return None
+
+
+def _requirements(text):
+    """JD中"任职要求"一节的列表条目"""
+    requirements = []
+    in_section = False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        heading = _HEADING.match(stripped)
+        is_bullet = bool(_BULLET.match(stripped))
+        # Markdown标题，或PDF转换文本中"任职要求："这类短行
+        if heading or (not is_bullet and len(stripped) <= 15 and stripped.endswith((':', '：'))):
+            in_section = bool(_REQUIREMENT_SECTION.search(stripped))
+            continue
+        if in_section and is_bullet:
+            requirements.append(_strip_markup(stripped)[:MAX_REQUIREMENT_CHARS])
+            if len(requirements) >= MAX_REQUIREMENTS:
+                break
+    return requirements
+
+
+def _hr_email(text, emails):
+    for line in text.splitlines():
+        if _HR_LINE.search(line):
+            match = _EMAIL.search(line)
+            if match:
+                return match.group(0)
+    return emails[0] if emails else None
+
+
+def extract_profile(text, file_type):
+    """从简历或JD文本中抽取结构化信息（纯规则，不调用大模型）
+
+    Args:
+        file_type: 'jd' 按职位描述抽取，其他类型按简历抽取
+
+    Returns:
+        dict: type/name/contact/job_title/company/skills/experience_years/hr_email/requirements，
+            不适用或未找到的字段为None或空列表
+    """
+    emails = _unique(_EMAIL.findall(text))
+    phones = _unique(_PHONE.findall(text))
+    is_jd = file_type == 'jd'
+    if is_jd:
+        job_title = _first_value(_JD_TITLE, text) or _title_line(text)
+    else:
+        job_title = _first_value(_RESUME_TITLE, text)
+    return {
+        'version': PROFILE_VERSION,
+        'type': 'jd' if is_jd else 'resume',
+        'name': None if is_jd else _title_line(text),
+        'contact': {'emails': emails, 'phones': phones},
+        'job_title': job_title,
+        'company': _first_value(_COMPANY, text) if is_jd else None,
+        'skills': extract_skills(text),
+        'experience_years': _required_years(text) if is_jd else _experience_years(text),
+        'hr_email': _hr_email(text, emails) if is_jd else None,
+        'requirements': _requirements(text) if is_jd else [],
+    }
+
+
+def _years(value):
+    return f"{value:g}"
+
+
+def format_profile(profile):
+    """把结构化信息格式化为一行摘要，用于系统提示"""
+    if not profile:
+        return ''
+    contact = '、'.join(profile['contact']['emails'] + profile['contact']['phones'])
+    skills = '、'.join(profile['skills'])
+    years = profile['experience_years']
+    if profile['type'] == 'jd':
+        fields = [
+            ('职位', profile['job_title']),
+            ('公司', profile['company']),
+            ('HR邮箱', profile['hr_email']),
+            ('经验要求', f"{_years(years)}年以上" if years else None),
+            ('技能要求', skills),
+        ]
+    else:
+        fields = [
+            ('候选人', profile['name']),
+            ('联系方式', contact),
+            ('求职意向', profile['job_title']),
+            ('工作年限', f"约{_years(years)}年" if years else None),
+            ('技能', skills),
+        ]
+    return '；'.join(f"{label}：{value}" for label, value in fields if value)
+
+
+def format_requirements(profile):
+    """把JD的结构化信息和任职要求格式化为精简的职位描述，信息不足时返回空字符串"""
+    if not profile or not profile['requirements']:
+        return ''
+    return '\n'.join([format_profile(profile)] + [f"- {r}" for r in profile['requirements']])
+
+
+class ProfileStore:
+    """按文件内容哈希存放结构化信息的侧车JSON（workdir/.profiles/<sha256>.json）
+
+    文件内容不变时只抽取一次；同一路径在修改时间和大小不变时不重复计算哈希。
+    进程内的哈希和结构化信息按LRU各保留最近 memo_size 条。
+    """
+
+    def __init__(self, profile_dir=PROFILE_DIR, memo_size=MEMO_SIZE):
+        self.profile_dir = Path(profile_dir)
+        self.memo_size = memo_size
+        self._lock = threading.Lock()
+        self._hashes = OrderedDict()
+        self._profiles = OrderedDict()
+
+    def _remember(self, memo, key, value):
+        memo[key] = value
+        memo.move_to_end(key)
+        if len(memo) > self.memo_size:
+            memo.popitem(last=False)
+
+    def _hash(self, path):
+        stat = os.stat(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        cached = self._hashes.get(path)
+        if cached and cached[0] == stamp:
+            self._hashes.move_to_end(path)
+            return cached[1]
+        digest = file_hash(path)
+        self._remember(self._hashes, path, (stamp, digest))
+        return digest
+
+    def get(self, path, file_type):
+        """返回文件的结构化信息，侧车不存在或已过期时抽取并写入"""
+        path = str(path)
+        with self._lock:
+            digest = self._hash(path)
+            profile = self._profiles.get(digest) or self._read(digest)
+            if profile is None or profile.get('version') != PROFILE_VERSION \
+                    or profile['type'] != ('jd' if file_type == 'jd' else 'resume'):
+                with open(path, 'r', encoding='utf-8') as f:
+                    profile = extract_profile(f.read(), file_type)
+                self._write(digest, profile)
+            self._remember(self._profiles, digest, profile)
+            return profile
+
+    def _read(self, digest):
+        try:
+            with open(self.profile_dir / f"{digest}.json", 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def _write(self, digest, profile):
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        sidecar = self.profile_dir / f"{digest}.json"
+        tmp_path = sidecar.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(profile, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, sidecar)
+
+
+_store = None
+
+
+def get_profile_store():
+    """返回进程内共享的结构化信息存储"""
+    global _store
+    if _store is None:
+        _store = ProfileStore()
+    return _store
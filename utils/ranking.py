@@ -0,0 +1,155 @@
+import json
+import math
+import re
+from collections import Counter
+from pathlib import Path
+
+# 英文单词/技能名（保留 c++、c#、node.js 这类写法）
+_WORD_PATTERN = re.compile(r'[a-z0-9][a-z0-9+#.]*')
+_CJK_PATTERN = re.compile(r'[一-鿿]+')
+
+RANK_PROMPT = '''你是一位资深招聘顾问。请根据职位描述评估候选人简历与职位的匹配程度，
+只返回如下JSON，不要输出其他内容：
+{{"score": 0到100的整数, "reason": "不超过50字的理由"}}
+
+### 职位描述
+{jd}
+
+### 候选人简历
+{resume}'''
+
+# 发给模型评分时每份文档截取的最大字符数
+MAX_DOC_CHARS = 4000
+
+
+def tokenize(text):
+    """中英文混合分词：英文按单词，中文按单字和相邻二字"""
+    text = text.lower()
+    tokens = [w.rstrip('.') for w in _WORD_PATTERN.findall(text)]
+    for run in _CJK_PATTERN.findall(text):
+        tokens.extend(run)
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return [t for t in tokens if t]
+
+
+class BM25Index:
+    """内存中的BM25索引，用于在调用大模型前快速粗筛"""
+
+    def __init__(self, documents, k1=1.5, b=0.75):
+        """
+        Args:
+            documents: {文档id: 文本}
+        """
+        self.k1 = k1
+        self.b = b
+        self.doc_ids = list(documents)
+        self.term_freqs = [Counter(tokenize(documents[d])) for d in self.doc_ids]
+        self.doc_lens = [sum(tf.values()) for tf in self.term_freqs]
+        self.avg_len = (sum(self.doc_lens) / len(self.doc_lens)) if self.doc_lens else 0.0
+        doc_freq = Counter()
+        for tf in self.term_freqs:
+            doc_freq.update(tf.keys())
+        n = len(self.doc_ids)
+        self.idf = {
+            term: math.log(1 + (n - df + 0.5) / (df + 0.5))
+            for term, df in doc_freq.items()
+        }
+
+    def score(self, query):
+        """返回按得分降序排列的 (文档id, 得分) 列表"""
+        query_terms = Counter(tokenize(query))
+        scores = []
+        for doc_id, tf, length in zip(self.doc_ids, self.term_freqs, self.doc_lens):
+            norm = self.k1 * (1 - self.b + self.b * length / self.avg_len) if self.avg_len else self.k1
+            total = 0.0
+            for term, qf in query_terms.items():
+                f = tf.get(term)
+                if f:
+                    total += self.idf[term] * f * (self.k1 + 1) / (f + norm) * qf
+            scores.append((doc_id, total))
+        scores.sort(key=lambda item: item[1], reverse=True)
+        return scores
+
+
+def rank_resumes(jd_text, resumes, top_k=5, use_llm=True, model=None, jd_profile=None, profiles=None):
+    """对全部简历按JD排序
+
+    先用BM25对所有简历粗筛，只把前 top_k 份交给大模型打分。
+
+    Args:
+        jd_text: 职位描述文本
+        resumes: {简历路径: 简历文本}
+        top_k: 交给大模型精排的简历数量
+        use_llm: 为False时只返回BM25粗筛结果
+        jd_profile: JD的结构化信息，包含任职要求时代替JD全文发给模型
+        profiles: {简历路径: 结构化信息}，用于列出候选人命中的技能要求
+
+    Returns:
+        list[dict]: 按匹配度降序排列的候选人，包含 path/name/bm25/score/reason，
+            提供结构化信息时另含 matched_skills/experience_years
+    """
+    shortlist = BM25Index(resumes).score(jd_text)[:top_k]
+    results = [
+        {'path': path, 'name': Path(path).stem, 'bm25': round(bm25, 4),
+         'score': None, 'reason': None}
+        for path, bm25 in shortlist
+    ]
+    if profiles:
+        required = set(jd_profile['skills']) if jd_profile else set()
+        for result in results:
+            profile = profiles.get(result['path'])
+            if profile:
+                result['matched_skills'] = [s for s in profile['skills'] if s in required]
+                result['experience_years'] = profile['experience_years']
+    if not use_llm:
+        return results
+
+    from llm.client import complete
+    from utils.profiles import format_requirements
+    jd_brief = format_requirements(jd_profile) or jd_text[:MAX_DOC_CHARS]
+    for result in results:
+        prompt = RANK_PROMPT.format(
+            jd=jd_brief,
+            resume=resumes[result['path']][:MAX_DOC_CHARS]
+        )
+        try:
+            reply = complete([{"role": "user", "content": prompt}], model=model, temperature=0,
+                             purpose='rank')
+            result.update(_parse_score(reply))
+        except Exception as e:
+            result['reason'] = f"评分失败: {str(e)}"
+    results.sort(key=lambda r: (r['score'] is not None, r['score'] or 0, r['bm25']), reverse=True)
+    return results
+
+
+def _parse_score(reply):
+    match = re.search(r'\{.*\}', reply, re.DOTALL)
+    if not match:
+        raise ValueError(f"无法解析评分结果: {reply[:100]}")
+    data = json.loads(match.group(0))
+    return {'score': int(data['score']), 'reason': data.get('reason', '')}
+
+
+def rank_workspace(ws, jd_path=None, top_k=5, use_llm=True):
+    """用工作区中的JD对工作区全部简历排序
+
+    未指定JD时使用第一份JD；类型为 auto 的文件按简历处理。
+    结构化信息取自入库时生成的侧车文件，缺失时当场抽取。
+
+    Returns:
+        tuple: (使用的JD路径, 排序结果)
+    """
+    jds = dict(ws.iter_documents(('jd',)))
+    if not jds:
+        raise ValueError("工作区没有JD文件，请先添加")
+    jd_path = jd_path or next(iter(jds))
+    if jd_path not in jds:
+        raise ValueError(f"JD文件不在工作区中: {jd_path}")
+    resumes = dict(ws.iter_documents(('resume', 'auto')))
+    if not resumes:
+        raise ValueError("工作区没有简历文件，请先添加")
+    from utils.profiles import get_profile_store
+    store = get_profile_store()
+    profiles = {path: store.get(path, 'resume') for path in resumes}
+    return jd_path, rank_resumes(jds[jd_path], resumes, top_k=top_k, use_llm=use_llm,
+                                 jd_profile=store.get(jd_path, 'jd'), profiles=profiles)
@@ -0,0 +1,185 @@
+import hashlib
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from utils.ranking import tokenize
+
+INDEX_PATH = Path("workdir") / ".index" / "search.db"
+# 搜索结果摘要的字符数
+SNIPPET_CHARS = 80
+
+# 查询中用 "+" 分隔多个条件，c++ 之类的写法不拆分
+_TERM_SEPARATOR = re.compile(r'\s*(?<!\+)\+(?![+#])\s*|[,，、]')
+_CJK_RUN = re.compile(r'[一-鿿]+')
+
+
+def _query_tokens(term):
+    """把单个查询条件转换为需要同时命中的索引词
+
+    中文只用相邻二字（单字时用单字），避免单字匹配过宽。
+    """
+    tokens = [t for t in tokenize(term) if not _CJK_RUN.fullmatch(t)]
+    for run in _CJK_RUN.findall(term):
+        if len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def build_match_query(query):
+    """把 "Java + RocketMQ + 5年" 这类查询转换为 FTS5 MATCH 表达式"""
+    tokens = []
+    for term in _TERM_SEPARATOR.split(query):
+        tokens.extend(_query_tokens(term))
+    # 去重并转义为FTS短语，所有词之间取 AND
+    unique = list(dict.fromkeys(tokens))
+    return ' AND '.join('"' + t.replace('"', '""') + '"' for t in unique)
+
+
+class SearchIndex:
+    """基于SQLite FTS5的持久化全文索引
+
+    文本入库前先用 utils.ranking.tokenize 切成中英文词，再交给 FTS5 建立倒排索引；
+    同时保存原文用于生成摘要，查询时无需重新读取文件。
+    """
+
+    def __init__(self, db_path=INDEX_PATH):
+        self.db_path = Path(db_path)
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    @contextmanager
+    def _connect(self):
+        """打开连接，正常结束时提交并关闭"""
+        with self._lock:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path))
+            try:
+                self._ensure_schema(conn)
+                yield conn
+                conn.commit()
+            finally:
+                conn.close()
+
+    def _ensure_schema(self, conn):
+        if not self._initialized:
+            conn.executescript('''
+                CREATE TABLE IF NOT EXISTS documents (
+                    id INTEGER PRIMARY KEY,
+                    path TEXT UNIQUE NOT NULL,
+                    type TEXT NOT NULL,
+                    hash TEXT NOT NULL
+                );
+                CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+                    body UNINDEXED,
+                    tokens,
+                    tokenize = "unicode61 tokenchars '+#.'"
+                );
+            ''')
+            self._initialized = True
+
+    def add(self, path, file_type, content=None):
+        """索引单个文件，内容未变化时只更新类型"""
+        if content is None:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        tokens = ' '.join(tokenize(content))
+        with self._connect() as conn:
+            row = conn.execute('SELECT id, hash FROM documents WHERE path = ?', (path,)).fetchone()
+            if row and row[1] == digest:
+                conn.execute('UPDATE documents SET type = ? WHERE id = ?', (file_type, row[0]))
+                return
+            if row:
+                self._delete(conn, row[0])
+            doc_id = conn.execute(
+                'INSERT INTO documents (path, type, hash) VALUES (?, ?, ?)',
+                (path, file_type, digest)
+            ).lastrowid
+            # 全文表的rowid与documents.id一致，增删都按rowid定位
+            conn.execute(
+                'INSERT INTO documents_fts (rowid, body, tokens) VALUES (?, ?, ?)',
+                (doc_id, content, tokens)
+            )
+
+    def remove(self, paths):
+        """从索引中删除文件"""
+        with self._connect() as conn:
+            for path in paths:
+                row = conn.execute('SELECT id FROM documents WHERE path = ?', (path,)).fetchone()
+                if row:
+                    self._delete(conn, row[0])
+
+    def _delete(self, conn, doc_id):
+        conn.execute('DELETE FROM documents_fts WHERE rowid = ?', (doc_id,))
+        conn.execute('DELETE FROM documents WHERE id = ?', (doc_id,))
+
+    def indexed_paths(self):
+        with self._connect() as conn:
+            return {path for path, in conn.execute('SELECT path FROM documents')}
+
+    def sync(self, workspace_files):
+        """使索引与工作区文件列表一致：补充缺失的文件，删除已移出的文件"""
+        indexed = self.indexed_paths()
+        current = {f['path']: f['type'] for f in workspace_files}
+        self.remove([p for p in indexed if p not in current])
+        for path, file_type in current.items():
+            if path not in indexed and Path(path).exists():
+                self.add(path, file_type)
+
+    def search(self, query, limit=20, file_type=None):
+        """全文检索
+
+        Args:
+            query: 查询条件，多个条件用 + 或逗号分隔，需同时满足
+            limit: 最多返回的结果数
+            file_type: 只返回指定类型（resume/jd/auto）的文件
+
+        Returns:
+            list[dict]: 按相关度排序的结果，包含 path/name/type/score/snippet
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+        sql = '''
+            SELECT d.path, d.type, bm25(documents_fts) AS score, documents_fts.body
+            FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid
+            WHERE documents_fts MATCH ?
+        '''
+        params = [match]
+        if file_type:
+            sql += ' AND d.type = ?'
+            params.append(file_type)
+        sql += ' ORDER BY score LIMIT ?'
+        params.append(limit)
+        with self._connect() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        terms = [t for t in _TERM_SEPARATOR.split(query) if t.strip()]
+        return [
+            {'path': path, 'name': Path(path).name, 'type': doc_type,
+             'score': round(-score, 4), 'snippet': _snippet(body, terms)}
+            for path, doc_type, score, body in rows
+        ]
+
+
+def _snippet(body, terms):
+    """截取第一个命中条件附近的原文"""
+    lowered = body.lower()
+    positions = [lowered.find(t.strip().lower()) for t in terms]
+    positions = [p for p in positions if p >= 0]
+    start = max(min(positions) - SNIPPET_CHARS // 4, 0) if positions else 0
+    return ' '.join(body[start:start + SNIPPET_CHARS].split())
+
+
+_index = None
+
+
+def get_search_index():
+    """获取进程内共享的全文索引实例"""
+    global _index
+    if _index is None:
+        _index = SearchIndex()
+    return _index
@@ -0,0 +1,340 @@
+import hashlib
+import json
+import math
+import os
+import threading
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from config import load_config
+from utils.chunking import chunk_text
+from utils.file_lock import file_lock
+from utils.ranking import tokenize
+
+INDEX_DIR = Path("workdir") / ".index"
+# 默认使用本地特征哈希向量（不联网、不需要模型），它只反映词面重合，不理解同义词和语义；
+# 需要语义匹配时配置为任意 litellm 支持的向量模型，
+# 如 openai/text-embedding-3-small，或在本机CPU上运行的 ollama/nomic-embed-text
+DEFAULT_EMBEDDING_MODEL = 'hash'
+DEFAULT_HASH_DIM = 512
+# 每次调用向量模型最多提交的文本块数
+EMBED_BATCH_SIZE = 64
+# 向量矩阵扩容时的最小行数
+MIN_CAPACITY = 256
+# 匹配结果中最相关文本块的摘要字符数
+SNIPPET_CHARS = 80
+
+
+def embedding_model():
+    """配置的向量模型（配置项 embedding_model）"""
+    return load_config().get('embedding_model') or DEFAULT_EMBEDDING_MODEL
+
+
+def is_lexical(model=None):
+    """向量模型是否为只按词面匹配的本地哈希向量"""
+    return (model or embedding_model()) == 'hash'
+
+
+def _hash_embed(texts, dim):
+    """特征哈希向量：分词后按词哈希到固定维度，词频取对数，结果L2归一化"""
+    import numpy as np
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for token, count in Counter(tokenize(text)).items():
+            h = zlib.crc32(token.encode('utf-8'))
+            # 最高位决定符号，减少哈希冲突带来的偏差
+            vectors[row, h % dim] += (1.0 if h & 0x80000000 else -1.0) * (1.0 + math.log(count))
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def embed_texts(texts, model=None):
+    """计算文本向量
+
+    Returns:
+        numpy.ndarray: float32 矩阵，每行一个L2归一化的向量
+    """
+    import numpy as np
+    model = model or embedding_model()
+    if model == 'hash':
+        return _hash_embed(texts, int(load_config().get('embedding_dim') or DEFAULT_HASH_DIM))
+
+    from litellm import embedding
+    from llm.metrics import LLMCall
+    rows = []
+    for start in range(0, len(texts), EMBED_BATCH_SIZE):
+        usage = {}
+        call = LLMCall(model, 'embedding', [])
+        try:
+            response = embedding(model=model, input=texts[start:start + EMBED_BATCH_SIZE])
+        except BaseException as e:
+            call.finish(usage, error=e)
+            raise
+        usage['prompt_tokens'] = getattr(getattr(response, 'usage', None), 'prompt_tokens', 0) or 0
+        call.first_token()
+        call.finish(usage)
+        rows.extend(item['embedding'] for item in response.data)
+    vectors = np.asarray(rows, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+class VectorIndex:
+    """持久化的文本块向量索引
+
+    向量存放在内存映射的 float32 矩阵文件中（embeddings.f32），每行一个文本块；
+    行号与文件、文本块的对应关系存放在 embeddings.json。删除文件时空出的行留给后续新增的文本块复用，
+    矩阵行数不够时成倍扩容。更换向量模型后旧向量全部失效，下次同步时重新计算。
+
+    多个服务进程共用同一索引：读写都持有文件锁（embeddings.lock），
+    embeddings.json 被其他进程替换后（mtime或inode变化）重新加载。
+    """
+
+    def __init__(self, index_dir=INDEX_DIR):
+        self.index_dir = Path(index_dir)
+        self.matrix_path = self.index_dir / "embeddings.f32"
+        self.meta_path = self.index_dir / "embeddings.json"
+        self.lock_path = self.index_dir / "embeddings.lock"
+        self._lock = threading.Lock()
+        self._meta = None
+        self._meta_stamp = None
+        self._matrix = None
+
+    @contextmanager
+    def _locked(self):
+        """进程内线程锁 + 跨进程文件锁"""
+        with self._lock, file_lock(self.lock_path):
+            yield
+
+    def _stamp(self):
+        try:
+            stat = os.stat(self.meta_path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_ino
+
+    def _load_meta(self):
+        stamp = self._stamp()
+        if self._meta is None or stamp != self._meta_stamp:
+            # 其他进程可能已扩容矩阵，按新的行数重新映射
+            self._matrix = None
+            self._meta_stamp = stamp
+            try:
+                with open(self.meta_path, 'r', encoding='utf-8') as f:
+                    self._meta = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._meta = None
+        model = embedding_model()
+        if self._meta is None or self._meta['model'] != model:
+            self._reset(model)
+        return self._meta
+
+    def _reset(self, model):
+        self._matrix = None
+        self.matrix_path.unlink(missing_ok=True)
+        # dim 在第一次写入向量时确定
+        self._meta = {'model': model, 'dim': None, 'capacity': 0, 'free': [], 'documents': {}}
+
+    def _save_meta(self):
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.meta_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._meta, f, ensure_ascii=False)
+        os.replace(tmp_path, self.meta_path)
+        self._meta_stamp = self._stamp()
+
+    def _open_matrix(self):
+        import numpy as np
+        meta = self._meta
+        if self._matrix is None and meta['capacity']:
+            self._matrix = np.memmap(self.matrix_path, dtype=np.float32, mode='r+',
+                                     shape=(meta['capacity'], meta['dim']))
+        return self._matrix
+
+    def _allocate(self, count, dim):
+        """分配 count 个空闲行，不够时扩容矩阵文件"""
+        meta = self._meta
+        if meta['dim'] is None:
+            meta['dim'] = dim
+        elif meta['dim'] != dim:
+            raise ValueError(f"向量维度 {dim} 与索引中的 {meta['dim']} 不一致")
+        if len(meta['free']) < count:
+            old = meta['capacity']
+            capacity = max(MIN_CAPACITY, old * 2, old + count - len(meta['free']))
+            if self._matrix is not None:
+                self._matrix.flush()
+                self._matrix = None
+            self.index_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.matrix_path, 'ab') as f:
+                f.truncate(capacity * dim * 4)
+            meta['capacity'] = capacity
+            meta['free'].extend(range(old, capacity))
+        rows = meta['free'][:count]
+        del meta['free'][:count]
+        return rows
+
+    def _release(self, rows):
+        matrix = self._open_matrix()
+        if rows and matrix is not None:
+            matrix[rows] = 0
+        self._meta['free'].extend(rows)
+
+    def add(self, path, file_type, content=None):
+        """切块并计算向量，内容未变化时只更新类型"""
+        if content is None:
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        with self._locked():
+            meta = self._load_meta()
+            doc = meta['documents'].get(path)
+            if doc and doc['hash'] == digest:
+                doc['type'] = file_type
+                self._save_meta()
+                return
+            model = meta['model']
+        # 调用向量模型可能较慢，不持有锁
+        chunks = chunk_text(content)
+        vectors = embed_texts(chunks, model) if chunks else None
+        with self._locked():
+            meta = self._load_meta()
+            if meta['model'] != model:
+                # 期间更换了向量模型，索引已重建，下次同步时按新模型计算
+                return
+            old = meta['documents'].pop(path, None)
+            if old:
+                self._release(old['rows'])
+            rows = self._allocate(len(chunks), vectors.shape[1]) if chunks else []
+            if rows:
+                self._open_matrix()[rows] = vectors
+                self._matrix.flush()
+            meta['documents'][path] = {
+                'type': file_type,
+                'hash': digest,
+                'rows': rows,
+                'snippets': [' '.join(c.split())[:SNIPPET_CHARS] for c in chunks],
+            }
+            self._save_meta()
+
+    def remove(self, paths):
+        """删除文件的全部文本块"""
+        with self._locked():
+            meta = self._load_meta()
+            removed = [meta['documents'].pop(p) for p in paths if p in meta['documents']]
+            if not removed:
+                return
+            for doc in removed:
+                self._release(doc['rows'])
+            if self._matrix is not None:
+                self._matrix.flush()
+            self._save_meta()
+
+    def sync(self, workspace_files):
+        """使索引与工作区文件列表一致：补充缺失的文件，删除已移出的文件"""
+        with self._locked():
+            indexed = set(self._load_meta()['documents'])
+        current = {f['path']: f['type'] for f in workspace_files}
+        self.remove([p for p in indexed if p not in current])
+        for path, file_type in current.items():
+            if path not in indexed and Path(path).exists():
+                self.add(path, file_type)
+
+    def vectors(self, path):
+        """已索引文件的文本块向量，未索引或没有内容时返回None"""
+        with self._locked():
+            doc = self._load_meta()['documents'].get(path)
+            if doc is None or not doc['rows']:
+                return None
+            return self._open_matrix()[doc['rows']]
+
+    def query(self, vectors, top_k=10, file_types=None, exclude=()):
+        """按相似度返回最匹配的文件
+
+        每个查询向量在文件的全部文本块中取最高相似度（点积），再对查询向量取平均，
+        即文件对查询各部分（如JD的各项要求）的平均覆盖程度。
+
+        Args:
+            vectors: 查询向量矩阵（每行一个L2归一化的向量）
+            file_types: 只返回这些类型的文件
+            exclude: 不参与排序的文件路径
+
+        Returns:
+            list[dict]: 按得分降序排列，包含 path/name/type/score/snippet
+        """
+        import numpy as np
+        with self._locked():
+            meta = self._load_meta()
+            docs = [
+                (path, doc) for path, doc in meta['documents'].items()
+                if doc['rows'] and path not in exclude
+                and (file_types is None or doc['type'] in file_types)
+            ]
+            if not docs or len(vectors) == 0:
+                return []
+            rows = np.concatenate([np.asarray(doc['rows']) for _, doc in docs])
+            owners = np.repeat(np.arange(len(docs)), [len(doc['rows']) for _, doc in docs])
+            similarity = self._open_matrix()[rows] @ np.asarray(vectors, dtype=np.float32).T
+
+        best = np.full((len(docs), similarity.shape[1]), -np.inf, dtype=np.float32)
+        np.maximum.at(best, owners, similarity)
+        scores = best.mean(axis=1)
+        chunk_scores = similarity.max(axis=1)
+        results = []
+        for i in np.argsort(-scores, kind='stable')[:top_k]:
+            path, doc = docs[i]
+            own = np.flatnonzero(owners == i)
+            best_chunk = int(own[np.argmax(chunk_scores[own])] - own[0])
+            results.append({
+                'path': path, 'name': Path(path).name, 'type': doc['type'],
+                'score': round(float(scores[i]), 4), 'snippet': doc['snippets'][best_chunk]
+            })
+        return results
+
+    def stats(self):
+        with self._locked():
+            meta = self._load_meta()
+            return {
+                'model': meta['model'],
+                'dim': meta['dim'],
+                'documents': len(meta['documents']),
+                'chunks': sum(len(d['rows']) for d in meta['documents'].values()),
+                'capacity': meta['capacity'],
+            }
+
+
+_index = None
+
+
+def get_vector_index():
+    """获取进程内共享的向量索引实例"""
+    global _index
+    if _index is None:
+        _index = VectorIndex()
+    return _index
+
+
+def match_workspace(ws, jd_path=None, query=None, top_k=10):
+    """按向量相似度为JD（或一段查询文本）匹配工作区简历
+
+    未指定查询文本时使用工作区中的JD（默认第一份），JD已入索引时直接复用其文本块向量。
+    类型为 auto 的文件按简历处理。
+
+    Returns:
+        tuple: (查询说明（JD路径或查询文本）, 匹配结果)
+    """
+    index = get_vector_index()
+    index.sync(ws.config['workspace_files'])
+    if query:
+        vectors = embed_texts(chunk_text(query) or [query])
+        return query, index.query(vectors, top_k=top_k, file_types=('resume', 'auto'))
+    jd_files = [f['path'] for f in ws.config['workspace_files'] if f['type'] == 'jd']
+    if not jd_files:
+        raise ValueError("工作区没有JD文件，请先添加或提供查询文本")
+    jd_path = jd_path or jd_files[0]
+    if jd_path not in jd_files:
+        raise ValueError(f"JD文件不在工作区中: {jd_path}")
+    vectors = index.vectors(jd_path)
+    if vectors is None:
+        raise ValueError(f"JD文件没有可匹配的内容: {jd_path}")
+    return jd_path, index.query(vectors, top_k=top_k, file_types=('resume', 'auto'), exclude=(jd_path,))
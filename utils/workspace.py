@@ -1,33 +1,102 @@
 from pathlib import Path
 import json
-from config import load_config, save_config
+import logging
+from config import load_config, save_config, config_lock
+from utils.search_index import get_search_index
+from utils.vector_index import get_vector_index
+from utils.profiles import get_profile_store, format_profile
+
+# 索引、抽取失败不影响文件登记，记录为警告日志（未配置日志时输出到stderr），不再打印到stdout
+logger = logging.getLogger('airecruit.workspace')
 
 class WorkspaceManager:
-    def __init__(self):
-        self.config = load_config()
+    """工作区文件管理，数据存放在进程内共享的配置中，创建实例不会读盘"""
+
+    @property
+    def config(self):
+        return load_config()
     
     def add_file(self, path: str, file_type: str):
         """添加文件到工作区并存储内容"""
-        # 去重处理
-        self.config['workspace_files'] = [
-            f for f in self.config['workspace_files']
-            if f['path'] != path
-        ]
-        
-        self.config['workspace_files'].append({
-            'path': path,
-            'type': file_type,
-        })
-        save_config(self.config)
+        with config_lock():
+            config = self.config
+            # 去重处理
+            config['workspace_files'] = [
+                f for f in config['workspace_files']
+                if f['path'] != path
+            ]
+            
+            config['workspace_files'].append({
+                'path': path,
+                'type': file_type,
+            })
+            save_config(config)
+        self._index([(path, file_type)])
+        self._extract_profiles([(path, file_type)])
+    
+    def add_files(self, entries: list):
+        """批量添加文件到工作区，只写一次配置
+
+        Args:
+            entries: (path, file_type) 元组列表
+        """
+        paths = {path for path, _ in entries}
+        with config_lock():
+            config = self.config
+            config['workspace_files'] = [
+                f for f in config['workspace_files']
+                if f['path'] not in paths
+            ]
+            for path, file_type in entries:
+                config['workspace_files'].append({
+                    'path': path,
+                    'type': file_type,
+                })
+            save_config(config)
+        self._index(entries)
+        self._extract_profiles(entries)
     
     def remove_files(self, paths: list):
         """从工作区移除指定路径的文件"""
         # 保留不在移除列表中的文件
-        self.config['workspace_files'] = [
-            f for f in self.config['workspace_files']
-            if f['path'] not in paths
-        ]
-        save_config(self.config)
+        with config_lock():
+            config = self.config
+            config['workspace_files'] = [
+                f for f in config['workspace_files']
+                if f['path'] not in paths
+            ]
+            save_config(config)
+        try:
+            get_search_index().remove(paths)
+        except Exception as e:
+            logger.warning("更新全文索引失败：%s", e)
+        try:
+            get_vector_index().remove(paths)
+        except Exception as e:
+            logger.warning("更新向量索引失败：%s", e)
+
+    def _index(self, entries):
+        """增量更新全文索引和向量索引，索引失败不影响文件登记"""
+        index = get_search_index()
+        vectors = get_vector_index()
+        for path, file_type in entries:
+            try:
+                index.add(path, file_type)
+            except Exception as e:
+                logger.warning("索引文件 %s 失败：%s", path, e)
+            try:
+                vectors.add(path, file_type)
+            except Exception as e:
+                logger.warning("计算文件 %s 的向量失败：%s", path, e)
+
+    def _extract_profiles(self, entries):
+        """抽取并保存结构化信息，抽取失败不影响文件登记"""
+        store = get_profile_store()
+        for path, file_type in entries:
+            try:
+                store.get(path, file_type)
+            except Exception as e:
+                logger.warning("抽取文件 %s 的结构化信息失败：%s", path, e)
     
     def get_resumes(self):
         """获取所有简历内容"""
@@ -50,6 +119,47 @@ class WorkspaceManager:
                     break; """暂时只读第一份jd文件"""
         return content
     
+    def get_profiles(self):
+        """获取第一份简历和第一份JD的结构化信息
+
+        Returns:
+            dict: {'resume': 简历信息, 'jd': JD信息}，没有对应文件时为None
+        """
+        profiles = {'resume': None, 'jd': None}
+        store = get_profile_store()
+        for f in self.config['workspace_files']:
+            if f['type'] in profiles and profiles[f['type']] is None:
+                profiles[f['type']] = store.get(f['path'], f['type'])
+        return profiles
+
+    def get_profile_summary(self, profiles=None):
+        """返回用于系统提示的结构化信息摘要（含JD的任职要求），没有可用信息时返回空字符串
+
+        Args:
+            profiles: 已读取的 get_profiles() 结果，省略时读取
+        """
+        profiles = profiles or self.get_profiles()
+        lines = []
+        for label, profile in (('简历', profiles['resume']), ('JD', profiles['jd'])):
+            summary = format_profile(profile)
+            if summary:
+                lines.append(f"- {label}：{summary}")
+        if profiles['jd'] and profiles['jd']['requirements']:
+            lines.append("- JD任职要求：")
+            lines.extend(f"  - {r}" for r in profiles['jd']['requirements'])
+        return '\n'.join(lines)
+    
+    def iter_documents(self, file_types):
+        """逐个读取指定类型的全部工作区文件
+
+        Yields:
+            tuple: (文件路径, 文件内容)
+        """
+        for f in list(self.config['workspace_files']):
+            if f['type'] in file_types:
+                with open(f['path'], 'r', encoding='utf-8') as file:
+                    yield f['path'], file.read()
+    
     def get_file_types(self):
         """返回文件类型统计"""
         types = {'resume': 0, 'jd': 0}